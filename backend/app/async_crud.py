@@ -0,0 +1,142 @@
+"""
+Async CRUD operations for the Campus Event Management System
+
+Read queries reuse the statements built in app.crud and run natively on the
+AsyncSession. Writes run the sync crud functions through
+AsyncSession.run_sync, so the locking and validation rules live in one place.
+"""
+
+from datetime import datetime
+from typing import AsyncIterator, List, Optional, Tuple
+from sqlmodel.ext.asyncio.session import AsyncSession
+
+from app import crud
+from app.models import Student, Event, Registration, Attendance, Feedback
+from app.schemas import RegistrationCreate, AttendanceCreate, FeedbackCreate
+
+
+# Event CRUD
+async def get_event(db: AsyncSession, event_id: int) -> Optional[Event]:
+    """Get event by ID"""
+    return await db.get(Event, event_id)
+
+
+async def get_events_with_stats(
+    db: AsyncSession,
+    filters: Optional[crud.EventFilters] = None,
+    limit: Optional[int] = None,
+    after: Optional[Tuple[datetime, int]] = None,
+    ascending: bool = False
+) -> List[Tuple[Event, int, int, Optional[float]]]:
+    """Get events with registration count, attendance count and average rating in one query"""
+    query = crud._events_with_stats_query(filters, after, ascending)
+    if limit:
+        query = query.limit(limit)
+    return [crud._event_with_stats_row(row) for row in await db.exec(query)]
+
+
+async def get_event_rows_with_stats(
+    db: AsyncSession,
+    filters: Optional[crud.EventFilters] = None,
+    limit: Optional[int] = None,
+    after: Optional[Tuple[datetime, int]] = None,
+    ascending: bool = False
+) -> List[dict]:
+    """Get events with statistics as plain dicts with the EventListResponse fields, without loading entities"""
+    query = crud._events_with_stats_query(filters, after, ascending, columns=True)
+    if limit:
+        query = query.limit(limit)
+    return [crud._event_with_stats_dict(row) for row in await db.exec(query)]
+
+
+async def iter_events_with_stats(
+    db: AsyncSession,
+    filters: Optional[crud.EventFilters] = None,
+    limit: Optional[int] = None,
+    after: Optional[Tuple[datetime, int]] = None,
+    ascending: bool = False
+) -> AsyncIterator[Tuple[Event, int, int, Optional[float]]]:
+    """Stream events with statistics from a server-side cursor"""
+    query = crud._events_with_stats_query(filters, after, ascending)
+    if limit:
+        query = query.limit(limit)
+    result = await db.stream(query.execution_options(yield_per=crud.STREAM_BATCH_SIZE))
+    async for row in result:
+        yield crud._event_with_stats_row(row)
+
+
+# Student CRUD
+async def get_student(db: AsyncSession, student_id: int) -> Optional[Student]:
+    """Get student by ID"""
+    return await db.get(Student, student_id)
+
+
+# Registration, attendance and feedback CRUD
+async def create_registration(db: AsyncSession, event_id: int, registration: RegistrationCreate) -> Registration:
+    """Create a new event registration"""
+    return await db.run_sync(crud.create_registration, event_id, registration)
+
+
+async def create_waitlist_entry(db: AsyncSession, event_id: int, student_id: int):
+    """Add a student to an event's waitlist, returning the entry and its 1-based position"""
+    return await db.run_sync(crud.create_waitlist_entry, event_id, student_id)
+
+
+async def create_attendance(db: AsyncSession, event_id: int, attendance: AttendanceCreate) -> Attendance:
+    """Mark attendance for an event"""
+    return await db.run_sync(crud.create_attendance, event_id, attendance)
+
+
+async def create_feedback(db: AsyncSession, event_id: int, feedback: FeedbackCreate) -> Feedback:
+    """Create feedback for an event"""
+    return await db.run_sync(crud.create_feedback, event_id, feedback)
+
+
+# Report functions
+async def get_event_popularity_report(
+    db: AsyncSession, limit: Optional[int] = None, after: Optional[Tuple[int, int]] = None
+) -> List[dict]:
+    """Get event popularity report sorted by registrations"""
+    query = crud._event_popularity_query(after)
+    if limit:
+        query = query.limit(limit)
+    return [crud._event_popularity_row(row) for row in await db.exec(query)]
+
+
+async def iter_event_popularity_report(
+    db: AsyncSession, limit: Optional[int] = None, after: Optional[Tuple[int, int]] = None
+) -> AsyncIterator[dict]:
+    """Stream the event popularity report from a server-side cursor"""
+    query = crud._event_popularity_query(after)
+    if limit:
+        query = query.limit(limit)
+    result = await db.stream(query.execution_options(yield_per=crud.STREAM_BATCH_SIZE))
+    async for row in result:
+        yield crud._event_popularity_row(row)
+
+
+async def get_student_participation_report(
+    db: AsyncSession, limit: Optional[int] = None, after: Optional[Tuple[int, int]] = None
+) -> List[dict]:
+    """Get student participation report"""
+    query = crud._student_participation_query(after)
+    if limit:
+        query = query.limit(limit)
+    return [crud._student_participation_row(row) for row in await db.exec(query)]
+
+
+async def iter_student_participation_report(
+    db: AsyncSession, limit: Optional[int] = None, after: Optional[Tuple[int, int]] = None
+) -> AsyncIterator[dict]:
+    """Stream the student participation report from a server-side cursor"""
+    query = crud._student_participation_query(after)
+    if limit:
+        query = query.limit(limit)
+    result = await db.stream(query.execution_options(yield_per=crud.STREAM_BATCH_SIZE))
+    async for row in result:
+        yield crud._student_participation_row(row)
+
+
+async def get_top_active_students(db: AsyncSession, limit: int = 10) -> List[dict]:
+    """Get top active students by attendance and feedback"""
+    return await db.run_sync(crud.get_top_active_students, limit)
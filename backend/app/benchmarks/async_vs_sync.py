@@ -0,0 +1,145 @@
+"""
+Load test comparing the sync and async database stacks
+Run with: python -m app.benchmarks.async_vs_sync
+
+Each stack runs in its own process (ASYNC_DB is read at import time) against
+a fresh SQLite file and is driven in-process through httpx's ASGI transport
+with a mixed workload of listings, reports and registrations.
+
+The connection pool is sized to --concurrency for both stacks. A sync
+request keeps its connection until the response has been validated, which
+also needs a worker thread, so a pool smaller than the number of in-flight
+requests can leave every thread waiting for a connection.
+"""
+
+import argparse
+import asyncio
+import json
+import os
+import subprocess
+import sys
+import tempfile
+import time
+from datetime import datetime, timedelta
+
+# Add the parent directory to the path so we can import our modules
+sys.path.append(os.path.dirname(os.path.dirname(os.path.dirname(__file__))))
+
+
+def percentile(values, fraction: float) -> float:
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(fraction * len(ordered)))]
+
+
+def seed(students: int, events: int) -> None:
+    """Create the tables and a small campus in the configured database"""
+    from sqlalchemy import insert
+    from sqlmodel import Session
+    from app.db import engine, create_db_and_tables
+    from app.models import College, Student, Event
+    from app.stats import rebuild_stats
+
+    create_db_and_tables()
+    with Session(engine) as db:
+        db.add(College(id=1, name="Benchmark University", location="Benchmark City"))
+        db.execute(insert(Student), [
+            {"id": i, "name": f"Student {i}", "email": f"student{i}@bench.edu", "student_id": f"BS{i:06d}",
+             "college_id": 1, "created_at": datetime.utcnow()}
+            for i in range(1, students + 1)
+        ])
+        db.execute(insert(Event), [
+            {"id": i, "title": f"Event {i}", "event_type": "workshop", "date": datetime(2024, 1, 1) + timedelta(days=i),
+             "location": "Hall", "college_id": 1, "max_participants": None, "created_at": datetime.utcnow()}
+            for i in range(1, events + 1)
+        ])
+        db.commit()
+        rebuild_stats(db)
+
+
+async def drive(requests: int, concurrency: int, students: int, events: int) -> dict:
+    """Fire the workload at the app and return throughput and latency percentiles"""
+    import httpx
+    from app.db import async_engine
+    from app.main import app
+
+    semaphore = asyncio.Semaphore(concurrency)
+    latencies = []
+    errors = 0
+
+    async def one(client: httpx.AsyncClient, i: int):
+        nonlocal errors
+        async with semaphore:
+            start = time.perf_counter()
+            if i % 4 == 0:
+                response = await client.get("/events/?limit=50")
+            elif i % 4 == 1:
+                response = await client.get("/reports/event-popularity?limit=50")
+            else:
+                event_id = 1 + i % events
+                student_id = 1 + (i // events) % students
+                response = await client.post(f"/events/{event_id}/register", json={"student_id": student_id})
+            latencies.append((time.perf_counter() - start) * 1000)
+            if response.status_code >= 500:
+                errors += 1
+
+    # Unhandled errors such as "database is locked" are counted as 500s rather than aborting the run
+    transport = httpx.ASGITransport(app=app, raise_app_exceptions=False)
+    try:
+        async with httpx.AsyncClient(transport=transport, base_url="http://bench") as client:
+            started = time.perf_counter()
+            await asyncio.gather(*(one(client, i) for i in range(requests)))
+            elapsed = time.perf_counter() - started
+    finally:
+        if async_engine is not None:
+            await async_engine.dispose()
+
+    return {
+        "requests": requests,
+        "concurrency": concurrency,
+        "errors": errors,
+        "requests_per_second": round(requests / elapsed, 1),
+        "p50_ms": round(percentile(latencies, 0.50), 2),
+        "p99_ms": round(percentile(latencies, 0.99), 2),
+    }
+
+
+def run_worker(args) -> None:
+    seed(args.students, args.events)
+    result = asyncio.run(drive(args.requests, args.concurrency, args.students, args.events))
+    print(json.dumps(result))
+
+
+def run_stack(async_db: bool, args) -> dict:
+    with tempfile.TemporaryDirectory() as directory:
+        env = dict(os.environ, ASYNC_DB="true" if async_db else "false",
+                   DATABASE_URL=f"sqlite:///{os.path.join(directory, 'bench.db')}",
+                   DB_POOL_SIZE=str(args.concurrency), DB_MAX_OVERFLOW="0")
+        output = subprocess.run(
+            [sys.executable, "-m", "app.benchmarks.async_vs_sync", "--worker",
+             "--requests", str(args.requests), "--concurrency", str(args.concurrency),
+             "--students", str(args.students), "--events", str(args.events)],
+            env=env, check=True, capture_output=True, text=True,
+            cwd=os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))),
+        ).stdout
+    return json.loads(output.strip().splitlines()[-1])
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--requests", type=int, default=2000)
+    parser.add_argument("--concurrency", type=int, default=100)
+    parser.add_argument("--students", type=int, default=2000)
+    parser.add_argument("--events", type=int, default=200)
+    parser.add_argument("--worker", action="store_true", help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.worker:
+        run_worker(args)
+        return
+
+    results = {"sync": run_stack(False, args), "async": run_stack(True, args)}
+    print(json.dumps(results, indent=2))
+
+
+if __name__ == "__main__":
+    main()
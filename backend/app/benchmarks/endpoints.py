@@ -0,0 +1,327 @@
+"""
+Endpoint benchmark harness
+Run with: python -m app.benchmarks.endpoints --students 20000 --events 1000 --output results.json
+
+Builds a seeded synthetic dataset (see app.fixtures.generate_data) in a
+temporary SQLite file, or uses --database-url, and drives every route of
+app.main.app in-process through httpx's ASGI transport. Each scenario runs
+--requests requests at --concurrency and records throughput, latency
+percentiles and status codes. The results are written as JSON so runs of
+different versions can be compared.
+
+Read scenarios run before write scenarios, so reads see the generated
+dataset. Write scenarios modify the database, so point --database-url at a
+copy. The response cache is disabled unless --cache-backend is given,
+so the numbers measure the database paths.
+"""
+
+import argparse
+import asyncio
+import itertools
+import json
+import os
+import platform
+import random
+import subprocess
+import sys
+import tempfile
+import time
+from dataclasses import asdict, dataclass
+from datetime import datetime
+from typing import Callable, Dict, List, Optional, Tuple
+
+# Add the parent directory to the path so we can import our modules
+sys.path.append(os.path.dirname(os.path.dirname(os.path.dirname(__file__))))
+
+from app.benchmarks.async_vs_sync import percentile
+from app.fixtures.generate_data import add_arguments, config_from_args
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+
+@dataclass
+class Context:
+    """What the request factories need to pick valid ids"""
+    rng: random.Random
+    students: int
+    events: int
+    token: str
+    job: str = ""  # a finished report job, for the job status and result routes
+
+    def event(self) -> int:
+        return self.rng.randint(1, self.events)
+
+    def student(self) -> int:
+        return self.rng.randint(1, self.students)
+
+    def students_batch(self, size: int = 100) -> List[int]:
+        return [self.student() for _ in range(size)]
+
+
+REPORT_JOB = {"report": "event-popularity", "limit": 50}
+
+# A request factory returns (url, json body or None) for the i-th request of a scenario
+Factory = Callable[[Context, int], Tuple[str, Optional[dict]]]
+
+
+# (method, route path) -> [(scenario name, factory)], reads first
+SCENARIOS: Dict[Tuple[str, str], List[Tuple[str, Factory]]] = {
+    ("GET", "/"): [("health", lambda c, i: ("/", None))],
+    ("GET", "/metrics"): [("scrape", lambda c, i: ("/metrics", None))],
+    ("GET", "/events/"): [
+        ("first page", lambda c, i: ("/events/?limit=50", None)),
+        ("filtered", lambda c, i: (f"/events/?college_id={1 + i % 5}&event_type=workshop&limit=50", None)),
+        ("two weeks at a college", lambda c, i: (
+            f"/events/?college_id={1 + i % 5}&from=2024-03-01T00:00:00&to=2024-03-15T00:00:00&order=asc&limit=50", None
+        )),
+    ],
+    ("GET", "/events/search"): [
+        ("one word", lambda c, i: ("/events/search?q=workshop", None)),
+        ("selective", lambda c, i: (f"/events/search?q=synthetic event {c.event()}", None)),
+    ],
+    ("GET", "/events/{event_id}"): [("by id", lambda c, i: (f"/events/{c.event()}", None))],
+    ("GET", "/students/{student_id}"): [("by id", lambda c, i: (f"/students/{c.student()}", None))],
+    ("GET", "/students/{student_id}/dashboard"): [
+        ("by id", lambda c, i: (f"/students/{c.student()}/dashboard", None)),
+    ],
+    ("GET", "/reports/event-popularity"): [("first page", lambda c, i: ("/reports/event-popularity?limit=50", None))],
+    ("GET", "/reports/student-participation"): [
+        ("first page", lambda c, i: ("/reports/student-participation?limit=50", None)),
+    ],
+    ("GET", "/reports/top-active-students"): [("top 10", lambda c, i: ("/reports/top-active-students", None))],
+    ("GET", "/reports/trends"): [
+        ("weekly by type", lambda c, i: ("/reports/trends?granularity=week&by=event_type", None)),
+    ],
+    ("GET", "/exports/{table}"): [("events csv", lambda c, i: ("/exports/events?format=csv", None))],
+    ("GET", "/jobs/{job_id}"): [("finished", lambda c, i: (f"/jobs/{c.job}", None))],
+    ("GET", "/jobs/{job_id}/result"): [("report", lambda c, i: (f"/jobs/{c.job}/result", None))],
+    ("POST", "/students/"): [("create", lambda c, i: ("/students/", {
+        "name": f"Bench Student {i}", "email": f"bench-{c.token}-{i}@bench.edu", "student_id": f"B{c.token}{i}",
+    }))],
+    ("POST", "/events/"): [("create", lambda c, i: ("/events/", {
+        "title": f"Bench Event {i}", "event_type": "workshop", "date": "2024-06-01T10:00:00", "location": "Hall",
+    }))],
+    ("POST", "/events/{event_id}/register"): [
+        ("single", lambda c, i: (f"/events/{c.event()}/register", {"student_id": c.student()})),
+    ],
+    ("POST", "/events/{event_id}/attendance"): [
+        ("single", lambda c, i: (f"/events/{c.event()}/attendance", {"student_id": c.student()})),
+    ],
+    ("POST", "/events/{event_id}/feedback"): [
+        ("single", lambda c, i: (f"/events/{c.event()}/feedback",
+                                 {"student_id": c.student(), "rating": c.rng.randint(1, 5)})),
+    ],
+    ("POST", "/events/{event_id}/register:batch"): [
+        ("100 rows", lambda c, i: (f"/events/{c.event()}/register:batch", {"student_ids": c.students_batch()})),
+    ],
+    ("POST", "/events/{event_id}/attendance:batch"): [
+        ("100 rows", lambda c, i: (f"/events/{c.event()}/attendance:batch", {"student_ids": c.students_batch()})),
+    ],
+    ("POST", "/events/{event_id}/feedback:batch"): [
+        ("100 rows", lambda c, i: (f"/events/{c.event()}/feedback:batch", {"items": [
+            {"student_id": student_id, "rating": c.rng.randint(1, 5)} for student_id in c.students_batch()
+        ]})),
+    ],
+    # Resubmitting the benchmark's report job returns the fresh one; every export is queued and run
+    ("POST", "/jobs/reports"): [("reused", lambda c, i: ("/jobs/reports", REPORT_JOB))],
+    ("POST", "/jobs/exports"): [("events csv", lambda c, i: ("/jobs/exports", {"table": "events", "format": "csv"}))],
+}
+
+
+def api_routes(app) -> List[Tuple[str, str]]:
+    """Every (method, path) pair the application serves, without the docs routes"""
+    from fastapi.routing import APIRoute
+
+    routes = []
+    for route in app.routes:
+        if isinstance(route, APIRoute):
+            for method in sorted(route.methods):
+                if (method, route.path) not in routes:
+                    routes.append((method, route.path))
+    return routes
+
+
+def summarize(name: str, method: str, path: str, latencies: List[float], statuses: Dict[int, int],
+              elapsed: float, concurrency: int) -> dict:
+    return {
+        "name": name,
+        "method": method,
+        "path": path,
+        "requests": len(latencies),
+        "concurrency": concurrency,
+        "throughput_rps": round(len(latencies) / elapsed, 1),
+        "errors": sum(count for status, count in statuses.items() if status >= 500),
+        "status_codes": {str(status): count for status, count in sorted(statuses.items())},
+        "latency_ms": {
+            "min": round(min(latencies), 3),
+            "mean": round(sum(latencies) / len(latencies), 3),
+            "p50": round(percentile(latencies, 0.50), 3),
+            "p90": round(percentile(latencies, 0.90), 3),
+            "p95": round(percentile(latencies, 0.95), 3),
+            "p99": round(percentile(latencies, 0.99), 3),
+            "max": round(max(latencies), 3),
+        },
+    }
+
+
+async def run_scenario(client, context: Context, method: str, factory: Factory,
+                       requests: int, concurrency: int, warmup: int) -> Tuple[List[float], Dict[int, int], float]:
+    semaphore = asyncio.Semaphore(concurrency)
+    counter = itertools.count()
+    latencies: List[float] = []
+    statuses: Dict[int, int] = {}
+
+    async def one(record: bool):
+        async with semaphore:
+            url, body = factory(context, next(counter))
+            start = time.perf_counter()
+            response = await client.request(method, url, json=body)
+            if record:
+                latencies.append((time.perf_counter() - start) * 1000)
+                statuses[response.status_code] = statuses.get(response.status_code, 0) + 1
+
+    await asyncio.gather(*(one(False) for _ in range(warmup)))
+    started = time.perf_counter()
+    await asyncio.gather(*(one(True) for _ in range(requests)))
+    return latencies, statuses, time.perf_counter() - started
+
+
+async def finished_job(client) -> str:
+    """Submit the benchmark's report job and wait for it to finish, returning its id"""
+    job_id = (await client.post("/jobs/reports", json=REPORT_JOB)).json()["id"]
+    while (await client.get(f"/jobs/{job_id}")).json()["status"] not in ("done", "failed"):
+        await asyncio.sleep(0.05)
+    return job_id
+
+
+async def drive(args, dataset: dict) -> dict:
+    import httpx
+    from app.db import async_engine
+    from app.jobs import job_queue
+    from app.main import app
+
+    context = Context(random.Random(args.seed), dataset["max_student_id"], dataset["max_event_id"],
+                      token=str(int(time.time())))
+    routes = api_routes(app)
+    results = []
+
+    # Unhandled errors such as "database is locked" are counted as 500s rather than aborting the run
+    transport = httpx.ASGITransport(app=app, raise_app_exceptions=False)
+    try:
+        async with httpx.AsyncClient(transport=transport, base_url="http://bench") as client:
+            context.job = await finished_job(client)
+            for (method, path), scenarios in SCENARIOS.items():
+                if (method, path) not in routes:
+                    continue
+                for name, factory in scenarios:
+                    latencies, statuses, elapsed = await run_scenario(
+                        client, context, method, factory, args.requests, args.concurrency, args.warmup
+                    )
+                    result = summarize(f"{method} {path} {name}", method, path, latencies, statuses,
+                                       elapsed, args.concurrency)
+                    results.append(result)
+                    print(f"{result['name']:<58}{result['throughput_rps']:>10.1f} rps"
+                          f"{result['latency_ms']['p50']:>10.2f} p50{result['latency_ms']['p99']:>10.2f} p99",
+                          file=sys.stderr)
+    finally:
+        # Export jobs still queued are dropped rather than run after the measurements
+        job_queue.shutdown(wait=False)
+        if async_engine is not None:
+            await async_engine.dispose()
+
+    return {
+        "results": results,
+        "uncovered": [f"{method} {path}" for method, path in routes if (method, path) not in SCENARIOS],
+    }
+
+
+def prepare_dataset(args) -> dict:
+    """Generate the dataset unless an existing database was given, and describe it"""
+    from sqlmodel import Session, select, func
+    from app.db import engine, create_db_and_tables
+    from app.fixtures.generate_data import generate
+    from app.models import College, Student, Event, Registration, Attendance, Feedback
+
+    create_db_and_tables()
+    with Session(engine) as db:
+        if not args.database_url:
+            started = time.perf_counter()
+            generate(db, config_from_args(args))
+            print(f"Generated dataset in {time.perf_counter() - started:.1f}s", file=sys.stderr)
+
+        rows = {
+            model.__tablename__: db.exec(select(func.count()).select_from(model)).one()
+            for model in (College, Student, Event, Registration, Attendance, Feedback)
+        }
+        return {
+            "generator": None if args.database_url else asdict(config_from_args(args)),
+            "rows": rows,
+            "max_student_id": db.exec(select(func.max(Student.id))).one() or 1,
+            "max_event_id": db.exec(select(func.max(Event.id))).one() or 1,
+        }
+
+
+def git_commit() -> Optional[str]:
+    try:
+        return subprocess.run(["git", "rev-parse", "HEAD"], cwd=BACKEND_DIR, capture_output=True,
+                              text=True, check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--database-url", help="benchmark an existing database instead of generating one")
+    parser.add_argument("--requests", type=int, default=200, help="requests per scenario")
+    parser.add_argument("--concurrency", type=int, default=10)
+    parser.add_argument("--warmup", type=int, default=10, help="unrecorded requests before each scenario")
+    parser.add_argument("--cache-backend", default="none", choices=["none", "memory"])
+    parser.add_argument("--async-db", action="store_true", help="serve the hot endpoints from the async stack")
+    parser.add_argument("--output", help="write the JSON results to this file instead of stdout")
+    add_arguments(parser)
+    args = parser.parse_args()
+
+    if "app.db" in sys.modules:
+        raise RuntimeError("app.db was imported before the benchmark configured DATABASE_URL")
+
+    with tempfile.TemporaryDirectory() as directory:
+        # Settings are read when app modules are first imported, so configure them first
+        os.environ["DATABASE_URL"] = args.database_url or f"sqlite:///{os.path.join(directory, 'bench.db')}"
+        os.environ["CACHE_BACKEND"] = args.cache_backend
+        os.environ["ASYNC_DB"] = "true" if args.async_db else "false"
+        os.environ["JOB_RESULT_DIR"] = os.path.join(directory, "job_results")
+        # A sync request holds its connection until its response is validated; see async_vs_sync
+        os.environ["DB_POOL_SIZE"] = str(max(args.concurrency, 5))
+
+        dataset = prepare_dataset(args)
+        run = asyncio.run(drive(args, dataset))
+
+    import sqlalchemy
+
+    report = {
+        "meta": {
+            "timestamp": datetime.utcnow().isoformat(timespec="seconds") + "Z",
+            "git_commit": git_commit(),
+            "python": platform.python_version(),
+            "sqlalchemy": sqlalchemy.__version__,
+            "platform": platform.platform(),
+            "database": "existing" if args.database_url else "generated sqlite",
+            "async_db": args.async_db,
+            "cache_backend": args.cache_backend,
+            "requests": args.requests,
+            "concurrency": args.concurrency,
+            "dataset": {key: dataset[key] for key in ("generator", "rows")},
+        },
+        **run,
+    }
+
+    output = json.dumps(report, indent=2, default=str)
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as out:
+            out.write(output + "\n")
+    else:
+        print(output)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,109 @@
+"""
+Burst benchmark for group commit on the registration and attendance endpoints
+Run with: python -m app.benchmarks.group_commit
+
+Simulates badge scanning: many clients post registrations and then
+attendance for the same few events at once. Each configuration runs in its
+own process (GROUP_COMMIT is read at import time) against a fresh SQLite
+file, driven in-process through httpx's ASGI transport, and reports
+throughput, latency percentiles and how many commits the writes took.
+"""
+
+import argparse
+import asyncio
+import json
+import os
+import subprocess
+import sys
+import tempfile
+import time
+
+# Add the parent directory to the path so we can import our modules
+sys.path.append(os.path.dirname(os.path.dirname(os.path.dirname(__file__))))
+
+from app.benchmarks.async_vs_sync import percentile, seed
+
+
+async def drive(requests: int, concurrency: int, students: int, events: int) -> dict:
+    """Post requests registrations, then as many attendance marks, and return throughput and latency"""
+    import httpx
+    from sqlalchemy import event as sa_event
+    from sqlmodel import Session
+    from app.main import app
+
+    commits = [0]
+    sa_event.listen(Session, "after_commit", lambda session: commits.__setitem__(0, commits[0] + 1))
+
+    semaphore = asyncio.Semaphore(concurrency)
+    latencies = []
+    statuses = {}
+
+    async def one(client: httpx.AsyncClient, path: str, i: int):
+        async with semaphore:
+            start = time.perf_counter()
+            response = await client.post(
+                f"/events/{1 + i % events}/{path}", json={"student_id": 1 + (i // events) % students}
+            )
+            latencies.append((time.perf_counter() - start) * 1000)
+            statuses[response.status_code] = statuses.get(response.status_code, 0) + 1
+
+    transport = httpx.ASGITransport(app=app, raise_app_exceptions=False)
+    async with httpx.AsyncClient(transport=transport, base_url="http://bench") as client:
+        started = time.perf_counter()
+        for path in ("register", "attendance"):
+            await asyncio.gather(*(one(client, path, i) for i in range(requests)))
+        elapsed = time.perf_counter() - started
+
+    return {
+        "writes": 2 * requests,
+        "concurrency": concurrency,
+        "statuses": {str(status): count for status, count in sorted(statuses.items())},
+        "commits": commits[0],
+        "writes_per_second": round(2 * requests / elapsed, 1),
+        "p50_ms": round(percentile(latencies, 0.50), 2),
+        "p99_ms": round(percentile(latencies, 0.99), 2),
+    }
+
+
+def run_worker(args) -> None:
+    seed(args.students, args.events)
+    print(json.dumps(asyncio.run(drive(args.requests, args.concurrency, args.students, args.events))))
+
+
+def run_config(group_commit: bool, args) -> dict:
+    with tempfile.TemporaryDirectory() as directory:
+        env = dict(os.environ, DATABASE_URL=f"sqlite:///{os.path.join(directory, 'bench.db')}",
+                   GROUP_COMMIT="true" if group_commit else "false",
+                   GROUP_COMMIT_MAX_ROWS=str(args.max_rows), GROUP_COMMIT_MAX_WAIT_MS=str(args.max_wait_ms),
+                   MAX_IN_FLIGHT_WRITES="0")
+        output = subprocess.run(
+            [sys.executable, "-m", "app.benchmarks.group_commit", "--worker",
+             "--requests", str(args.requests), "--concurrency", str(args.concurrency),
+             "--students", str(args.students), "--events", str(args.events)],
+            env=env, check=True, capture_output=True, text=True,
+            cwd=os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))),
+        ).stdout
+    return json.loads(output.strip().splitlines()[-1])
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--requests", type=int, default=2000)
+    parser.add_argument("--concurrency", type=int, default=32)
+    parser.add_argument("--students", type=int, default=2000)
+    parser.add_argument("--events", type=int, default=5)
+    parser.add_argument("--max-rows", type=int, default=100)
+    parser.add_argument("--max-wait-ms", type=float, default=5.0)
+    parser.add_argument("--worker", action="store_true", help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.worker:
+        run_worker(args)
+        return
+
+    results = {"one_commit_per_request": run_config(False, args), "group_commit": run_config(True, args)}
+    print(json.dumps(results, indent=2))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,111 @@
+"""
+Overload test for admission control on the write path
+Run with: python -m app.benchmarks.overload
+
+Sends registrations at a fixed arrival rate above what the database can
+absorb, once with admission control off and once with it on, each in its
+own process (the settings are read at import time) against a fresh SQLite
+file. Arrivals do not wait for earlier responses, as with real clients, so
+without admission control the backlog and the latency keep growing for as
+long as the overload lasts. Latency percentiles are reported for the
+requests that were served; shed requests answer 429 and are counted
+separately.
+"""
+
+import argparse
+import asyncio
+import json
+import os
+import subprocess
+import sys
+import tempfile
+import time
+
+# Add the parent directory to the path so we can import our modules
+sys.path.append(os.path.dirname(os.path.dirname(os.path.dirname(__file__))))
+
+from app.benchmarks.async_vs_sync import percentile, seed
+
+
+async def drive(rate: float, duration: float, students: int, events: int) -> dict:
+    """Register students at rate requests per second for duration seconds; return latencies and outcomes"""
+    import httpx
+    from app.main import app
+
+    served, shed_latencies = [], []
+    statuses = {}
+
+    async def one(client: httpx.AsyncClient, i: int):
+        start = time.perf_counter()
+        response = await client.post(
+            f"/events/{1 + i % events}/register", json={"student_id": 1 + (i // events) % students}
+        )
+        elapsed = (time.perf_counter() - start) * 1000
+        (shed_latencies if response.status_code == 429 else served).append(elapsed)
+        statuses[response.status_code] = statuses.get(response.status_code, 0) + 1
+
+    # Unhandled errors such as "database is locked" are counted as 500s rather than aborting the run
+    transport = httpx.ASGITransport(app=app, raise_app_exceptions=False)
+    async with httpx.AsyncClient(transport=transport, base_url="http://bench") as client:
+        await client.get("/")
+        started = time.perf_counter()
+        tasks = []
+        for i in range(int(rate * duration)):
+            await asyncio.sleep(max(0.0, started + i / rate - time.perf_counter()))
+            tasks.append(asyncio.create_task(one(client, i)))
+        await asyncio.gather(*tasks)
+        elapsed = time.perf_counter() - started
+
+    return {
+        "requests": len(tasks),
+        "offered_per_second": rate,
+        "statuses": {str(status): count for status, count in sorted(statuses.items())},
+        "served_per_second": round(len(served) / elapsed, 1),
+        "served_p50_ms": round(percentile(served, 0.50), 2) if served else None,
+        "served_p99_ms": round(percentile(served, 0.99), 2) if served else None,
+        "shed_p99_ms": round(percentile(shed_latencies, 0.99), 2) if shed_latencies else None,
+    }
+
+
+def run_worker(args) -> None:
+    seed(args.students, args.events)
+    print(json.dumps(asyncio.run(drive(args.rate, args.duration, args.students, args.events))))
+
+
+def run_config(max_in_flight: int, args) -> dict:
+    with tempfile.TemporaryDirectory() as directory:
+        env = dict(os.environ, DATABASE_URL=f"sqlite:///{os.path.join(directory, 'bench.db')}",
+                   MAX_IN_FLIGHT_WRITES=str(max_in_flight), WRITE_QUEUE_SIZE=str(args.queue_size),
+                   WRITE_QUEUE_TIMEOUT=str(args.queue_timeout))
+        output = subprocess.run(
+            [sys.executable, "-m", "app.benchmarks.overload", "--worker",
+             "--rate", str(args.rate), "--duration", str(args.duration),
+             "--students", str(args.students), "--events", str(args.events)],
+            env=env, check=True, capture_output=True, text=True,
+            cwd=os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))),
+        ).stdout
+    return json.loads(output.strip().splitlines()[-1])
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--rate", type=float, default=300.0, help="requests per second sent")
+    parser.add_argument("--duration", type=float, default=10.0, help="seconds of overload")
+    parser.add_argument("--students", type=int, default=2000)
+    parser.add_argument("--events", type=int, default=200)
+    parser.add_argument("--max-in-flight", type=int, default=8)
+    parser.add_argument("--queue-size", type=int, default=16)
+    parser.add_argument("--queue-timeout", type=float, default=0.25)
+    parser.add_argument("--worker", action="store_true", help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.worker:
+        run_worker(args)
+        return
+
+    results = {"admission_off": run_config(0, args), "admission_on": run_config(args.max_in_flight, args)}
+    print(json.dumps(results, indent=2))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,143 @@
+"""
+Benchmark for the report queries
+Run with: python -m app.benchmarks.report_queries
+
+Compares the original report queries, which outer-join every fact table
+against the parent row, with a full pre-aggregated recompute (app.stats) and
+with the current reports in app.crud, which read the materialised stats tables.
+"""
+
+import argparse
+import sys
+import os
+import time
+from datetime import datetime
+
+# Add the parent directory to the path so we can import our modules
+sys.path.append(os.path.dirname(os.path.dirname(os.path.dirname(__file__))))
+
+from sqlmodel import Session, SQLModel, create_engine, select, func
+from sqlalchemy import desc, insert
+from sqlalchemy.pool import StaticPool
+
+from app import crud
+from app.models import College, Student, Event, Registration, Attendance, Feedback
+from app.stats import rebuild_stats, _recompute_query
+
+
+def legacy_event_popularity_report(db: Session):
+    """The event popularity query before it was rebuilt on pre-aggregated subqueries"""
+    return db.exec(
+        select(
+            Event.id,
+            func.count(Registration.id),
+            func.count(Attendance.id),
+            func.avg(Feedback.rating)
+        )
+        .outerjoin(Registration, Event.id == Registration.event_id)
+        .outerjoin(Attendance, Event.id == Attendance.event_id)
+        .outerjoin(Feedback, Event.id == Feedback.event_id)
+        .group_by(Event.id)
+        .order_by(desc(func.count(Registration.id)))
+    ).all()
+
+
+def legacy_student_participation_report(db: Session):
+    """The student participation query before it was rebuilt on pre-aggregated subqueries"""
+    return db.exec(
+        select(
+            Student.id,
+            func.count(Attendance.id),
+            func.count(Registration.id)
+        )
+        .outerjoin(Registration, Student.id == Registration.student_id)
+        .outerjoin(Attendance, Student.id == Attendance.student_id)
+        .group_by(Student.id)
+        .order_by(desc(func.count(Attendance.id)))
+    ).all()
+
+
+def build_database(events: int, registrations_per_event: int):
+    """Create an in-memory database where every event has the same number of registrations"""
+    engine = create_engine(
+        "sqlite:///:memory:",
+        connect_args={"check_same_thread": False},
+        poolclass=StaticPool,
+    )
+    SQLModel.metadata.create_all(engine)
+
+    with Session(engine) as db:
+        db.add(College(id=1, name="Benchmark University", location="Benchmark City"))
+        db.execute(insert(Student), [
+            {"id": i, "name": f"Student {i}", "email": f"student{i}@bench.edu",
+             "student_id": f"BS{i:06d}", "college_id": 1, "created_at": datetime.utcnow()}
+            for i in range(1, registrations_per_event + 1)
+        ])
+        db.execute(insert(Event), [
+            {"id": i, "title": f"Event {i}", "event_type": "workshop", "date": datetime(2024, 1, 1),
+             "location": "Hall", "college_id": 1, "created_at": datetime.utcnow()}
+            for i in range(1, events + 1)
+        ])
+        # Everyone registers, half of them attend and a quarter leave feedback
+        for event_id in range(1, events + 1):
+            db.execute(insert(Registration), [
+                {"event_id": event_id, "student_id": i, "registered_at": datetime.utcnow()}
+                for i in range(1, registrations_per_event + 1)
+            ])
+            db.execute(insert(Attendance), [
+                {"event_id": event_id, "student_id": i, "attended_at": datetime.utcnow()}
+                for i in range(1, registrations_per_event + 1, 2)
+            ])
+            db.execute(insert(Feedback), [
+                {"event_id": event_id, "student_id": i, "rating": 1 + i % 5, "submitted_at": datetime.utcnow()}
+                for i in range(1, registrations_per_event + 1, 4)
+            ])
+        db.commit()
+        rebuild_stats(db)
+
+    return engine
+
+
+def time_query(engine, query, repeat: int) -> float:
+    """Best wall-clock time in milliseconds over `repeat` runs"""
+    best = None
+    with Session(engine) as db:
+        for _ in range(repeat):
+            start = time.perf_counter()
+            query(db)
+            elapsed = (time.perf_counter() - start) * 1000
+            best = elapsed if best is None else min(best, elapsed)
+    return best
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--events", type=int, default=5)
+    parser.add_argument("--sizes", type=int, nargs="+", default=[100, 200, 400, 2000, 5000],
+                        help="registrations per event to benchmark")
+    parser.add_argument("--legacy-max", type=int, default=200,
+                        help="largest size the legacy queries are run at, they grow as R*A*F per event")
+    parser.add_argument("--repeat", type=int, default=3)
+    args = parser.parse_args()
+
+    reports = [
+        ("event-popularity", legacy_event_popularity_report,
+         lambda db: db.exec(_recompute_query(Event, "event_id")).all(), crud.get_event_popularity_report),
+        ("student-participation", legacy_student_participation_report,
+         lambda db: db.exec(_recompute_query(Student, "student_id")).all(), crud.get_student_participation_report),
+    ]
+
+    print(f"{'report':<24}{'regs/event':>12}{'before (ms)':>14}{'recompute (ms)':>16}{'after (ms)':>14}")
+    for size in args.sizes:
+        engine = build_database(args.events, size)
+        for name, legacy, recompute, current in reports:
+            before = time_query(engine, legacy, args.repeat) if size <= args.legacy_max else None
+            full = time_query(engine, recompute, args.repeat)
+            after = time_query(engine, current, args.repeat)
+            before_text = f"{before:.1f}" if before is not None else "skipped"
+            print(f"{name:<24}{size:>12}{before_text:>14}{full:>16.1f}{after:>14.1f}")
+        engine.dispose()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,146 @@
+"""
+Serialization microbenchmark: response models versus the FAST_JSON row path
+Run with: python -m app.benchmarks.serialization --rows 10000
+
+Seeds --rows events with statistics in a temporary SQLite file and builds
+the GET /events and GET /reports/event-popularity bodies both ways:
+
+  models        entities or dicts validated into response models, then dumped
+                (what the routers do by default)
+  orjson        plain column rows serialized by orjson (FAST_JSON, orjson installed)
+  pydantic-core plain column rows serialized by pydantic_core.to_json (FAST_JSON fallback)
+
+Reports the median CPU time of --repeat runs, including the query, and the
+peak traced memory of one run.
+"""
+
+import argparse
+import json
+import os
+import statistics
+import sys
+import tempfile
+import time
+import tracemalloc
+from datetime import datetime, timedelta
+
+# Add the parent directory to the path so we can import our modules
+sys.path.append(os.path.dirname(os.path.dirname(os.path.dirname(__file__))))
+
+
+def seed(rows: int) -> None:
+    """Create rows events, each with statistics"""
+    from sqlalchemy import insert
+    from sqlmodel import Session
+    from app.db import engine, create_db_and_tables
+    from app.models import Event, EventStats
+
+    create_db_and_tables()
+    with Session(engine) as db:
+        db.execute(insert(Event), [
+            {"id": i, "title": f"Event {i}", "description": "A synthetic event for the benchmark",
+             "event_type": "workshop", "date": datetime(2024, 1, 1) + timedelta(minutes=i), "location": "Hall",
+             "max_participants": 100, "college_id": None, "created_at": datetime(2023, 12, 1)}
+            for i in range(1, rows + 1)
+        ])
+        db.execute(insert(EventStats), [
+            {"event_id": i, "registration_count": i % 100, "attendance_count": i % 50,
+             "rating_sum": 4 * (i % 7), "rating_count": i % 7}
+            for i in range(1, rows + 1)
+        ])
+        db.commit()
+
+
+def paths() -> dict:
+    """Name -> function building one response body"""
+    from typing import List
+    from pydantic import TypeAdapter
+    from pydantic_core import to_json
+    from sqlmodel import Session
+    from app import crud
+    from app.cache import _orjson
+    from app.db import engine
+    from app.routers.events import _event_list_response
+    from app.schemas import EventListResponse, EventPopularityReport
+
+    events_adapter = TypeAdapter(List[EventListResponse])
+    report_adapter = TypeAdapter(List[EventPopularityReport])
+
+    def events_models():
+        with Session(engine) as db:
+            events = [_event_list_response(row) for row in crud.get_events_with_stats(db)]
+            return events_adapter.dump_json(events_adapter.validate_python(events))
+
+    def events_rows(dumps):
+        def build():
+            with Session(engine) as db:
+                return dumps(crud.get_event_rows_with_stats(db))
+        return build
+
+    def report_models():
+        with Session(engine) as db:
+            return report_adapter.dump_json(report_adapter.validate_python(crud.get_event_popularity_report(db)))
+
+    def report_rows(dumps):
+        def build():
+            with Session(engine) as db:
+                return dumps(crud.get_event_popularity_report(db))
+        return build
+
+    builders = {
+        "events/models": events_models,
+        "events/pydantic-core": events_rows(to_json),
+        "event-popularity/models": report_models,
+        "event-popularity/pydantic-core": report_rows(to_json),
+    }
+    orjson = _orjson()
+    if orjson is not None:
+        builders["events/orjson"] = events_rows(orjson.dumps)
+        builders["event-popularity/orjson"] = report_rows(orjson.dumps)
+    return builders
+
+
+def measure(build, repeat: int) -> dict:
+    """Median CPU time over repeat runs and the peak traced memory of one run"""
+    build()  # warm up caches and the connection
+    cpu = []
+    for _ in range(repeat):
+        start = time.process_time()
+        body = build()
+        cpu.append((time.process_time() - start) * 1000)
+
+    tracemalloc.start()
+    build()
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+
+    return {
+        "cpu_ms": round(statistics.median(cpu), 2),
+        "peak_mib": round(peak / 2 ** 20, 2),
+        "body_bytes": len(body),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--rows", type=int, default=10000)
+    parser.add_argument("--repeat", type=int, default=10)
+    args = parser.parse_args()
+
+    if "app.db" in sys.modules:
+        raise RuntimeError("app.db was imported before the benchmark configured DATABASE_URL")
+
+    with tempfile.TemporaryDirectory() as directory:
+        # Settings are read when app modules are first imported, so configure them first
+        os.environ["DATABASE_URL"] = f"sqlite:///{os.path.join(directory, 'bench.db')}"
+        seed(args.rows)
+        results = {name: measure(build, args.repeat) for name, build in sorted(paths().items())}
+
+        from app.db import engine
+        engine.dispose()
+
+    print(json.dumps({"rows": args.rows, "results": results}, indent=2))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,90 @@
+"""
+Write path benchmark: statements and latency per registration, attendance and feedback
+Run with: python -m app.benchmarks.writes --requests 2000
+
+Seeds a fresh SQLite file (see app.benchmarks.async_vs_sync.seed), then
+posts one request at a time so the latencies measure a single write rather
+than lock contention. The statement count of every request is read from
+its Server-Timing header, so run it on two versions to compare how many
+round trips each write takes.
+"""
+
+import argparse
+import json
+import os
+import re
+import statistics
+import sys
+import tempfile
+import time
+
+# Add the parent directory to the path so we can import our modules
+sys.path.append(os.path.dirname(os.path.dirname(os.path.dirname(__file__))))
+
+from app.benchmarks.async_vs_sync import percentile, seed
+
+STATEMENTS_PATTERN = re.compile(r'db;desc="(\d+) statements"')
+
+
+def run_scenario(client, requests: int, students: int, events: int, make_body, path: str) -> dict:
+    """Post requests distinct (event, student) pairs and summarize latency and statements"""
+    latencies, statements, statuses = [], [], {}
+    for i in range(requests):
+        event_id = 1 + i % events
+        student_id = 1 + (i // events) % students
+        start = time.perf_counter()
+        response = client.post(f"/events/{event_id}/{path}", json=make_body(student_id))
+        latencies.append((time.perf_counter() - start) * 1000)
+        statuses[response.status_code] = statuses.get(response.status_code, 0) + 1
+        match = STATEMENTS_PATTERN.search(response.headers.get("Server-Timing", ""))
+        if match:
+            statements.append(int(match.group(1)))
+    return {
+        "requests": requests,
+        "statuses": statuses,
+        "statements_per_request": round(statistics.mean(statements), 2) if statements else None,
+        "mean_ms": round(statistics.mean(latencies), 3),
+        "p50_ms": round(percentile(latencies, 0.50), 3),
+        "p99_ms": round(percentile(latencies, 0.99), 3),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--requests", type=int, default=2000, help="requests per scenario")
+    parser.add_argument("--students", type=int, default=2000)
+    parser.add_argument("--events", type=int, default=200)
+    args = parser.parse_args()
+
+    if args.requests > args.students * args.events:
+        parser.error("--requests must not exceed --students * --events, every pair is written once")
+    if "app.db" in sys.modules:
+        raise RuntimeError("app.db was imported before the benchmark configured DATABASE_URL")
+
+    with tempfile.TemporaryDirectory() as directory:
+        # Settings are read when app modules are first imported, so configure them first
+        os.environ["DATABASE_URL"] = f"sqlite:///{os.path.join(directory, 'bench.db')}"
+        os.environ["CACHE_BACKEND"] = "none"
+        seed(args.students, args.events)
+
+        from fastapi.testclient import TestClient
+        from app.db import engine
+        from app.main import app
+
+        with TestClient(app) as client:
+            scenarios = {
+                "register": ("register", lambda student_id: {"student_id": student_id}),
+                "attendance": ("attendance", lambda student_id: {"student_id": student_id}),
+                "feedback": ("feedback", lambda student_id: {"student_id": student_id, "rating": 4}),
+            }
+            results = {
+                name: run_scenario(client, args.requests, args.students, args.events, make_body, path)
+                for name, (path, make_body) in scenarios.items()
+            }
+        engine.dispose()
+
+    print(json.dumps(results, indent=2))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,300 @@
+"""
+Response cache for the event listing and report endpoints
+
+Cached bodies are keyed by route, query parameters and the current version
+of every tag the response depends on. Writes bump the versions of the tags
+they affect, so stale entries are never read again and simply age out.
+
+Backends:
+  memory  in-process LRU with TTL (default)
+  redis   any Redis-compatible server; FakeRedis stands in for one locally
+  none    caching disabled, ETag / If-None-Match still honoured
+
+With FAST_JSON, rows handed over as plain dicts are trusted to have the
+response schema's fields and are serialized directly, with orjson when it
+is installed and pydantic-core otherwise, instead of being validated into
+response models first.
+"""
+
+import hashlib
+import json
+import threading
+import time
+from collections import OrderedDict
+from datetime import datetime
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+
+from fastapi import Request, Response
+from pydantic import TypeAdapter
+from pydantic_core import to_json
+
+from app.config import Settings, settings
+from app.db import reads_pinned_to_primary
+
+# Tags, one per group of responses that change together
+EVENT_LIST = "events"
+EVENT_REPORTS = "event-reports"
+STUDENT_REPORTS = "student-reports"
+TREND_REPORTS = "trend-reports"
+
+# Registrations, attendance and feedback change every counted response
+FACT_TAGS = (EVENT_LIST, EVENT_REPORTS, STUDENT_REPORTS, TREND_REPORTS)
+
+ETAG_HEADER = "ETag"
+
+
+class MemoryCache:
+    """Thread-safe LRU cache whose entries expire after their TTL"""
+
+    def __init__(self, max_entries: int = 1024):
+        self.max_entries = max_entries
+        self._entries: "OrderedDict[str, Tuple[bytes, Optional[float]]]" = OrderedDict()
+        # Counters are kept apart from the entries so LRU eviction can never reset a tag version
+        self._counters: Dict[str, int] = {}
+        self._lock = threading.Lock()
+
+    def get(self, key: str) -> Optional[bytes]:
+        with self._lock:
+            if key in self._counters:
+                return str(self._counters[key]).encode()
+            entry = self._entries.get(key)
+            if entry is None:
+                return None
+            value, expires_at = entry
+            if expires_at is not None and expires_at <= time.monotonic():
+                del self._entries[key]
+                return None
+            self._entries.move_to_end(key)
+            return value
+
+    def get_many(self, keys: List[str]) -> List[Optional[bytes]]:
+        return [self.get(key) for key in keys]
+
+    def set(self, key: str, value: bytes, ttl: Optional[float] = None) -> None:
+        expires_at = time.monotonic() + ttl if ttl else None
+        with self._lock:
+            self._entries[key] = (value, expires_at)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def incr(self, key: str) -> int:
+        with self._lock:
+            self._counters[key] = self._counters.get(key, 0) + 1
+            return self._counters[key]
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+            self._counters.clear()
+
+
+class RedisCache:
+    """Backend on a Redis client (redis.Redis or anything with the same get/mget/set/incr API)"""
+
+    def __init__(self, client, prefix: str = "campus-events:"):
+        self.client = client
+        self.prefix = prefix
+
+    @classmethod
+    def from_url(cls, url: str, prefix: str = "campus-events:") -> "RedisCache":
+        try:
+            import redis
+        except ImportError as e:
+            raise ImportError("CACHE_BACKEND=redis requires the redis package") from e
+        return cls(redis.Redis.from_url(url), prefix)
+
+    def get(self, key: str) -> Optional[bytes]:
+        return self.client.get(self.prefix + key)
+
+    def get_many(self, keys: List[str]) -> List[Optional[bytes]]:
+        return self.client.mget([self.prefix + key for key in keys])
+
+    def set(self, key: str, value: bytes, ttl: Optional[float] = None) -> None:
+        self.client.set(self.prefix + key, value, px=int(ttl * 1000) if ttl else None)
+
+    def incr(self, key: str) -> int:
+        return self.client.incr(self.prefix + key)
+
+    def clear(self) -> None:
+        for key in self.client.scan_iter(match=self.prefix + "*"):
+            self.client.delete(key)
+
+
+class FakeRedis:
+    """In-process stand-in for the subset of the redis.Redis API that RedisCache uses"""
+
+    def __init__(self):
+        self._data: Dict[str, Tuple[bytes, Optional[float]]] = {}
+        self._lock = threading.Lock()
+
+    def _live(self, key: str) -> Optional[bytes]:
+        entry = self._data.get(key)
+        if entry is None:
+            return None
+        value, expires_at = entry
+        if expires_at is not None and expires_at <= time.monotonic():
+            del self._data[key]
+            return None
+        return value
+
+    def get(self, key: str) -> Optional[bytes]:
+        with self._lock:
+            return self._live(key)
+
+    def mget(self, keys: Iterable[str]) -> List[Optional[bytes]]:
+        with self._lock:
+            return [self._live(key) for key in keys]
+
+    def set(self, key: str, value, px: Optional[int] = None) -> bool:
+        if isinstance(value, str):
+            value = value.encode()
+        with self._lock:
+            self._data[key] = (value, time.monotonic() + px / 1000 if px else None)
+        return True
+
+    def incr(self, key: str) -> int:
+        with self._lock:
+            value = int(self._live(key) or 0) + 1
+            self._data[key] = (str(value).encode(), None)
+            return value
+
+    def delete(self, *keys: str) -> int:
+        with self._lock:
+            return sum(self._data.pop(key, None) is not None for key in keys)
+
+    def scan_iter(self, match: str = "*"):
+        prefix = match.rstrip("*")
+        with self._lock:
+            return [key for key in list(self._data) if key.startswith(prefix)]
+
+
+def _etag(body: bytes) -> str:
+    return '"' + hashlib.blake2b(body, digest_size=16).hexdigest() + '"'
+
+
+def _etag_matches(request: Request, etag: str) -> bool:
+    header = request.headers.get("if-none-match")
+    if not header:
+        return False
+    candidates = [candidate.strip() for candidate in header.split(",")]
+    return "*" in candidates or any(candidate.removeprefix("W/") == etag for candidate in candidates)
+
+
+def _not_modified(headers: Dict[str, str]) -> Response:
+    return Response(status_code=304, headers=headers)
+
+
+def _orjson():
+    """The orjson module, or None when it is not installed"""
+    try:
+        import orjson
+    except ImportError:
+        return None
+    return orjson
+
+
+def dump_rows(rows: List[dict]) -> bytes:
+    """Serialize plain dict rows to JSON without building a model per row"""
+    orjson = _orjson()
+    if orjson is not None:
+        return orjson.dumps(rows)
+    return to_json(rows)
+
+
+class ResponseCache:
+    """Caches serialized JSON responses under tag-versioned keys"""
+
+    def __init__(self, backend=None, ttl: float = 30.0, fast_json: bool = False):
+        self.backend = backend
+        self.ttl = ttl
+        self.fast_json = fast_json
+        self._adapters: Dict[Any, TypeAdapter] = {}
+
+    def ttl_until(self, moment: Optional[datetime]) -> Optional[float]:
+        """The TTL of a response that goes stale at moment (naive UTC) without any write; None if it does not"""
+        if moment is None:
+            return None
+        return max(0.001, min(self.ttl, (moment - datetime.utcnow()).total_seconds()))
+
+    def lookup(self, request: Request, tags: Iterable[str]) -> Tuple[Optional[str], Optional[Response]]:
+        """
+        Return the cache key for the request and the cached response, if any.
+
+        The key embeds the tag versions read here, before the caller queries
+        the database, so a response built from data older than a concurrent
+        write is stored under the superseded version and never served.
+        Clients in their read-your-writes window bypass the cache, which may
+        hold a response read from a replica that has not caught up yet.
+        """
+        if self.backend is None or reads_pinned_to_primary(request):
+            return None, None
+
+        tags = sorted(tags)
+        versions = self.backend.get_many([f"tag:{tag}" for tag in tags])
+        params = sorted(request.query_params.multi_items())
+        key = "response:" + json.dumps(
+            [request.url.path, params, [(tag, int(version or 0)) for tag, version in zip(tags, versions)]],
+            separators=(",", ":"),
+        )
+
+        cached = self.backend.get(key)
+        if cached is None:
+            return key, None
+        raw_headers, body = cached.split(b"\n", 1)
+        return key, self._response(request, body, json.loads(raw_headers))
+
+    def store(
+        self,
+        key: Optional[str],
+        request: Request,
+        response_type: Any,
+        content: Any,
+        headers: Optional[Dict[str, str]] = None,
+        ttl: Optional[float] = None,
+    ) -> Response:
+        """Serialize content as response_type, cache it under key for ttl (default the cache's) and return it"""
+        if self.fast_json and isinstance(content, list) and all(isinstance(row, dict) for row in content):
+            body = dump_rows(content)
+        else:
+            adapter = self._adapters.get(response_type)
+            if adapter is None:
+                adapter = self._adapters[response_type] = TypeAdapter(response_type)
+            body = adapter.dump_json(adapter.validate_python(content))
+
+        headers = {**(headers or {}), ETAG_HEADER: _etag(body), "Cache-Control": "no-cache"}
+        if key is not None:
+            self.backend.set(key, json.dumps(headers).encode() + b"\n" + body, self.ttl if ttl is None else ttl)
+        return self._response(request, body, headers)
+
+    def invalidate(self, *tags: str) -> None:
+        """Bump the version of every tag so responses cached under the old versions are no longer read"""
+        if self.backend is not None:
+            for tag in tags:
+                self.backend.incr(f"tag:{tag}")
+
+    def clear(self) -> None:
+        if self.backend is not None:
+            self.backend.clear()
+
+    @staticmethod
+    def _response(request: Request, body: bytes, headers: Dict[str, str]) -> Response:
+        if _etag_matches(request, headers[ETAG_HEADER]):
+            return _not_modified(headers)
+        return Response(content=body, media_type="application/json", headers=headers)
+
+
+def create_response_cache(config: Settings = settings) -> ResponseCache:
+    """Build the response cache selected by CACHE_BACKEND"""
+    if config.cache_backend == "memory":
+        backend = MemoryCache(config.cache_max_entries)
+    elif config.cache_backend == "redis":
+        backend = RedisCache.from_url(config.cache_url)
+    elif config.cache_backend == "none":
+        backend = None
+    else:
+        raise ValueError(f"Unknown cache backend: {config.cache_backend}")
+    return ResponseCache(backend, ttl=config.cache_ttl, fast_json=config.fast_json)
+
+
+response_cache = create_response_cache()
@@ -0,0 +1,100 @@
+"""
+Application settings, read from environment variables
+"""
+
+import os
+from dataclasses import dataclass, fields
+
+
+@dataclass(frozen=True)
+class Settings:
+    """Runtime configuration; every field can be overridden by the upper-cased environment variable"""
+
+    # Database URL - defaults to SQLite for development
+    database_url: str = "sqlite:///./campus_events.db"
+    # Serve the hot endpoints from async handlers on an AsyncEngine (aiosqlite / asyncpg)
+    async_db: bool = False
+
+    # Comma-separated read replica URLs for the report and listing endpoints; empty reads from the primary
+    database_read_urls: str = ""
+    # After a write, the client's reads go to the primary for this many seconds so they see it; 0 disables
+    read_your_writes_seconds: float = 5.0
+
+    # Connection pool. The default size matches Starlette's 40-thread pool so sync
+    # handlers never wait on a connection held by a session that is being torn down.
+    db_pool_size: int = 40
+    db_max_overflow: int = 10
+    db_pool_timeout: float = 30.0
+    db_pool_recycle: int = 1800  # seconds, server databases only
+    db_pool_pre_ping: bool = True  # server databases only
+
+    # SQLite tuning. WAL lets readers run while a writer holds the lock.
+    sqlite_journal_mode: str = "WAL"
+    sqlite_synchronous: str = "NORMAL"
+    sqlite_busy_timeout_ms: int = 5000
+    sqlite_mmap_size: int = 256 * 1024 * 1024
+    sqlite_cache_size_kib: int = 64 * 1024
+
+    # Response cache for the event listing and reports: memory, redis or none
+    cache_backend: str = "memory"
+    cache_url: str = "redis://localhost:6379/0"
+    cache_ttl: float = 30.0  # seconds
+    cache_max_entries: int = 1024
+    # Serialize list and report rows straight to JSON (with orjson when installed), skipping the response models
+    fast_json: bool = False
+
+    # Responses to writes sent with an Idempotency-Key are replayed for retries within this many seconds
+    idempotency_ttl: float = 24 * 3600
+    # A request still running after this many seconds is presumed dead and a retry with its key runs again;
+    # keep it a few times longer than the slowest write request
+    idempotency_lease_seconds: float = 60.0
+
+    # Per-route token buckets as JSON, e.g. {"POST /events/{event_id}/register": {"rate": 1, "burst": 5, "key": "student"}};
+    # rate is tokens per second, key is client or student. Buckets live in memory or, shared, in redis.
+    rate_limits: str = ""
+    rate_limit_backend: str = "memory"
+    rate_limit_url: str = "redis://localhost:6379/1"
+    # Admission control: writes running at once, writes allowed to wait for a slot and for how long; 0 disables
+    max_in_flight_writes: int = 32
+    write_queue_size: int = 64
+    write_queue_timeout: float = 1.0  # seconds
+
+    # Commit registrations and attendance from one writer thread in batches of up to max_rows,
+    # collected for at most max_wait_ms after the first, instead of one transaction per request
+    group_commit: bool = False
+    group_commit_max_rows: int = 100
+    group_commit_max_wait_ms: float = 5.0
+    group_commit_timeout: float = 10.0  # seconds a request waits for the writer before answering 503
+
+    # Background report and export jobs: how many run at once, where their state and results are kept
+    job_workers: int = 2
+    job_store: str = "memory"  # memory, or sqlite to keep jobs across restarts
+    job_store_path: str = "./jobs.db"
+    job_result_dir: str = "./job_results"
+    job_fresh_seconds: float = 300.0  # report jobs with the same parameters reuse a result this recent
+    job_ttl_seconds: float = 24 * 3600  # finished jobs and their result files are deleted after this long
+
+    # Statements at least this slow are logged with their parameters; 0 disables the log
+    slow_query_ms: float = 500.0
+
+    @property
+    def read_urls(self) -> list:
+        """The configured read replica URLs"""
+        return [url.strip() for url in self.database_read_urls.split(",") if url.strip()]
+
+    @classmethod
+    def from_env(cls, environ=os.environ) -> "Settings":
+        """Build settings from environment variables, falling back to the defaults"""
+        values = {}
+        for field in fields(cls):
+            raw = environ.get(field.name.upper())
+            if raw is None:
+                continue
+            if field.type is bool:
+                values[field.name] = raw.strip().lower() in ("1", "true", "yes", "on")
+            else:
+                values[field.name] = field.type(raw)
+        return cls(**values)
+
+
+settings = Settings.from_env()
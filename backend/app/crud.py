@@ -2,26 +2,36 @@
 CRUD operations for the Campus Event Management System
 """
 
-from typing import List, Optional
-from sqlmodel import Session, select, func, and_
-from sqlalchemy import desc
-
+from dataclasses import dataclass
+from datetime import date, datetime
+from typing import Iterator, List, Optional, Tuple
+from sqlmodel import Session, select, func, and_, or_
+from sqlalchemy import case, desc, exists, insert, null
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.orm import selectinload
+
+from app.db import lock_for_write
+from app.search import search_query
+from app.stats import bump_event_stats, bump_student_stats, bump_trend_stats
 from app.models import (
-    College, Student, Event, Registration, Attendance, Feedback
+    College, Student, Event, Registration, Attendance, Feedback, WaitlistEntry, EventStats, StudentStats,
+    TrendStats
 )
 from app.schemas import (
     CollegeCreate, StudentCreate, EventCreate, RegistrationCreate,
     AttendanceCreate, FeedbackCreate
 )
 
+# Rows fetched per round trip when streaming results from a server-side cursor
+STREAM_BATCH_SIZE = 500
+
 
 # College CRUD
 def create_college(db: Session, college: CollegeCreate) -> College:
     """Create a new college"""
-    db_college = College(**college.dict())
+    db_college = College(**college.model_dump())
     db.add(db_college)
     db.commit()
-    db.refresh(db_college)
     return db_college
 
 
@@ -33,10 +43,11 @@ def get_college(db: Session, college_id: int) -> Optional[College]:
 # Student CRUD
 def create_student(db: Session, student: StudentCreate) -> Student:
     """Create a new student"""
-    db_student = Student(**student.dict())
+    db_student = Student(**student.model_dump())
     db.add(db_student)
+    db.flush()
+    bump_student_stats(db, [{"student_id": db_student.id}])
     db.commit()
-    db.refresh(db_student)
     return db_student
 
 
@@ -50,13 +61,73 @@ def get_student_by_email(db: Session, email: str) -> Optional[Student]:
     return db.exec(select(Student).where(Student.email == email)).first()
 
 
+def get_student_dashboard(db: Session, student_id: int) -> Optional[dict]:
+    """
+    Get a student's registered, attended and upcoming events, feedback and totals.
+
+    The relationships and their events are eager-loaded with selectinload,
+    so the dashboard takes the same seven queries however active the
+    student is.
+    """
+    student = db.exec(
+        select(Student).where(Student.id == student_id).options(
+            selectinload(Student.registrations).selectinload(Registration.event),
+            selectinload(Student.attendance).selectinload(Attendance.event),
+            selectinload(Student.feedback).selectinload(Feedback.event),
+        )
+    ).first()
+    if not student:
+        return None
+
+    attended = {attendance.event_id for attendance in student.attendance}
+    registered = sorted(
+        (
+            {**registration.event.model_dump(), "registered_at": registration.registered_at,
+             "attended": registration.event_id in attended}
+            for registration in student.registrations
+        ),
+        key=lambda event: (event["date"], event["id"]),
+        reverse=True,
+    )
+    now = datetime.utcnow()
+    ratings = [feedback.rating for feedback in student.feedback]
+
+    return {
+        "student": student.model_dump(),
+        "stats": {
+            "events_registered": len(student.registrations),
+            "events_attended": len(student.attendance),
+            "feedback_given": len(student.feedback),
+            "avg_rating_given": _average(sum(ratings), len(ratings)),
+            "attendance_rate": _average(len(student.attendance), len(student.registrations)),
+        },
+        "upcoming_events": [event for event in reversed(registered) if event["date"] >= now],
+        "registered_events": registered,
+        "attended_events": sorted(
+            ({**attendance.event.model_dump(), "attended_at": attendance.attended_at} for attendance in student.attendance),
+            key=lambda event: (event["attended_at"], event["id"]),
+            reverse=True,
+        ),
+        "feedback": sorted(
+            (
+                {"event_id": feedback.event_id, "event_title": feedback.event.title, "rating": feedback.rating,
+                 "comment": feedback.comment, "submitted_at": feedback.submitted_at}
+                for feedback in student.feedback
+            ),
+            key=lambda feedback: (feedback["submitted_at"], feedback["event_id"]),
+            reverse=True,
+        ),
+    }
+
+
 # Event CRUD
 def create_event(db: Session, event: EventCreate) -> Event:
     """Create a new event"""
-    db_event = Event(**event.dict())
+    db_event = Event(**event.model_dump())
     db.add(db_event)
+    db.flush()
+    bump_event_stats(db, [{"event_id": db_event.id}])
     db.commit()
-    db.refresh(db_event)
     return db_event
 
 
@@ -77,26 +148,281 @@ def get_events(db: Session, college_id: Optional[int] = None, event_type: Option
     return db.exec(query.order_by(desc(Event.date))).all()
 
 
-# Registration CRUD
-def create_registration(db: Session, event_id: int, registration: RegistrationCreate) -> Registration:
-    """Create a new event registration"""
-    # Check if student is already registered
-    existing = db.exec(
-        select(Registration).where(
-            and_(Registration.event_id == event_id, Registration.student_id == registration.student_id)
+@dataclass
+class EventFilters:
+    """Filters of the event listing; None and False leave a filter off"""
+    college_id: Optional[int] = None
+    event_type: Optional[str] = None
+    location: Optional[str] = None
+    date_from: Optional[datetime] = None  # inclusive
+    date_to: Optional[datetime] = None  # exclusive
+    upcoming_only: bool = False
+    has_capacity: bool = False
+
+
+def _events_with_stats_query(
+    filters: Optional[EventFilters] = None,
+    after: Optional[Tuple[datetime, int]] = None,
+    ascending: bool = False,
+    columns: bool = False
+):
+    """
+    Events with their statistics ordered by (date, id), starting after the given key.
+
+    The counts come from event_stats, so with an equality filter on the
+    college or event type and a date range the query is a range scan of
+    the matching (college_id, date, id) or (event_type, date, id) index.
+    With columns the event's columns are selected instead of the entity.
+    """
+    filters = filters or EventFilters()
+    query = (
+        select(
+            *(Event.__table__.columns if columns else [Event]),
+            func.coalesce(EventStats.registration_count, 0).label("registration_count"),
+            func.coalesce(EventStats.attendance_count, 0).label("attendance_count"),
+            EventStats.rating_sum,
+            EventStats.rating_count,
         )
+        .outerjoin(EventStats, EventStats.event_id == Event.id)
+    )
+
+    if filters.college_id:
+        query = query.where(Event.college_id == filters.college_id)
+    if filters.event_type:
+        query = query.where(Event.event_type == filters.event_type)
+    if filters.location:
+        query = query.where(Event.location == filters.location)
+    if filters.date_from:
+        query = query.where(Event.date >= filters.date_from)
+    if filters.date_to:
+        query = query.where(Event.date < filters.date_to)
+    if filters.upcoming_only:
+        query = query.where(Event.date >= datetime.utcnow())
+    if filters.has_capacity:
+        query = query.where(or_(
+            Event.max_participants.is_(None),
+            func.coalesce(EventStats.registration_count, 0) < Event.max_participants,
+        ))
+    if after:
+        date, event_id = after
+        if ascending:
+            query = query.where(or_(Event.date > date, and_(Event.date == date, Event.id > event_id)))
+        else:
+            query = query.where(or_(Event.date < date, and_(Event.date == date, Event.id < event_id)))
+
+    if ascending:
+        return query.order_by(Event.date, Event.id)
+    return query.order_by(desc(Event.date), desc(Event.id))
+
+
+def _event_with_stats_row(row) -> Tuple[Event, int, int, Optional[float]]:
+    event, registration_count, attendance_count, rating_sum, rating_count = row
+    return event, registration_count, attendance_count, _average(rating_sum or 0, rating_count or 0)
+
+
+def _event_with_stats_dict(row) -> dict:
+    event = row._asdict()
+    event["avg_rating"] = _average(event.pop("rating_sum") or 0, event.pop("rating_count") or 0)
+    return event
+
+
+def get_events_with_stats(
+    db: Session,
+    filters: Optional[EventFilters] = None,
+    limit: Optional[int] = None,
+    after: Optional[Tuple[datetime, int]] = None,
+    ascending: bool = False
+) -> List[Tuple[Event, int, int, Optional[float]]]:
+    """Get events with registration count, attendance count and average rating in one query"""
+    query = _events_with_stats_query(filters, after, ascending)
+    if limit:
+        query = query.limit(limit)
+    return [_event_with_stats_row(row) for row in db.exec(query)]
+
+
+def get_event_rows_with_stats(
+    db: Session,
+    filters: Optional[EventFilters] = None,
+    limit: Optional[int] = None,
+    after: Optional[Tuple[datetime, int]] = None,
+    ascending: bool = False
+) -> List[dict]:
+    """Get events with statistics as plain dicts with the EventListResponse fields, without loading entities"""
+    query = _events_with_stats_query(filters, after, ascending, columns=True)
+    if limit:
+        query = query.limit(limit)
+    return [_event_with_stats_dict(row) for row in db.exec(query)]
+
+
+def iter_events_with_stats(
+    db: Session,
+    filters: Optional[EventFilters] = None,
+    limit: Optional[int] = None,
+    after: Optional[Tuple[datetime, int]] = None,
+    ascending: bool = False
+) -> Iterator[Tuple[Event, int, int, Optional[float]]]:
+    """Stream events with statistics from a server-side cursor"""
+    query = _events_with_stats_query(filters, after, ascending)
+    if limit:
+        query = query.limit(limit)
+    for row in db.exec(query.execution_options(stream_results=True, yield_per=STREAM_BATCH_SIZE)):
+        yield _event_with_stats_row(row)
+
+
+def _bump_fact_stats(db: Session, event_id: int, student_id: int, at: datetime, **delta: int) -> None:
+    """Add one fact row's counters to the event, student and trend statistics"""
+    bump_event_stats(db, [{"event_id": event_id, **delta}])
+    bump_student_stats(db, [{"student_id": student_id, **delta}])
+    bump_trend_stats(db, [{"event_id": event_id, "day": at.date(), **delta}])
+
+
+def search_events(
+    db: Session, query: str, limit: int = 20, after: Optional[Tuple[float, int]] = None
+) -> List[Tuple[Event, int, int, Optional[float], float]]:
+    """
+    Rank events matching a free-text query through the full-text index.
+
+    Rows are ordered by (score desc, id) and carry their statistics and
+    score; after is the (score, id) of the last row of the previous page.
+    """
+    matches = search_query(db.get_bind().dialect.name, query).subquery()
+    # Rank and cut the page from the index alone, then join only the rows returned
+    page = select(matches.c.event_id, matches.c.score)
+    if after:
+        score, event_id = after
+        page = page.where(
+            or_(matches.c.score < score, and_(matches.c.score == score, matches.c.event_id > event_id))
+        )
+    page = page.order_by(desc(matches.c.score), matches.c.event_id).limit(limit).subquery()
+
+    statement = (
+        select(
+            Event,
+            func.coalesce(EventStats.registration_count, 0),
+            func.coalesce(EventStats.attendance_count, 0),
+            EventStats.rating_sum,
+            EventStats.rating_count,
+            page.c.score,
+        )
+        .join(page, page.c.event_id == Event.id)
+        .outerjoin(EventStats, EventStats.event_id == Event.id)
+        .order_by(desc(page.c.score), Event.id)
+    )
+    return [
+        (event, registration_count, attendance_count, _average(rating_sum or 0, rating_count or 0), score)
+        for event, registration_count, attendance_count, rating_sum, rating_count, score in db.exec(statement)
+    ]
+
+
+# Registration CRUD
+class EventFullError(ValueError):
+    """Raised when an event has reached its max_participants"""
+
+
+def _lock_event(db: Session, event_id: int):
+    """Lock the event row for the rest of the transaction and return its id and max_participants"""
+    event = db.exec(
+        select(Event.id, Event.max_participants).where(Event.id == event_id).with_for_update()
     ).first()
-    
-    if existing:
+    if not event:
+        raise LookupError("Event not found")
+    return event
+
+
+def _registration_count(db: Session, event_id: int) -> int:
+    return db.exec(
+        select(func.count()).select_from(Registration).where(Registration.event_id == event_id)
+    ).one()
+
+
+def _check_event_and_student(db: Session, event_id: int, student_id: int) -> None:
+    """Raise LookupError unless both the event and the student exist, in one round trip"""
+    found = db.exec(select(
+        exists().where(Event.id == event_id),
+        exists().where(Student.id == student_id),
+    )).one()
+    if not found[0]:
+        raise LookupError("Event not found")
+    if not found[1]:
+        raise LookupError("Student not found")
+
+
+def _lock_event_for_registration(db: Session, event_id: int, student_id: int):
+    """
+    Lock the event row and read everything a registration needs to know in one query:
+    its max_participants, whether the student exists and is already
+    registered, and how many seats are taken (only counted when capped).
+    """
+    registered = exists().where(and_(Registration.event_id == Event.id, Registration.student_id == student_id))
+    taken = (
+        select(func.count()).select_from(Registration).where(Registration.event_id == Event.id)
+        .correlate(Event).scalar_subquery()
+    )
+    event = db.exec(
+        select(
+            Event.id,
+            Event.max_participants,
+            exists().where(Student.id == student_id).label("student_exists"),
+            registered.label("registered"),
+            case((Event.max_participants.is_(None), None), else_=taken).label("taken"),
+        ).where(Event.id == event_id).with_for_update(of=Event)
+    ).first()
+    if not event:
+        raise LookupError("Event not found")
+    if not event.student_exists:
+        raise LookupError("Student not found")
+    return event
+
+
+def create_registration(db: Session, event_id: int, registration: RegistrationCreate) -> Registration:
+    """
+    Create a new event registration.
+
+    The duplicate check, capacity check and insert run in one transaction
+    that holds the event's row lock (the database write lock on SQLite), so
+    concurrent requests cannot double-register a student or overfill an
+    event. The unique constraint on (event_id, student_id) backs this up.
+    Raises LookupError when the event or student does not exist.
+    """
+    lock_for_write(db)
+    try:
+        event = _lock_event_for_registration(db, event_id, registration.student_id)
+        if event.registered:
+            raise ValueError("Student is already registered for this event")
+        if event.max_participants is not None and event.taken >= event.max_participants:
+            raise EventFullError("Event is full")
+
+        db_registration = Registration(event_id=event_id, student_id=registration.student_id)
+        db.add(db_registration)
+        _bump_fact_stats(db, event_id, registration.student_id, db_registration.registered_at, registration_count=1)
+        db.commit()
+    except IntegrityError:
+        db.rollback()
         raise ValueError("Student is already registered for this event")
-    
-    db_registration = Registration(event_id=event_id, **registration.dict())
-    db.add(db_registration)
-    db.commit()
-    db.refresh(db_registration)
+    except Exception:
+        db.rollback()
+        raise
     return db_registration
 
 
+def create_waitlist_entry(db: Session, event_id: int, student_id: int) -> Tuple[WaitlistEntry, int]:
+    """Add a student to an event's waitlist, returning the entry and its 1-based position"""
+    db_entry = WaitlistEntry(event_id=event_id, student_id=student_id)
+    db.add(db_entry)
+    try:
+        db.commit()
+    except IntegrityError:
+        db.rollback()
+        raise ValueError("Student is already on the waitlist for this event")
+
+    position = db.exec(
+        select(func.count()).select_from(WaitlistEntry).where(
+            and_(WaitlistEntry.event_id == event_id, WaitlistEntry.id <= db_entry.id)
+        )
+    ).one()
+    return db_entry, position
+
+
 def get_registrations_by_event(db: Session, event_id: int) -> List[Registration]:
     """Get all registrations for an event"""
     return db.exec(select(Registration).where(Registration.event_id == event_id)).all()
@@ -104,11 +430,16 @@ def get_registrations_by_event(db: Session, event_id: int) -> List[Registration]
 
 # Attendance CRUD
 def create_attendance(db: Session, event_id: int, attendance: AttendanceCreate) -> Attendance:
-    """Mark attendance for an event"""
-    db_attendance = Attendance(event_id=event_id, **attendance.dict())
+    """Mark attendance for an event; raises LookupError when the event or student does not exist"""
+    _check_event_and_student(db, event_id, attendance.student_id)
+    db_attendance = Attendance(event_id=event_id, **attendance.model_dump())
     db.add(db_attendance)
-    db.commit()
-    db.refresh(db_attendance)
+    try:
+        _bump_fact_stats(db, event_id, attendance.student_id, db_attendance.attended_at, attendance_count=1)
+        db.commit()
+    except IntegrityError:
+        db.rollback()
+        raise ValueError("Attendance is already marked for this student")
     return db_attendance
 
 
@@ -119,11 +450,13 @@ def get_attendance_by_event(db: Session, event_id: int) -> List[Attendance]:
 
 # Feedback CRUD
 def create_feedback(db: Session, event_id: int, feedback: FeedbackCreate) -> Feedback:
-    """Create feedback for an event"""
-    db_feedback = Feedback(event_id=event_id, **feedback.dict())
+    """Create feedback for an event; raises LookupError when the event or student does not exist"""
+    _check_event_and_student(db, event_id, feedback.student_id)
+    db_feedback = Feedback(event_id=event_id, **feedback.model_dump())
     db.add(db_feedback)
+    _bump_fact_stats(db, event_id, feedback.student_id, db_feedback.submitted_at,
+                     rating_sum=feedback.rating, rating_count=1)
     db.commit()
-    db.refresh(db_feedback)
     return db_feedback
 
 
@@ -132,90 +465,374 @@ def get_feedback_by_event(db: Session, event_id: int) -> List[Feedback]:
     return db.exec(select(Feedback).where(Feedback.event_id == event_id)).all()
 
 
+# Batch ingestion
+BATCH_ACCEPTED = "accepted"
+BATCH_DUPLICATE = "duplicate"
+BATCH_UNKNOWN = "unknown"
+BATCH_FULL = "full"
+BATCH_INVALID = "invalid"
+
+
+def _classify_batch(db: Session, event_id: int, student_ids: List[int], model=None) -> List[List]:
+    """
+    Classify every student ID of a batch with one set-based query.
+
+    A row is unknown if the student does not exist, and a duplicate if it
+    repeats an earlier row of the batch or, when a fact table model is
+    given, the student already has a row for the event in it.
+    """
+    if model is None:
+        query = select(Student.id, null())
+    else:
+        query = select(Student.id, model.id).outerjoin(
+            model, and_(model.student_id == Student.id, model.event_id == event_id)
+        )
+    existing = {
+        student_id: row_id is not None
+        for student_id, row_id in db.exec(query.where(Student.id.in_(set(student_ids))))
+    }
+
+    seen = set()
+    statuses = []
+    for student_id in student_ids:
+        if student_id not in existing:
+            status = BATCH_UNKNOWN
+        elif existing[student_id] or student_id in seen:
+            status = BATCH_DUPLICATE
+        else:
+            status = BATCH_ACCEPTED
+            seen.add(student_id)
+        statuses.append([student_id, status])
+    return statuses
+
+
+def _insert_batch(db: Session, model, rows: List[dict]) -> None:
+    """Insert all rows with a single executemany"""
+    if rows:
+        db.execute(insert(model), rows)
+
+
+def _bump_batch_stats(db: Session, event_id: int, at: datetime, student_deltas: List[dict]) -> None:
+    """Apply the per-student counter deltas of a batch and their sum to the event and its trend"""
+    if student_deltas:
+        event_delta = {"event_id": event_id}
+        for delta in student_deltas:
+            for name, value in delta.items():
+                if name != "student_id":
+                    event_delta[name] = event_delta.get(name, 0) + value
+        bump_event_stats(db, [event_delta])
+        bump_student_stats(db, student_deltas)
+        bump_trend_stats(db, [{**event_delta, "day": at.date()}])
+
+
+def _classify_registrations(db: Session, event_id: int, student_ids: List[int]) -> List[List]:
+    """Lock the event and classify a batch of registrations, marking rows beyond its capacity as full"""
+    event = _lock_event(db, event_id)
+    statuses = _classify_batch(db, event_id, student_ids, Registration)
+
+    if event.max_participants is not None:
+        seats = event.max_participants - _registration_count(db, event_id)
+        for row in statuses:
+            if row[1] == BATCH_ACCEPTED:
+                if seats > 0:
+                    seats -= 1
+                else:
+                    row[1] = BATCH_FULL
+    return statuses
+
+
+def create_registration_batch(db: Session, event_id: int, student_ids: List[int]) -> List[Tuple[int, str]]:
+    """Register many students at once, returning a (student_id, status) pair per input row"""
+    lock_for_write(db)
+    try:
+        statuses = _classify_registrations(db, event_id, student_ids)
+
+        now = datetime.utcnow()
+        accepted = [student_id for student_id, status in statuses if status == BATCH_ACCEPTED]
+        _insert_batch(db, Registration, [
+            {"event_id": event_id, "student_id": student_id, "registered_at": now} for student_id in accepted
+        ])
+        _bump_batch_stats(db, event_id, now, [
+            {"student_id": student_id, "registration_count": 1} for student_id in accepted
+        ])
+        db.commit()
+    except Exception:
+        db.rollback()
+        raise
+    return [tuple(row) for row in statuses]
+
+
+def create_attendance_batch(db: Session, event_id: int, student_ids: List[int]) -> List[Tuple[int, str]]:
+    """Mark attendance for many students at once, returning a (student_id, status) pair per input row"""
+    lock_for_write(db)
+    try:
+        _lock_event(db, event_id)
+        statuses = _classify_batch(db, event_id, student_ids, Attendance)
+
+        now = datetime.utcnow()
+        accepted = [student_id for student_id, status in statuses if status == BATCH_ACCEPTED]
+        _insert_batch(db, Attendance, [
+            {"event_id": event_id, "student_id": student_id, "attended_at": now} for student_id in accepted
+        ])
+        _bump_batch_stats(db, event_id, now, [
+            {"student_id": student_id, "attendance_count": 1} for student_id in accepted
+        ])
+        db.commit()
+    except Exception:
+        db.rollback()
+        raise
+    return [tuple(row) for row in statuses]
+
+
+def create_feedback_batch(db: Session, event_id: int, items: List[FeedbackCreate]) -> List[Tuple[int, str]]:
+    """Store many feedback entries at once, returning a (student_id, status) pair per input row"""
+    lock_for_write(db)
+    try:
+        _lock_event(db, event_id)
+        # Invalid rows are left out of the classification, so they cannot make a later valid row a duplicate
+        valid = [1 <= item.rating <= 5 for item in items]
+        classified = iter(_classify_batch(db, event_id, [item.student_id for item, ok in zip(items, valid) if ok]))
+        statuses = [next(classified) if ok else [item.student_id, BATCH_INVALID] for item, ok in zip(items, valid)]
+
+        now = datetime.utcnow()
+        accepted = [item for (_, status), item in zip(statuses, items) if status == BATCH_ACCEPTED]
+        _insert_batch(db, Feedback, [
+            {"event_id": event_id, "student_id": item.student_id, "rating": item.rating,
+             "comment": item.comment, "submitted_at": now}
+            for item in accepted
+        ])
+        _bump_batch_stats(db, event_id, now, [
+            {"student_id": item.student_id, "rating_sum": item.rating, "rating_count": 1} for item in accepted
+        ])
+        db.commit()
+    except Exception:
+        db.rollback()
+        raise
+    return [tuple(row) for row in statuses]
+
+
+def stage_registrations(db: Session, event_id: int, student_ids: List[int]) -> List[Tuple[str, Optional[Registration]]]:
+    """
+    Add registrations for many students to the session's transaction without committing.
+
+    Returns a (status, registration) pair per input row, the registration
+    being None unless the row was accepted. Used by the group-commit writer,
+    which needs the created rows and commits many events' batches at once.
+    """
+    statuses = _classify_registrations(db, event_id, student_ids)
+    now = datetime.utcnow()
+    rows = [
+        Registration(event_id=event_id, student_id=student_id, registered_at=now) if status == BATCH_ACCEPTED else None
+        for student_id, status in statuses
+    ]
+    db.add_all([row for row in rows if row is not None])
+    _bump_batch_stats(db, event_id, now, [
+        {"student_id": row.student_id, "registration_count": 1} for row in rows if row is not None
+    ])
+    return [(status, row) for (_, status), row in zip(statuses, rows)]
+
+
+def stage_attendance(db: Session, event_id: int, student_ids: List[int]) -> List[Tuple[str, Optional[Attendance]]]:
+    """Add attendance for many students to the session's transaction without committing, like stage_registrations"""
+    _lock_event(db, event_id)
+    statuses = _classify_batch(db, event_id, student_ids, Attendance)
+    now = datetime.utcnow()
+    rows = [
+        Attendance(event_id=event_id, student_id=student_id, attended_at=now) if status == BATCH_ACCEPTED else None
+        for student_id, status in statuses
+    ]
+    db.add_all([row for row in rows if row is not None])
+    _bump_batch_stats(db, event_id, now, [
+        {"student_id": row.student_id, "attendance_count": 1} for row in rows if row is not None
+    ])
+    return [(status, row) for (_, status), row in zip(statuses, rows)]
+
+
 # Report functions
-def get_event_popularity_report(db: Session) -> List[dict]:
+#
+# The reports read the running totals in event_stats and student_stats, which
+# the write path above keeps current; see app.stats for the full recompute.
+def _average(total: int, count: int) -> Optional[float]:
+    return total / count if count else None
+
+
+def _event_popularity_query(after: Optional[Tuple[int, int]] = None):
+    """Event popularity ordered by (registration_count desc, id), starting after the given key"""
+    query = select(
+        Event.id,
+        Event.title,
+        Event.event_type,
+        EventStats.registration_count,
+        EventStats.attendance_count,
+        EventStats.rating_sum,
+        EventStats.rating_count,
+    ).join(Event, Event.id == EventStats.event_id)
+
+    if after:
+        count, event_id = after
+        # The leading range condition lets the index seek straight to the page
+        query = query.where(
+            EventStats.registration_count <= count,
+            or_(EventStats.registration_count < count, EventStats.event_id > event_id),
+        )
+
+    return query.order_by(desc(EventStats.registration_count), EventStats.event_id)
+
+
+def _event_popularity_row(row) -> dict:
+    return {
+        "event_id": row.id,
+        "title": row.title,
+        "event_type": row.event_type,
+        "registration_count": row.registration_count,
+        "attendance_count": row.attendance_count,
+        "avg_rating": _average(row.rating_sum, row.rating_count)
+    }
+
+
+def get_event_popularity_report(
+    db: Session, limit: Optional[int] = None, after: Optional[Tuple[int, int]] = None
+) -> List[dict]:
     """Get event popularity report sorted by registrations"""
-    query = db.exec(
-        select(
-            Event.id,
-            Event.title,
-            Event.event_type,
-            func.count(Registration.id).label("registration_count"),
-            func.count(Attendance.id).label("attendance_count"),
-            func.avg(Feedback.rating).label("avg_rating")
+    query = _event_popularity_query(after)
+    if limit:
+        query = query.limit(limit)
+    return [_event_popularity_row(row) for row in db.exec(query)]
+
+
+def iter_event_popularity_report(
+    db: Session, limit: Optional[int] = None, after: Optional[Tuple[int, int]] = None
+) -> Iterator[dict]:
+    """Stream the event popularity report from a server-side cursor"""
+    query = _event_popularity_query(after)
+    if limit:
+        query = query.limit(limit)
+    for row in db.exec(query.execution_options(stream_results=True, yield_per=STREAM_BATCH_SIZE)):
+        yield _event_popularity_row(row)
+
+
+def _student_participation_query(after: Optional[Tuple[int, int]] = None):
+    """Student participation ordered by (events_attended desc, id), starting after the given key"""
+    query = select(
+        Student.id,
+        Student.name,
+        Student.email,
+        StudentStats.attendance_count,
+        StudentStats.registration_count,
+        StudentStats.rating_sum,
+        StudentStats.rating_count,
+    ).join(Student, Student.id == StudentStats.student_id)
+
+    if after:
+        count, student_id = after
+        query = query.where(
+            StudentStats.attendance_count <= count,
+            or_(StudentStats.attendance_count < count, StudentStats.student_id > student_id),
         )
-        .outerjoin(Registration, Event.id == Registration.event_id)
-        .outerjoin(Attendance, Event.id == Attendance.event_id)
-        .outerjoin(Feedback, Event.id == Feedback.event_id)
-        .group_by(Event.id, Event.title, Event.event_type)
-        .order_by(desc("registration_count"))
-    ).all()
-    
-    return [
-        {
-            "event_id": row.id,
-            "title": row.title,
-            "event_type": row.event_type,
-            "registration_count": row.registration_count or 0,
-            "attendance_count": row.attendance_count or 0,
-            "avg_rating": float(row.avg_rating) if row.avg_rating else None
-        }
-        for row in query
-    ]
+
+    return query.order_by(desc(StudentStats.attendance_count), StudentStats.student_id)
+
+
+def _student_participation_row(row) -> dict:
+    return {
+        "student_id": row.id,
+        "name": row.name,
+        "email": row.email,
+        "events_attended": row.attendance_count,
+        "total_registrations": row.registration_count
+    }
 
 
-def get_student_participation_report(db: Session) -> List[dict]:
+def get_student_participation_report(
+    db: Session, limit: Optional[int] = None, after: Optional[Tuple[int, int]] = None
+) -> List[dict]:
     """Get student participation report"""
-    query = db.exec(
-        select(
-            Student.id,
-            Student.name,
-            Student.email,
-            func.count(Attendance.id).label("events_attended"),
-            func.count(Registration.id).label("total_registrations")
-        )
-        .outerjoin(Registration, Student.id == Registration.student_id)
-        .outerjoin(Attendance, Student.id == Attendance.student_id)
-        .group_by(Student.id, Student.name, Student.email)
-        .order_by(desc("events_attended"))
-    ).all()
+    query = _student_participation_query(after)
+    if limit:
+        query = query.limit(limit)
+    return [_student_participation_row(row) for row in db.exec(query)]
+
+
+def iter_student_participation_report(
+    db: Session, limit: Optional[int] = None, after: Optional[Tuple[int, int]] = None
+) -> Iterator[dict]:
+    """Stream the student participation report from a server-side cursor"""
+    query = _student_participation_query(after)
+    if limit:
+        query = query.limit(limit)
+    for row in db.exec(query.execution_options(stream_results=True, yield_per=STREAM_BATCH_SIZE)):
+        yield _student_participation_row(row)
+
+
+def get_top_active_students(db: Session, limit: int = 10) -> List[dict]:
+    """Get top active students by attendance and feedback"""
+    query = db.exec(_student_participation_query().limit(limit)).all()
     
     return [
         {
             "student_id": row.id,
             "name": row.name,
             "email": row.email,
-            "events_attended": row.events_attended or 0,
-            "total_registrations": row.total_registrations or 0
+            "events_attended": row.attendance_count,
+            "avg_rating_given": _average(row.rating_sum, row.rating_count)
         }
         for row in query
     ]
 
 
-def get_top_active_students(db: Session, limit: int = 10) -> List[dict]:
-    """Get top active students by attendance and feedback"""
-    query = db.exec(
+TREND_BREAKDOWNS = ("event_type", "college_id")
+
+
+def get_trend_report(
+    db: Session,
+    granularity: str = "day",
+    since: Optional[date] = None,
+    until: Optional[date] = None,
+    event_type: Optional[str] = None,
+    college_id: Optional[int] = None,
+    by: Tuple[str, ...] = ()
+) -> List[dict]:
+    """
+    Get registrations, attendance and average rating per period.
+
+    Reads the trend_stats rollups of one granularity for the periods
+    starting in [since, until), summed over everything not listed in by.
+    """
+    if since is not None and until is not None and since >= until:
+        raise ValueError("since must be earlier than until")
+
+    dimensions = [getattr(TrendStats, name) for name in TREND_BREAKDOWNS if name in by]
+    query = (
         select(
-            Student.id,
-            Student.name,
-            Student.email,
-            func.count(Attendance.id).label("events_attended"),
-            func.avg(Feedback.rating).label("avg_rating_given")
+            TrendStats.period,
+            *dimensions,
+            func.sum(TrendStats.registration_count).label("registration_count"),
+            func.sum(TrendStats.attendance_count).label("attendance_count"),
+            func.sum(TrendStats.rating_sum).label("rating_sum"),
+            func.sum(TrendStats.rating_count).label("rating_count"),
         )
-        .outerjoin(Attendance, Student.id == Attendance.student_id)
-        .outerjoin(Feedback, Student.id == Feedback.student_id)
-        .group_by(Student.id, Student.name, Student.email)
-        .order_by(desc("events_attended"))
-        .limit(limit)
-    ).all()
-    
+        .where(TrendStats.granularity == granularity)
+        .group_by(TrendStats.period, *dimensions)
+        .order_by(TrendStats.period, *dimensions)
+    )
+    if since is not None:
+        query = query.where(TrendStats.period >= since)
+    if until is not None:
+        query = query.where(TrendStats.period < until)
+    if event_type is not None:
+        query = query.where(TrendStats.event_type == event_type)
+    if college_id is not None:
+        query = query.where(TrendStats.college_id == college_id)
+
     return [
         {
-            "student_id": row.id,
-            "name": row.name,
-            "email": row.email,
-            "events_attended": row.events_attended or 0,
-            "avg_rating_given": float(row.avg_rating_given) if row.avg_rating_given else None
+            "period": row.period,
+            "event_type": row.event_type if "event_type" in by else None,
+            # trend_stats stores 0 for events without a college
+            "college_id": (row.college_id or None) if "college_id" in by else None,
+            "registration_count": row.registration_count,
+            "attendance_count": row.attendance_count,
+            "avg_rating": _average(row.rating_sum, row.rating_count)
         }
-        for row in query
+        for row in db.exec(query)
     ]
@@ -2,40 +2,236 @@
 Database configuration and session management
 """
 
-import os
+import itertools
+import logging
+import time
+from typing import List, Optional
+from fastapi import Depends, Request, Response
 from sqlmodel import SQLModel, create_engine, Session
+from sqlmodel.ext.asyncio.session import AsyncSession
 from sqlalchemy import event
 from sqlalchemy.engine import Engine
+from sqlalchemy.engine.url import make_url
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.ext.asyncio import AsyncEngine, create_async_engine
 
-# Database URL - defaults to SQLite for development, can be overridden with DATABASE_URL env var
-DATABASE_URL = os.getenv("DATABASE_URL", "sqlite:///./campus_events.db")
+from app.config import Settings, settings
+from app.metrics import record_statement
+from app.stats import ensure_stats
 
-# Create engine
-if DATABASE_URL.startswith("sqlite"):
-    engine = create_engine(DATABASE_URL, connect_args={"check_same_thread": False})
-else:
-    engine = create_engine(DATABASE_URL)
+logger = logging.getLogger("app.db")
 
-# Enable foreign key constraints for SQLite
-@event.listens_for(Engine, "connect")
-def set_sqlite_pragma(dbapi_connection, connection_record):
-    if "sqlite" in str(dbapi_connection):
+
+def engine_options(url: str, config: Settings = settings) -> dict:
+    """Keyword arguments for create_engine / create_async_engine for the given database URL"""
+    pool = {
+        "pool_size": config.db_pool_size,
+        "max_overflow": config.db_max_overflow,
+        "pool_timeout": config.db_pool_timeout,
+    }
+    parsed = make_url(url)
+    if parsed.get_backend_name() != "sqlite":
+        return dict(pool, pool_recycle=config.db_pool_recycle, pool_pre_ping=config.db_pool_pre_ping)
+
+    options = {"connect_args": {"check_same_thread": False, "timeout": config.sqlite_busy_timeout_ms / 1000}}
+    # In-memory databases use a single shared connection, so there is no pool to size
+    if parsed.database and parsed.database != ":memory:":
+        options.update(pool)
+    return options
+
+
+def sqlite_pragmas(config: Settings = settings) -> list:
+    """PRAGMA statements applied to every new SQLite connection"""
+    return [
+        "PRAGMA foreign_keys=ON",
+        f"PRAGMA journal_mode={config.sqlite_journal_mode}",
+        f"PRAGMA synchronous={config.sqlite_synchronous}",
+        f"PRAGMA busy_timeout={config.sqlite_busy_timeout_ms}",
+        f"PRAGMA mmap_size={config.sqlite_mmap_size}",
+        # A negative cache_size is in KiB rather than pages
+        f"PRAGMA cache_size=-{config.sqlite_cache_size_kib}",
+    ]
+
+
+def configure_sqlite(engine: Engine, config: Settings = settings) -> None:
+    """Apply the SQLite pragmas to each connection the engine opens; other backends are left alone"""
+    if engine.dialect.name != "sqlite":
+        return
+
+    pragmas = sqlite_pragmas(config)
+
+    @event.listens_for(engine, "connect")
+    def set_sqlite_pragmas(dbapi_connection, connection_record):
         cursor = dbapi_connection.cursor()
-        cursor.execute("PRAGMA foreign_keys=ON")
+        for pragma in pragmas:
+            cursor.execute(pragma)
         cursor.close()
 
 
+def instrument_engine(engine: Engine) -> None:
+    """Time every statement the engine executes for the request metrics and the slow-query log"""
+
+    @event.listens_for(engine, "before_cursor_execute")
+    def start_timer(conn, cursor, statement, parameters, context, executemany):
+        conn.info.setdefault("statement_started", []).append(time.perf_counter())
+
+    @event.listens_for(engine, "after_cursor_execute")
+    def stop_timer(conn, cursor, statement, parameters, context, executemany):
+        started = conn.info["statement_started"].pop()
+        record_statement(time.perf_counter() - started, statement, parameters)
+
+    @event.listens_for(engine, "handle_error")
+    def discard_timer(context):
+        timers = context.connection.info.get("statement_started") if context.connection else None
+        if timers:
+            timers.pop()
+
+
+def create_db_engine(url: str = settings.database_url, config: Settings = settings) -> Engine:
+    """Create an Engine with the configured pool and SQLite tuning"""
+    engine = create_engine(url, **engine_options(url, config))
+    configure_sqlite(engine, config)
+    instrument_engine(engine)
+    return engine
+
+
+def async_database_url(url: str) -> str:
+    """Map a sync database URL onto the matching async driver"""
+    scheme, _, rest = url.partition("://")
+    if scheme.startswith("sqlite"):
+        return f"sqlite+aiosqlite://{rest}"
+    if scheme.startswith("postgres"):
+        return f"postgresql+asyncpg://{rest}"
+    return url
+
+
+def create_async_db_engine(url: str = settings.database_url, config: Settings = settings) -> AsyncEngine:
+    """Create an AsyncEngine for the given sync database URL"""
+    async_url = async_database_url(url)
+    engine = create_async_engine(async_url, **engine_options(async_url, config))
+    configure_sqlite(engine.sync_engine, config)
+    instrument_engine(engine.sync_engine)
+    return engine
+
+
+class ReadReplicas:
+    """Read replica engines, handed out in turn"""
+
+    def __init__(self, engines: List[Engine]):
+        self.engines = list(engines)
+        self._turn = itertools.count()
+
+    def choose(self) -> Optional[Engine]:
+        """The next replica engine, or None when no replicas are configured"""
+        if not self.engines:
+            return None
+        return self.engines[next(self._turn) % len(self.engines)]
+
+
+engine = create_db_engine()
+read_replicas = ReadReplicas(create_db_engine(url) for url in settings.read_urls)
+async_engine = create_async_db_engine() if settings.async_db else None
+
+
+def create_missing_indexes(bind: Engine) -> None:
+    """
+    Create the declared indexes that existing tables lack.
+
+    create_all only indexes the tables it creates, so a database from before
+    an index was declared would never get it, including the unique indexes
+    that reject duplicate registrations and attendance.
+    """
+    for table in SQLModel.metadata.sorted_tables:
+        for index in table.indexes:
+            try:
+                with bind.begin() as connection:
+                    index.create(connection, checkfirst=True)
+            except IntegrityError:
+                logger.error("Cannot create unique index %s: %s has duplicate rows", index.name, table.name)
+
+
 def create_db_and_tables():
-    """Create database tables"""
+    """Create database tables, and the indexes that tables from an older schema lack"""
     SQLModel.metadata.create_all(engine)
+    create_missing_indexes(engine)
 
 
 async def init_db():
-    """Initialize database on startup"""
+    """Initialize database on startup, filling the report statistics of a database created before them"""
     create_db_and_tables()
+    with Session(engine) as db:
+        ensure_stats(db)
+
+
+def lock_for_write(session: Session) -> None:
+    """
+    Take the database write lock at the start of the session's transaction.
+
+    SQLite otherwise starts transactions in deferred mode, where a reader
+    that later tries to write can fail with "database is locked" instead of
+    waiting its turn. Other backends use row locks and need nothing here.
+    """
+    connection = session.connection()
+    if connection.dialect.name != "sqlite":
+        return
+    if not connection.connection.driver_connection.in_transaction:
+        connection.exec_driver_sql("BEGIN IMMEDIATE")
+
+
+# Holds the time until which the client reads from the primary after a write
+READ_PRIMARY_COOKIE = "read_primary_until"
+
+
+def pin_reads_to_primary(response: Response, config: Settings = settings) -> None:
+    """Send the client's reads to the primary until the replicas have caught up with its write"""
+    # Without replicas every read is on the primary already, and the pin would only bypass the response cache
+    if config.read_your_writes_seconds <= 0 or not read_replicas.engines:
+        return
+    until = time.time() + config.read_your_writes_seconds
+    response.set_cookie(
+        READ_PRIMARY_COOKIE, f"{until:.3f}",
+        max_age=max(1, int(config.read_your_writes_seconds)), httponly=True, samesite="lax",
+    )
+
+
+def reads_pinned_to_primary(request: Request) -> bool:
+    """Whether the request comes from a client that wrote within the read-your-writes window"""
+    try:
+        return float(request.cookies.get(READ_PRIMARY_COOKIE, 0)) > time.time()
+    except ValueError:
+        return False
+
+
+def get_session(response: Response):
+    """
+    Dependency to get a session on the primary database.
+
+    Objects are not expired on commit, so a created row is returned as
+    written instead of being reloaded with another SELECT.
+    """
+    with Session(engine, expire_on_commit=False) as session:
+        if read_replicas.engines:
+            event.listen(session, "after_commit", lambda session: pin_reads_to_primary(response))
+        yield session
+
+
+def get_read_session(request: Request, primary: Session = Depends(get_session)):
+    """
+    Dependency to get a session for read-only endpoints.
+
+    Reads go to a read replica when any are configured, unless the client
+    wrote within the read-your-writes window; otherwise they share the
+    primary session, which opens no connection until it is used.
+    """
+    replica = None if reads_pinned_to_primary(request) else read_replicas.choose()
+    if replica is None:
+        yield primary
+        return
+    with Session(replica) as session:
+        yield session
 
 
-def get_session():
-    """Dependency to get database session"""
-    with Session(engine) as session:
+async def get_async_session():
+    """Dependency to get an async database session"""
+    async with AsyncSession(async_engine, expire_on_commit=False) as session:
         yield session
@@ -0,0 +1,271 @@
+"""
+Columnar export of the Campus Event Management System tables
+
+Streams a table in chunks read from a server-side cursor, so memory stays
+flat whatever the table size. Parquet and Arrow IPC stream output need
+pyarrow; without it the export is gzip-compressed CSV.
+
+Incremental exports select rows whose timestamp (registered_at,
+attended_at, submitted_at, or created_at for the other tables) falls in
+[since, until), so a nightly job passing the previous run's until as since
+copies each row exactly once:
+
+    python -m app.export registrations attendance feedback --since 2024-03-01 --until 2024-03-02
+"""
+
+import argparse
+import csv
+import gzip
+import io
+import os
+import sys
+import time
+from datetime import datetime, timezone
+from typing import Callable, Iterable, Iterator, List, Optional, Tuple
+from sqlmodel import Session, select
+from sqlalchemy import Boolean, DateTime, Float, Integer
+
+from app.models import College, Student, Event, Registration, Attendance, Feedback, WaitlistEntry
+
+CHUNK_SIZE = 10000
+
+# Table name -> (model, timestamp column used by since/until)
+EXPORT_TABLES = {
+    "colleges": (College, "created_at"),
+    "students": (Student, "created_at"),
+    "events": (Event, "created_at"),
+    "registrations": (Registration, "registered_at"),
+    "attendance": (Attendance, "attended_at"),
+    "feedback": (Feedback, "submitted_at"),
+    "waitlist": (WaitlistEntry, "joined_at"),
+}
+
+# Format name -> (file extension, media type)
+FORMATS = {
+    "parquet": (".parquet", "application/vnd.apache.parquet"),
+    "arrow": (".arrows", "application/vnd.apache.arrow.stream"),
+    "csv": (".csv.gz", "application/gzip"),
+}
+
+
+def _pyarrow():
+    """Return the pyarrow module, or None when it is not installed"""
+    try:
+        import pyarrow
+    except ImportError:
+        return None
+    return pyarrow
+
+
+def resolve_format(file_format: Optional[str] = None) -> str:
+    """Pick the requested format, or the most compact one available"""
+    if file_format is None:
+        return "parquet" if _pyarrow() else "csv"
+    if file_format not in FORMATS:
+        raise ValueError(f"Unknown export format '{file_format}', expected one of {', '.join(FORMATS)}")
+    if file_format != "csv" and not _pyarrow():
+        raise ValueError(f"The {file_format} format needs pyarrow, which is not installed; use csv")
+    return file_format
+
+
+class _ChunkSink(io.RawIOBase):
+    """Write-only file that hands back what was written since the last drain"""
+
+    def __init__(self):
+        self._chunks: List[bytes] = []
+        self._position = 0
+
+    def writable(self) -> bool:
+        return True
+
+    def write(self, data) -> int:
+        self._chunks.append(bytes(data))
+        self._position += len(data)
+        return len(data)
+
+    def tell(self) -> int:
+        # Parquet records column chunk offsets from the position, so it counts drained bytes too
+        return self._position
+
+    def drain(self) -> bytes:
+        data = b"".join(self._chunks)
+        self._chunks = []
+        return data
+
+
+def _csv_chunks(columns: List[str], partitions: Iterable[list]) -> Iterator[bytes]:
+    sink = _ChunkSink()
+    text = io.StringIO()
+    writer = csv.writer(text)
+    writer.writerow(columns)
+    # mtime=0 keeps the output identical across runs of the same export
+    with gzip.GzipFile(fileobj=sink, mode="wb", mtime=0) as compressed:
+        for rows in partitions:
+            writer.writerows(
+                [value.isoformat() if isinstance(value, datetime) else value for value in row] for row in rows
+            )
+            compressed.write(text.getvalue().encode())
+            text.seek(0)
+            text.truncate()
+            # The compressor buffers small inputs, so a chunk may produce no output yet
+            data = sink.drain()
+            if data:
+                yield data
+        compressed.write(text.getvalue().encode())
+    yield sink.drain()
+
+
+def _arrow_schema(pa, table):
+    """Map the table's column types to an Arrow schema"""
+    fields = []
+    for column in table.columns:
+        if isinstance(column.type, DateTime):
+            arrow_type = pa.timestamp("us")
+        elif isinstance(column.type, Boolean):
+            arrow_type = pa.bool_()
+        elif isinstance(column.type, Integer):
+            arrow_type = pa.int64()
+        elif isinstance(column.type, Float):
+            arrow_type = pa.float64()
+        else:
+            arrow_type = pa.string()
+        fields.append(pa.field(column.name, arrow_type, nullable=column.nullable))
+    return pa.schema(fields)
+
+
+def _arrow_chunks(table, partitions: Iterable[list], file_format: str) -> Iterator[bytes]:
+    pa = _pyarrow()
+    schema = _arrow_schema(pa, table)
+    sink = _ChunkSink()
+    if file_format == "parquet":
+        import pyarrow.parquet as pq
+
+        writer = pq.ParquetWriter(sink, schema, compression="zstd")
+        # Each chunk becomes one row group
+        write = lambda batch: writer.write_table(pa.Table.from_batches([batch]))
+    else:
+        writer = pa.ipc.new_stream(sink, schema)
+        write = writer.write_batch
+
+    for rows in partitions:
+        columns = list(zip(*rows))
+        write(pa.RecordBatch.from_arrays(
+            [pa.array(values, type=field.type) for values, field in zip(columns, schema)], schema=schema
+        ))
+        yield sink.drain()
+    writer.close()
+    yield sink.drain()
+
+
+def _partitions(db: Session, table_name: str, since: Optional[datetime], until: Optional[datetime],
+                chunk_size: int) -> Iterator[list]:
+    model, timestamp = EXPORT_TABLES[table_name]
+    table = model.__table__
+    query = select(*table.columns).order_by(*table.primary_key.columns)
+    if since is not None:
+        query = query.where(table.c[timestamp] >= since)
+    if until is not None:
+        query = query.where(table.c[timestamp] < until)
+    result = db.execute(query.execution_options(stream_results=True, yield_per=chunk_size))
+    yield from result.partitions()
+
+
+def naive_utc(value: Optional[datetime]) -> Optional[datetime]:
+    """A since/until bound as the timestamps are stored: naive UTC"""
+    if value is None or value.tzinfo is None:
+        return value
+    return value.astimezone(timezone.utc).replace(tzinfo=None)
+
+
+def validate_export(
+    table_name: str,
+    file_format: Optional[str] = None,
+    since: Optional[datetime] = None,
+    until: Optional[datetime] = None,
+) -> str:
+    """
+    Check an export's parameters and return its resolved format.
+
+    Raises LookupError for an unknown table and ValueError for an unusable
+    format or an empty time window.
+    """
+    if table_name not in EXPORT_TABLES:
+        raise LookupError(f"Unknown table '{table_name}', expected one of {', '.join(EXPORT_TABLES)}")
+    file_format = resolve_format(file_format)
+    since, until = naive_utc(since), naive_utc(until)
+    if since is not None and until is not None and since >= until:
+        raise ValueError("since must be earlier than until")
+    return file_format
+
+
+def stream_export(
+    db: Session,
+    table_name: str,
+    file_format: Optional[str] = None,
+    since: Optional[datetime] = None,
+    until: Optional[datetime] = None,
+    chunk_size: int = CHUNK_SIZE,
+    on_chunk: Optional[Callable[[int], None]] = None,
+) -> Tuple[str, Iterator[bytes]]:
+    """
+    Validate an export and return its resolved format and the byte stream.
+
+    Raises like validate_export before any row is read. on_chunk is called
+    with the row count of every chunk read.
+    """
+    file_format = validate_export(table_name, file_format, since, until)
+    since, until = naive_utc(since), naive_utc(until)
+
+    def counted(partitions: Iterator[list]) -> Iterator[list]:
+        for rows in partitions:
+            if on_chunk:
+                on_chunk(len(rows))
+            yield rows
+
+    partitions = counted(_partitions(db, table_name, since, until, chunk_size))
+    table = EXPORT_TABLES[table_name][0].__table__
+    if file_format == "csv":
+        return file_format, _csv_chunks([column.name for column in table.columns], partitions)
+    return file_format, _arrow_chunks(table, partitions, file_format)
+
+
+def export_filename(table_name: str, file_format: str) -> str:
+    return table_name + FORMATS[file_format][0]
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("tables", nargs="+", choices=list(EXPORT_TABLES))
+    parser.add_argument("--format", dest="file_format", choices=list(FORMATS),
+                        help="default: parquet when pyarrow is installed, otherwise csv")
+    parser.add_argument("--since", type=datetime.fromisoformat, help="export rows stamped at or after this time")
+    parser.add_argument("--until", type=datetime.fromisoformat, help="export rows stamped before this time")
+    parser.add_argument("--output-dir", default=".")
+    parser.add_argument("--chunk-size", type=int, default=CHUNK_SIZE)
+    args = parser.parse_args()
+
+    from app.db import engine
+
+    os.makedirs(args.output_dir, exist_ok=True)
+    with Session(engine) as db:
+        for table_name in args.tables:
+            counts = []
+            start = time.perf_counter()
+            try:
+                file_format, chunks = stream_export(
+                    db, table_name, args.file_format, args.since, args.until, args.chunk_size, on_chunk=counts.append
+                )
+            except ValueError as e:
+                print(f"error: {e}", file=sys.stderr)
+                return 2
+            path = os.path.join(args.output_dir, export_filename(table_name, file_format))
+            with open(path, "wb") as out:
+                for chunk in chunks:
+                    out.write(chunk)
+            elapsed = time.perf_counter() - start
+            print(f"{table_name}: {sum(counts)} rows to {path} ({os.path.getsize(path):,} bytes) in {elapsed:.1f}s")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,346 @@
+"""
+Bulk importer for fixtures and historical data
+Run with: python -m app.fixtures.bulk_import attendance attendance.csv --rejects rejects.ndjson
+
+Streams a CSV (with a header row) or NDJSON file in chunks. Natural keys
+are resolved in memory, each chunk is written with one executemany in its
+own transaction, and the report statistics are bumped in that same
+transaction. Rows that cannot be imported are rejected with a reason and
+do not stop the import.
+
+Columns per table (empty CSV cells are treated as missing):
+  colleges       name, location
+  students       name, email, student_id, college (name) or college_id
+  events         title, description, event_type, date, location,
+                 max_participants, college (name) or college_id
+  registrations  event, student, registered_at
+  attendance     event, student, attended_at
+  feedback       event, student, rating, comment, submitted_at
+
+In the fact tables an event is referenced by event_id, or by event_title
+plus event_date; a student by student_id (the student number, e.g. TU001)
+or email. Capacity is not enforced, since historical rows already happened.
+"""
+
+import argparse
+import csv
+import json
+import sys
+import os
+import time
+from collections import Counter
+from dataclasses import dataclass, field
+from datetime import date, datetime
+from itertools import islice
+from typing import Dict, Iterator, List, Optional, Tuple
+
+# Add the parent directory to the path so we can import our modules
+sys.path.append(os.path.dirname(os.path.dirname(os.path.dirname(__file__))))
+
+from pydantic import ValidationError
+from sqlmodel import Session, select, and_
+from sqlalchemy import insert
+
+from app.cache import FACT_TAGS, response_cache
+from app.db import engine, create_db_and_tables
+from app.models import College, Student, Event, Registration, Attendance, Feedback
+from app.schemas import CollegeCreate, StudentCreate, EventCreate
+from app.stats import bump_event_stats, bump_student_stats, bump_trend_stats
+
+DEFAULT_CHUNK_SIZE = 10000
+
+
+@dataclass
+class ImportResult:
+    """Outcome of one import run"""
+    table: str
+    read: int = 0
+    inserted: int = 0
+    rejected: List[dict] = field(default_factory=list)
+    seconds: float = 0.0
+
+    @property
+    def rows_per_second(self) -> float:
+        return self.read / self.seconds if self.seconds else 0.0
+
+
+class _Keys:
+    """In-memory maps from natural keys to primary keys, loaded once per run"""
+
+    def __init__(self, db: Session):
+        self.colleges: Dict[str, int] = {name: pk for pk, name in db.exec(select(College.id, College.name))}
+        self.college_ids = set(self.colleges.values())
+        self.students: Dict[str, int] = {}
+        self.emails: Dict[str, int] = {}
+        for pk, code, email in db.exec(select(Student.id, Student.student_id, Student.email)):
+            self.students[code] = pk
+            self.emails[email] = pk
+        self.events: Dict[Tuple[str, datetime], int] = {}
+        self.event_ids = set()
+        for pk, title, date in db.exec(select(Event.id, Event.title, Event.date)):
+            self.events[(title, date)] = pk
+            self.event_ids.add(pk)
+
+    def college(self, row: dict) -> Optional[int]:
+        if row.get("college"):
+            if row["college"] not in self.colleges:
+                raise ValueError(f"Unknown college {row['college']!r}")
+            return self.colleges[row["college"]]
+        if row.get("college_id"):
+            college_id = int(row["college_id"])
+            if college_id not in self.college_ids:
+                raise ValueError(f"Unknown college_id {college_id}")
+            return college_id
+        return None
+
+    def event(self, row: dict) -> int:
+        if row.get("event_id"):
+            event_id = int(row["event_id"])
+            if event_id not in self.event_ids:
+                raise ValueError(f"Unknown event_id {event_id}")
+            return event_id
+        if row.get("event_title") and row.get("event_date"):
+            key = (row["event_title"], _timestamp(row["event_date"]))
+            if key not in self.events:
+                raise ValueError(f"Unknown event {key[0]!r} on {row['event_date']}")
+            return self.events[key]
+        raise ValueError("Missing event_id or event_title and event_date")
+
+    def student(self, row: dict) -> int:
+        if row.get("student_id"):
+            if row["student_id"] not in self.students:
+                raise ValueError(f"Unknown student_id {row['student_id']!r}")
+            return self.students[row["student_id"]]
+        if row.get("email"):
+            if row["email"] not in self.emails:
+                raise ValueError(f"Unknown email {row['email']!r}")
+            return self.emails[row["email"]]
+        raise ValueError("Missing student_id or email")
+
+
+def _timestamp(value) -> datetime:
+    return value if isinstance(value, datetime) else datetime.fromisoformat(value)
+
+
+def _reason(error: Exception) -> str:
+    if isinstance(error, ValidationError):
+        return "; ".join(f"{'.'.join(map(str, e['loc']))}: {e['msg']}" for e in error.errors())
+    return str(error)
+
+
+# Row converters: turn one input row into insert parameters or raise ValueError
+def _college_row(keys: _Keys, row: dict, now: datetime) -> dict:
+    college = CollegeCreate(**row)
+    if college.name in keys.colleges:
+        raise ValueError(f"Duplicate college {college.name!r}")
+    keys.colleges[college.name] = None  # claimed, the id is filled in after the insert
+    return {**college.model_dump(), "created_at": now}
+
+
+def _student_row(keys: _Keys, row: dict, now: datetime) -> dict:
+    student = StudentCreate(**{**row, "college_id": keys.college(row)})
+    if student.student_id in keys.students:
+        raise ValueError(f"Duplicate student_id {student.student_id!r}")
+    if student.email in keys.emails:
+        raise ValueError(f"Duplicate email {student.email!r}")
+    keys.students[student.student_id] = keys.emails[student.email] = None
+    return {**student.model_dump(), "created_at": now}
+
+
+def _event_row(keys: _Keys, row: dict, now: datetime) -> dict:
+    event = EventCreate(**{**row, "college_id": keys.college(row)})
+    if (event.title, event.date) in keys.events:
+        raise ValueError(f"Duplicate event {event.title!r} on {event.date.isoformat()}")
+    keys.events[(event.title, event.date)] = None
+    return {**event.model_dump(), "created_at": now}
+
+
+def _fact_row(timestamp_column: str):
+    def convert(keys: _Keys, row: dict, now: datetime) -> dict:
+        return {
+            "event_id": keys.event(row),
+            "student_id": keys.student(row),
+            timestamp_column: _timestamp(row[timestamp_column]) if row.get(timestamp_column) else now,
+        }
+    return convert
+
+
+def _feedback_row(keys: _Keys, row: dict, now: datetime) -> dict:
+    values = _fact_row("submitted_at")(keys, row, now)
+    rating = int(row.get("rating") or 0)
+    if not (1 <= rating <= 5):
+        raise ValueError("Rating must be between 1 and 5")
+    return {**values, "rating": rating, "comment": row.get("comment")}
+
+
+# table name -> (model, row converter, counter bumped in the report statistics)
+TABLES = {
+    "colleges": (College, _college_row, None),
+    "students": (Student, _student_row, None),
+    "events": (Event, _event_row, None),
+    "registrations": (Registration, _fact_row("registered_at"), "registration_count"),
+    "attendance": (Attendance, _fact_row("attended_at"), "attendance_count"),
+    "feedback": (Feedback, _feedback_row, "rating_count"),
+}
+# Fact table -> the timestamp that places its rows in the trend statistics
+FACT_TIMESTAMPS = {Registration: "registered_at", Attendance: "attended_at", Feedback: "submitted_at"}
+
+
+def _read_rows(path: str, file_format: str) -> Iterator[Tuple[int, dict]]:
+    """Yield (line number, row) pairs with blank values dropped"""
+    with open(path, newline="", encoding="utf-8") as source:
+        if file_format == "csv":
+            rows = enumerate(csv.DictReader(source), start=2)
+        else:
+            rows = ((number, json.loads(line)) for number, line in enumerate(source, start=1) if line.strip())
+        for number, row in rows:
+            yield number, {
+                name: value.strip() if isinstance(value, str) else value
+                for name, value in row.items() if value not in ("", None)
+            }
+
+
+def _existing_pairs(db: Session, model, rows: List[dict]) -> set:
+    """(event_id, student_id) pairs of the chunk that are already stored"""
+    event_ids = {row["event_id"] for row in rows}
+    student_ids = {row["student_id"] for row in rows}
+    return set(db.exec(
+        select(model.event_id, model.student_id).where(
+            and_(model.event_id.in_(event_ids), model.student_id.in_(student_ids))
+        )
+    ))
+
+
+def _insert_entities(db: Session, keys: _Keys, model, rows: List[dict]) -> None:
+    """Insert parent rows, recording their new ids in the key maps and creating their stats rows"""
+    if model is College:
+        for (pk,), row in zip(db.execute(insert(College).returning(College.id, sort_by_parameter_order=True), rows), rows):
+            keys.colleges[row["name"]] = pk
+            keys.college_ids.add(pk)
+    elif model is Student:
+        result = db.execute(insert(Student).returning(Student.id, sort_by_parameter_order=True), rows)
+        for (pk,), row in zip(result, rows):
+            keys.students[row["student_id"]] = keys.emails[row["email"]] = pk
+        bump_student_stats(db, [{"student_id": keys.students[row["student_id"]]} for row in rows])
+    else:
+        result = db.execute(insert(Event).returning(Event.id, sort_by_parameter_order=True), rows)
+        for (pk,), row in zip(result, rows):
+            keys.events[(row["title"], row["date"])] = pk
+            keys.event_ids.add(pk)
+        bump_event_stats(db, [{"event_id": keys.events[(row["title"], row["date"])]} for row in rows])
+
+
+def _insert_facts(db: Session, model, counter: str, rows: List[dict]) -> None:
+    """Insert fact rows and add their totals to the report statistics"""
+    db.execute(insert(model), rows)
+
+    event_deltas: Dict[int, Counter] = {}
+    student_deltas: Dict[int, Counter] = {}
+    trend_deltas: Dict[Tuple[int, date], Counter] = {}
+    for row in rows:
+        trend_key = (row["event_id"], row[FACT_TIMESTAMPS[model]].date())
+        for deltas, key in ((event_deltas, row["event_id"]), (student_deltas, row["student_id"]),
+                            (trend_deltas, trend_key)):
+            delta = deltas.setdefault(key, Counter())
+            delta[counter] += 1
+            if model is Feedback:
+                delta["rating_sum"] += row["rating"]
+    bump_event_stats(db, [{"event_id": key, **delta} for key, delta in event_deltas.items()])
+    bump_student_stats(db, [{"student_id": key, **delta} for key, delta in student_deltas.items()])
+    bump_trend_stats(db, [
+        {"event_id": event_id, "day": day, **delta} for (event_id, day), delta in trend_deltas.items()
+    ])
+
+
+def import_file(
+    db: Session,
+    table: str,
+    path: str,
+    file_format: Optional[str] = None,
+    chunk_size: int = DEFAULT_CHUNK_SIZE
+) -> ImportResult:
+    """Import a CSV or NDJSON file into table, committing once per chunk"""
+    model, convert, counter = TABLES[table]
+    file_format = file_format or ("csv" if path.endswith(".csv") else "ndjson")
+    result = ImportResult(table=table)
+    start = time.perf_counter()
+
+    keys = _Keys(db)
+    seen = set()
+    rows = _read_rows(path, file_format)
+    while True:
+        chunk = list(islice(rows, chunk_size))
+        if not chunk:
+            break
+        result.read += len(chunk)
+
+        now = datetime.utcnow()
+        accepted: List[Tuple[int, dict, dict]] = []
+        for number, row in chunk:
+            try:
+                accepted.append((number, row, convert(keys, row, now)))
+            except (ValueError, TypeError) as e:
+                result.rejected.append({"line": number, "reason": _reason(e), "row": row})
+
+        if model in (Registration, Attendance) and accepted:
+            # Drop pairs already stored or repeated earlier in the file, as the unique constraint would
+            existing = _existing_pairs(db, model, [values for _, _, values in accepted])
+            unique = []
+            for number, row, values in accepted:
+                pair = (values["event_id"], values["student_id"])
+                if pair in existing or pair in seen:
+                    result.rejected.append({"line": number, "reason": "Duplicate row", "row": row})
+                else:
+                    seen.add(pair)
+                    unique.append((number, row, values))
+            accepted = unique
+
+        values = [values for _, _, values in accepted]
+        if values:
+            try:
+                if counter:
+                    _insert_facts(db, model, counter, values)
+                else:
+                    _insert_entities(db, keys, model, values)
+                db.commit()
+            except Exception:
+                db.rollback()
+                raise
+            result.inserted += len(values)
+
+    result.seconds = time.perf_counter() - start
+    result.rejected.sort(key=lambda reject: reject["line"])
+    if result.inserted:
+        response_cache.invalidate(*FACT_TAGS)
+    return result
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("table", choices=list(TABLES))
+    parser.add_argument("path")
+    parser.add_argument("--format", dest="file_format", choices=["csv", "ndjson"],
+                        help="input format, inferred from the file extension by default")
+    parser.add_argument("--chunk-size", type=int, default=DEFAULT_CHUNK_SIZE)
+    parser.add_argument("--rejects", help="write rejected rows with their reason to this NDJSON file")
+    args = parser.parse_args()
+
+    create_db_and_tables()
+    with Session(engine) as db:
+        result = import_file(db, args.table, args.path, args.file_format, args.chunk_size)
+
+    print(f"{result.table}: read {result.read} rows, inserted {result.inserted}, "
+          f"rejected {len(result.rejected)} in {result.seconds:.2f}s ({result.rows_per_second:,.0f} rows/s)")
+    if args.rejects:
+        with open(args.rejects, "w", encoding="utf-8") as out:
+            for reject in result.rejected:
+                out.write(json.dumps(reject, default=str) + "\n")
+    else:
+        for reject in result.rejected[:10]:
+            print(f"  line {reject['line']}: {reject['reason']}")
+        if len(result.rejected) > 10:
+            print(f"  ... {len(result.rejected) - 10} more, use --rejects to keep them all")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,178 @@
+"""
+Seeded synthetic data generator for the Campus Event Management System
+Run with: python -m app.fixtures.generate_data --students 20000 --events 500 --density 0.05
+
+Builds a reproducible campus: the same parameters and seed always produce
+the same rows. Event popularity follows a heavy-tailed distribution, so a
+few events draw most registrations as on a real campus. Attendance is drawn
+from the registrants and feedback from the attendees. Rows are written with
+executemany in chunks, and the report statistics are rebuilt at the end.
+"""
+
+import argparse
+import random
+import sys
+import os
+import time
+from dataclasses import asdict, dataclass, field
+from datetime import datetime, timedelta
+from typing import Dict, Iterator, List
+
+# Add the parent directory to the path so we can import our modules
+sys.path.append(os.path.dirname(os.path.dirname(os.path.dirname(__file__))))
+
+from sqlmodel import Session
+from sqlalchemy import insert
+
+from app.models import College, Student, Event, Registration, Attendance, Feedback
+from app.stats import rebuild_stats
+
+CHUNK_SIZE = 10000
+EVENT_TYPES = ["workshop", "seminar", "competition", "hackathon", "talk", "cultural", "sports"]
+LOCATIONS = ["Auditorium", "Lab A", "Lab B", "Main Hall", "Library", "Conference Center", "Sports Complex"]
+# Rating weights for 1..5 stars, skewed positive as feedback usually is
+RATING_WEIGHTS = [0.05, 0.08, 0.2, 0.37, 0.3]
+
+
+@dataclass
+class GeneratorConfig:
+    """Dataset shape; every field is a command line option"""
+    colleges: int = 5
+    students: int = 2000
+    events: int = 200
+    density: float = 0.05  # mean fraction of students registered per event
+    attendance_rate: float = 0.7  # fraction of registrants who attend
+    feedback_rate: float = 0.4  # fraction of attendees who leave feedback
+    capacity_rate: float = 0.5  # fraction of events with a max_participants limit
+    seed: int = 42
+    start: datetime = field(default_factory=lambda: datetime(2024, 1, 8, 9, 0))
+    days: int = 120  # events are spread over this many days from start
+
+
+def _chunks(rows: Iterator[dict], size: int = CHUNK_SIZE) -> Iterator[List[dict]]:
+    chunk = []
+    for row in rows:
+        chunk.append(row)
+        if len(chunk) == size:
+            yield chunk
+            chunk = []
+    if chunk:
+        yield chunk
+
+
+def _insert(db: Session, model, rows: Iterator[dict]) -> int:
+    """Insert rows chunk by chunk, committing each chunk, and return the row count"""
+    count = 0
+    for chunk in _chunks(rows):
+        db.execute(insert(model), chunk)
+        db.commit()
+        count += len(chunk)
+    return count
+
+
+def generate(db: Session, config: GeneratorConfig) -> Dict[str, int]:
+    """Populate an empty database and return the number of rows written per table"""
+    rng = random.Random(config.seed)
+    counts: Dict[str, int] = {}
+
+    counts["colleges"] = _insert(db, College, (
+        {"id": i, "name": f"College {i}", "location": f"City {i}", "created_at": config.start}
+        for i in range(1, config.colleges + 1)
+    ))
+    counts["students"] = _insert(db, Student, (
+        {"id": i, "name": f"Student {i}", "email": f"student{i}@college{1 + i % config.colleges}.edu",
+         "student_id": f"S{i:07d}", "college_id": 1 + i % config.colleges, "created_at": config.start}
+        for i in range(1, config.students + 1)
+    ))
+
+    # Draw every event's size up front; Pareto weights normalised to a mean of 1
+    weights = [rng.paretovariate(1.5) for _ in range(config.events)]
+    scale = config.events / sum(weights) if weights else 0
+    sizes = [min(config.students, round(config.students * config.density * w * scale)) for w in weights]
+
+    events = []
+    for event_id, size in enumerate(sizes, start=1):
+        has_capacity = rng.random() < config.capacity_rate
+        event_type = rng.choice(EVENT_TYPES)
+        events.append({
+            "id": event_id,
+            "title": f"{event_type.title()} {event_id}",
+            "description": f"Synthetic event {event_id}",
+            "event_type": event_type,
+            "date": config.start + timedelta(days=rng.randrange(config.days), hours=rng.randrange(10)),
+            "location": rng.choice(LOCATIONS),
+            # Capacity is never below the generated registrations, so the data obeys the write rules
+            "max_participants": size + rng.randrange(1 + size // 5) if has_capacity else None,
+            "college_id": rng.randint(1, config.colleges),
+            "created_at": config.start,
+        })
+    counts["events"] = _insert(db, Event, iter(events))
+
+    registrations, attendance, feedback = [], [], []
+    student_ids = range(1, config.students + 1)
+    for event, size in zip(events, sizes):
+        registered_at = event["date"] - timedelta(days=7)
+        for student_id in sorted(rng.sample(student_ids, size)):
+            registrations.append({"event_id": event["id"], "student_id": student_id, "registered_at": registered_at})
+            if rng.random() >= config.attendance_rate:
+                continue
+            attendance.append({"event_id": event["id"], "student_id": student_id, "attended_at": event["date"]})
+            if rng.random() < config.feedback_rate:
+                feedback.append({
+                    "event_id": event["id"], "student_id": student_id,
+                    "rating": rng.choices(range(1, 6), RATING_WEIGHTS)[0], "comment": None,
+                    "submitted_at": event["date"] + timedelta(hours=3),
+                })
+
+        # Flush the buffers between events so memory stays bounded at millions of rows
+        if len(registrations) >= CHUNK_SIZE:
+            counts["registrations"] = counts.get("registrations", 0) + _insert(db, Registration, iter(registrations))
+            counts["attendance"] = counts.get("attendance", 0) + _insert(db, Attendance, iter(attendance))
+            counts["feedback"] = counts.get("feedback", 0) + _insert(db, Feedback, iter(feedback))
+            registrations, attendance, feedback = [], [], []
+
+    counts["registrations"] = counts.get("registrations", 0) + _insert(db, Registration, iter(registrations))
+    counts["attendance"] = counts.get("attendance", 0) + _insert(db, Attendance, iter(attendance))
+    counts["feedback"] = counts.get("feedback", 0) + _insert(db, Feedback, iter(feedback))
+
+    rebuild_stats(db)
+    return counts
+
+
+def add_arguments(parser: argparse.ArgumentParser) -> None:
+    """Add one option per GeneratorConfig field"""
+    defaults = GeneratorConfig()
+    for name, value in asdict(defaults).items():
+        if isinstance(value, datetime):
+            continue
+        parser.add_argument(f"--{name.replace('_', '-')}", type=type(value), default=value)
+
+
+def config_from_args(args: argparse.Namespace) -> GeneratorConfig:
+    return GeneratorConfig(**{
+        name: getattr(args, name) for name, value in asdict(GeneratorConfig()).items()
+        if not isinstance(value, datetime)
+    })
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    add_arguments(parser)
+    config = config_from_args(parser.parse_args())
+
+    # Imported here so other tools can reuse this module before configuring the database
+    from app.db import engine, create_db_and_tables
+
+    create_db_and_tables()
+    start = time.perf_counter()
+    with Session(engine) as db:
+        counts = generate(db, config)
+    elapsed = time.perf_counter() - start
+
+    total = sum(counts.values())
+    print(", ".join(f"{count} {table}" for table, count in counts.items()))
+    print(f"Generated {total} rows in {elapsed:.1f}s ({total / elapsed:,.0f} rows/s)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,220 @@
+"""
+Group commit for registrations and attendance
+
+With GROUP_COMMIT enabled, the register and attendance endpoints hand
+their write to a single writer thread instead of running their own
+transaction. The writer collects up to GROUP_COMMIT_MAX_ROWS writes, or
+whatever arrives within GROUP_COMMIT_MAX_WAIT_MS of the first one, and
+commits them in one transaction, so a burst of badge scans pays for one
+commit per batch rather than one per request. Every caller still gets its
+own outcome: the created row, or the same LookupError, ValueError or
+EventFullError the one-row crud functions raise.
+
+If a batch fails to commit, its writes are retried one at a time, so a
+single bad row cannot fail the requests batched with it. Callers wait at
+most GROUP_COMMIT_TIMEOUT seconds for their outcome, so a stalled writer
+answers 503 instead of tying up request threads; a write still queued
+when its caller gives up is dropped.
+"""
+
+import queue
+import threading
+import time
+from concurrent import futures
+from concurrent.futures import Future
+from dataclasses import dataclass, field
+from typing import Dict, List, Optional, Tuple
+
+from sqlmodel import Session
+
+from app import crud
+from app.config import Settings, settings
+from app.db import engine, lock_for_write
+from app.schemas import AttendanceCreate, RegistrationCreate
+
+REGISTRATION = "registration"
+ATTENDANCE = "attendance"
+
+STAGERS = {REGISTRATION: crud.stage_registrations, ATTENDANCE: crud.stage_attendance}
+
+
+@dataclass
+class Write:
+    """A queued write and the future its caller waits on"""
+    kind: str
+    event_id: int
+    student_id: int
+    future: Future = field(default_factory=Future)
+
+
+def _error(kind: str, status: str) -> Optional[Exception]:
+    """The exception the one-row crud function raises for a batch status, None if the row was accepted"""
+    if status == crud.BATCH_UNKNOWN:
+        return LookupError("Student not found")
+    if status == crud.BATCH_FULL:
+        return crud.EventFullError("Event is full")
+    if status == crud.BATCH_DUPLICATE:
+        if kind == REGISTRATION:
+            return ValueError("Student is already registered for this event")
+        return ValueError("Attendance is already marked for this student")
+    return None
+
+
+def _write_session() -> Session:
+    return Session(engine, expire_on_commit=False)
+
+
+class GroupCommitWriter:
+    """Commits queued registrations and attendance in batches from one writer thread"""
+
+    def __init__(
+        self,
+        enabled: bool = True,
+        max_rows: int = 100,
+        max_wait_ms: float = 5.0,
+        timeout: float = 10.0,
+        session_factory=_write_session,
+    ):
+        self.enabled = enabled
+        self.max_rows = max_rows
+        self.max_wait_ms = max_wait_ms
+        self.timeout = timeout
+        self.session_factory = session_factory
+        self._queue: "queue.Queue[Optional[Write]]" = queue.Queue()
+        self._thread: Optional[threading.Thread] = None
+        self._lock = threading.Lock()
+
+    def start(self) -> None:
+        """Start the writer thread if it is not running, or start a new one if it died"""
+        with self._lock:
+            if self._thread is None or not self._thread.is_alive():
+                self._thread = threading.Thread(target=self._run, name="group-commit", daemon=True)
+                self._thread.start()
+
+    def shutdown(self, timeout: Optional[float] = None) -> None:
+        """Commit the writes already queued, then stop the writer thread"""
+        with self._lock:
+            thread, self._thread = self._thread, None
+        if thread is not None:
+            self._queue.put(None)
+            thread.join(timeout)
+
+    def submit_registration(self, event_id: int, student_id: int) -> Future:
+        """Queue a registration; the future resolves to the Registration or raises like crud.create_registration"""
+        return self._submit(REGISTRATION, event_id, student_id)
+
+    def submit_attendance(self, event_id: int, student_id: int) -> Future:
+        """Queue an attendance mark; the future resolves to the Attendance or raises like crud.create_attendance"""
+        return self._submit(ATTENDANCE, event_id, student_id)
+
+    def result(self, future: Future):
+        """Wait for a submitted write; on timeout it is withdrawn if the writer has not picked it up yet"""
+        try:
+            return future.result(timeout=self.timeout)
+        except futures.TimeoutError:  # Only an alias of the builtin TimeoutError from Python 3.11
+            future.cancel()
+            raise
+
+    def _submit(self, kind: str, event_id: int, student_id: int) -> Future:
+        self.start()
+        write = Write(kind, event_id, student_id)
+        self._queue.put(write)
+        return write.future
+
+    def _next_batch(self) -> Optional[List[Write]]:
+        """
+        Wait for a write, then gather more until the batch is full or the wait is over; None to stop.
+
+        Writes whose caller gave up waiting are dropped; the others are marked
+        running, so they can no longer be cancelled.
+        """
+        first = self._queue.get()
+        if first is None:
+            return None
+        batch = [first] if first.future.set_running_or_notify_cancel() else []
+        deadline = time.monotonic() + self.max_wait_ms / 1000
+        while len(batch) < self.max_rows:
+            remaining = deadline - time.monotonic()
+            try:
+                write = self._queue.get(timeout=remaining) if remaining > 0 else self._queue.get_nowait()
+            except queue.Empty:
+                break
+            if write is None:
+                self._queue.put(None)  # Stop once this batch is committed
+                break
+            if write.future.set_running_or_notify_cancel():
+                batch.append(write)
+        return batch
+
+    def _run(self) -> None:
+        while True:
+            batch = self._next_batch()
+            if batch is None:
+                return
+            if not batch:
+                continue
+            try:
+                self._commit(batch)
+            except Exception:
+                self._commit_one_by_one(batch)
+
+    def _commit(self, batch: List[Write]) -> None:
+        """Stage every event's writes in one transaction, commit once, then resolve the futures"""
+        groups: Dict[Tuple[str, int], List[Write]] = {}
+        for write in batch:
+            groups.setdefault((write.kind, write.event_id), []).append(write)
+
+        outcomes = []
+        with self.session_factory() as db:
+            lock_for_write(db)
+            try:
+                for (kind, event_id), writes in groups.items():
+                    try:
+                        results = STAGERS[kind](db, event_id, [write.student_id for write in writes])
+                    except LookupError as e:
+                        # Raised before anything was staged for this event, so the others can go ahead
+                        outcomes.extend((write, None, LookupError(str(e))) for write in writes)
+                        continue
+                    outcomes.extend(
+                        (write, row, _error(kind, status)) for write, (status, row) in zip(writes, results)
+                    )
+                db.commit()
+            except Exception:
+                db.rollback()
+                raise
+
+        for write, row, error in outcomes:
+            if error is None:
+                write.future.set_result(row)
+            else:
+                write.future.set_exception(error)
+
+    def _commit_one_by_one(self, batch: List[Write]) -> None:
+        for write in batch:
+            try:
+                with self.session_factory() as db:
+                    if write.kind == REGISTRATION:
+                        row = crud.create_registration(
+                            db=db, event_id=write.event_id, registration=RegistrationCreate(student_id=write.student_id)
+                        )
+                    else:
+                        row = crud.create_attendance(
+                            db=db, event_id=write.event_id, attendance=AttendanceCreate(student_id=write.student_id)
+                        )
+            except Exception as e:
+                write.future.set_exception(e)
+            else:
+                write.future.set_result(row)
+
+
+def create_group_writer(config: Settings = settings) -> GroupCommitWriter:
+    """Build the writer configured by the GROUP_COMMIT settings"""
+    return GroupCommitWriter(
+        enabled=config.group_commit,
+        max_rows=config.group_commit_max_rows,
+        max_wait_ms=config.group_commit_max_wait_ms,
+        timeout=config.group_commit_timeout,
+    )
+
+
+group_writer = create_group_writer()
@@ -0,0 +1,246 @@
+"""
+Idempotency-Key support for the write endpoints
+
+A POST to /events or /students that carries an Idempotency-Key header is
+recorded in the idempotency_keys table before it runs. A retry with the
+same key gets the stored status, headers and body back, marked with
+Idempotent-Replayed: true, without the write being run again:
+
+  first use         the row is inserted as in progress, the request runs
+                    and its response is stored
+  retry after that  the stored response is replayed
+  retry meanwhile   409, the first request is still running
+  different request 422, the key was already used with another method,
+                    path or body
+
+The primary key makes the insert the lock, so concurrent retries cannot
+both run. The claim is a lease of IDEMPOTENCY_LEASE_SECONDS: if the worker
+running the request dies before storing its response, the first retry
+after the lease has lapsed takes the key over and runs the request. Server
+errors are not stored, so a retry after one runs the request again. Records expire after IDEMPOTENCY_TTL seconds and expired
+ones are deleted as new keys come in.
+"""
+
+import hashlib
+import json
+import time
+from datetime import datetime, timedelta
+from typing import Optional, Tuple
+
+from sqlalchemy import delete, update
+from sqlalchemy.engine import Engine
+from sqlalchemy.exc import IntegrityError
+from sqlmodel import Session
+from starlette.concurrency import run_in_threadpool
+from starlette.datastructures import Headers
+
+from app.config import settings
+from app.db import engine
+from app.models import IdempotencyRecord
+
+IDEMPOTENCY_KEY_HEADER = "Idempotency-Key"
+REPLAYED_HEADER = "Idempotent-Replayed"
+MAX_KEY_LENGTH = 255
+
+# Path prefixes of the routers whose POST routes honour the header
+IDEMPOTENT_PREFIXES = ("/events", "/students")
+
+# Outcomes of IdempotencyStore.begin
+NEW = "new"
+REPLAY = "replay"
+IN_PROGRESS = "in_progress"
+MISMATCH = "mismatch"
+
+# Response headers that describe this particular response rather than the result
+_UNSTORED_HEADERS = {b"set-cookie", b"server-timing", b"date"}
+
+
+def request_fingerprint(method: str, path: str, query: bytes, body: bytes) -> str:
+    digest = hashlib.sha256()
+    for part in (method.encode(), path.encode(), query, body):
+        digest.update(len(part).to_bytes(8, "big"))
+        digest.update(part)
+    return digest.hexdigest()
+
+
+class IdempotencyStore:
+    """Stored responses keyed by Idempotency-Key, in the idempotency_keys table"""
+
+    def __init__(self, engine: Engine, ttl: float = 24 * 3600, purge_interval: float = 60.0, lease: float = 60.0):
+        self.engine = engine
+        self.ttl = ttl
+        self.lease = lease
+        self.purge_interval = purge_interval
+        self._next_purge = 0.0
+
+    def purge_expired(self) -> int:
+        """Delete expired records, returning how many were removed"""
+        with Session(self.engine) as db:
+            result = db.execute(delete(IdempotencyRecord).where(IdempotencyRecord.expires_at < datetime.utcnow()))
+            db.commit()
+            return result.rowcount
+
+    def begin(self, key: str, fingerprint: str) -> Tuple[str, Optional[IdempotencyRecord]]:
+        """Claim key for a new request, or return why it cannot run and the record found"""
+        if time.monotonic() >= self._next_purge:
+            self._next_purge = time.monotonic() + self.purge_interval
+            self.purge_expired()
+
+        now = datetime.utcnow()
+        with Session(self.engine, expire_on_commit=False) as db:
+            try:
+                db.add(IdempotencyRecord(key=key, fingerprint=fingerprint, created_at=now,
+                                         locked_until=now + timedelta(seconds=self.lease),
+                                         expires_at=now + timedelta(seconds=self.ttl)))
+                db.commit()
+                return NEW, None
+            except IntegrityError:
+                db.rollback()
+
+            record = db.get(IdempotencyRecord, key)
+            if record is None or record.expires_at < now:
+                # Released or expired since the insert failed; the caller may try again
+                if record is not None:
+                    db.delete(record)
+                    db.commit()
+                return self.begin(key, fingerprint)
+            if record.fingerprint != fingerprint:
+                return MISMATCH, record
+            if record.status_code is None:
+                if record.locked_until is not None and record.locked_until < now and self._take_over(db, key, now):
+                    return NEW, None
+                return IN_PROGRESS, record
+            return REPLAY, record
+
+    def _take_over(self, db: Session, key: str, now: datetime) -> bool:
+        """Renew a lapsed claim; the conditional update lets only one of several retries win it"""
+        result = db.execute(
+            update(IdempotencyRecord)
+            .where(IdempotencyRecord.key == key, IdempotencyRecord.status_code.is_(None),
+                   IdempotencyRecord.locked_until < now)
+            .values(locked_until=now + timedelta(seconds=self.lease))
+        )
+        db.commit()
+        return result.rowcount == 1
+
+    def complete(self, key: str, status_code: int, headers: list, body: bytes) -> None:
+        """Store the response of the request that claimed key"""
+        with Session(self.engine) as db:
+            record = db.get(IdempotencyRecord, key)
+            if record is None:
+                return
+            record.status_code = status_code
+            record.locked_until = None
+            record.headers = json.dumps([[name.decode("latin-1"), value.decode("latin-1")] for name, value in headers])
+            record.body = body
+            db.add(record)
+            db.commit()
+
+    def release(self, key: str) -> None:
+        """Forget a claimed key, so that a retry runs the request again"""
+        with Session(self.engine) as db:
+            db.execute(delete(IdempotencyRecord).where(IdempotencyRecord.key == key))
+            db.commit()
+
+
+idempotency_store = IdempotencyStore(engine, ttl=settings.idempotency_ttl, lease=settings.idempotency_lease_seconds)
+
+
+async def read_body(receive) -> Optional[bytes]:
+    """Read a whole request body from the ASGI receive channel; None if the client went away"""
+    chunks = []
+    while True:
+        message = await receive()
+        if message["type"] == "http.disconnect":
+            return None
+        chunks.append(message.get("body", b""))
+        if not message.get("more_body"):
+            return b"".join(chunks)
+
+
+def replaying_receive(body: bytes, receive):
+    """A receive channel that hands the app a body that was already read, then defers to receive"""
+    body_sent = False
+
+    async def replay():
+        nonlocal body_sent
+        if body_sent:
+            return await receive()
+        body_sent = True
+        return {"type": "http.request", "body": body, "more_body": False}
+
+    return replay
+
+
+async def send_json(send, status: int, detail: str, headers: Optional[list] = None) -> None:
+    """Send a {"detail": ...} error response, like HTTPException does"""
+    body = json.dumps({"detail": detail}).encode()
+    await send({"type": "http.response.start", "status": status, "headers": [
+        (b"content-type", b"application/json"), (b"content-length", str(len(body)).encode()), *(headers or []),
+    ]})
+    await send({"type": "http.response.body", "body": body})
+
+
+class IdempotencyMiddleware:
+    """ASGI middleware replaying the stored response to POSTs retried with the same Idempotency-Key"""
+
+    def __init__(self, app, store: IdempotencyStore = idempotency_store, prefixes: Tuple[str, ...] = IDEMPOTENT_PREFIXES):
+        self.app = app
+        self.store = store
+        self.prefixes = prefixes
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http" or scope["method"] != "POST" or not scope["path"].startswith(self.prefixes):
+            await self.app(scope, receive, send)
+            return
+        key = Headers(scope=scope).get(IDEMPOTENCY_KEY_HEADER)
+        if key is None:
+            await self.app(scope, receive, send)
+            return
+        if not key or len(key) > MAX_KEY_LENGTH:
+            await send_json(send, 400, f"{IDEMPOTENCY_KEY_HEADER} must be 1 to {MAX_KEY_LENGTH} characters")
+            return
+
+        # The body is part of the fingerprint, so read it all and hand it on to the app afterwards
+        body = await read_body(receive)
+        if body is None:
+            return
+        fingerprint = request_fingerprint(scope["method"], scope["path"], scope.get("query_string", b""), body)
+
+        outcome, record = await run_in_threadpool(self.store.begin, key, fingerprint)
+        if outcome == MISMATCH:
+            await send_json(send, 422, f"{IDEMPOTENCY_KEY_HEADER} was already used with a different request")
+            return
+        if outcome == IN_PROGRESS:
+            await send_json(send, 409, f"A request with this {IDEMPOTENCY_KEY_HEADER} is still being processed")
+            return
+        if outcome == REPLAY:
+            headers = [(name.encode("latin-1"), value.encode("latin-1")) for name, value in json.loads(record.headers)]
+            headers.append((REPLAYED_HEADER.lower().encode(), b"true"))
+            await send({"type": "http.response.start", "status": record.status_code, "headers": headers})
+            await send({"type": "http.response.body", "body": record.body})
+            return
+
+        response = {"status": 500, "headers": [], "body": []}
+
+        async def capture(message):
+            if message["type"] == "http.response.start":
+                response["status"] = message["status"]
+                response["headers"] = [
+                    (name, value) for name, value in message.get("headers", []) if name.lower() not in _UNSTORED_HEADERS
+                ]
+            elif message["type"] == "http.response.body":
+                response["body"].append(message.get("body", b""))
+            await send(message)
+
+        try:
+            await self.app(scope, replaying_receive(body, receive), capture)
+        except BaseException:
+            await run_in_threadpool(self.store.release, key)
+            raise
+        if response["status"] >= 500:
+            await run_in_threadpool(self.store.release, key)
+        else:
+            await run_in_threadpool(
+                self.store.complete, key, response["status"], response["headers"], b"".join(response["body"])
+            )
@@ -0,0 +1,376 @@
+"""
+Background jobs for report generation and heavy exports
+
+Submitted jobs run on a bounded thread pool, so at most JOB_WORKERS heavy
+queries run at once and never on the request threads that registrations
+need. A job's state lives in a JobStore: in memory by default, or with
+JOB_STORE=sqlite in a separate SQLite file, where jobs that were queued or
+running when the process stopped are picked up again on the next start.
+Results are written as files under JOB_RESULT_DIR.
+
+A report job with the same parameters as one submitted less than
+JOB_FRESH_SECONDS ago is not run again; the earlier job is returned.
+Finished jobs and their result files are deleted JOB_TTL_SECONDS after
+they finish.
+"""
+
+import json
+import os
+import sqlite3
+import threading
+import time
+import uuid
+from contextlib import contextmanager, suppress
+from concurrent.futures import Future, ThreadPoolExecutor, wait
+from dataclasses import asdict, dataclass, field, fields
+from datetime import datetime, timedelta
+from typing import Callable, Dict, Iterator, List, Optional, Tuple
+
+from pydantic import BaseModel, TypeAdapter
+from sqlmodel import Session
+
+from app import crud
+from app.config import Settings, settings
+from app.db import engine, read_replicas
+from app.export import FORMATS, export_filename, stream_export, validate_export
+from app.schemas import (
+    EventPopularityReport, StudentParticipationReport, TopActiveStudentsReport, TrendReport,
+    ReportJobCreate, ExportJobCreate
+)
+
+QUEUED = "queued"
+RUNNING = "running"
+DONE = "done"
+FAILED = "failed"
+
+REPORT_JOB = "report"
+EXPORT_JOB = "export"
+
+
+@dataclass
+class Job:
+    """A submitted job and, once it is done, where its result is"""
+    kind: str
+    params: dict
+    key: str
+    id: str = field(default_factory=lambda: uuid.uuid4().hex)
+    status: str = QUEUED
+    created_at: datetime = field(default_factory=datetime.utcnow)
+    started_at: Optional[datetime] = None
+    finished_at: Optional[datetime] = None
+    error: Optional[str] = None
+    result_path: Optional[str] = None
+    media_type: Optional[str] = None
+    filename: Optional[str] = None
+
+
+def job_key(kind: str, params: BaseModel) -> str:
+    """Identify jobs that would produce the same result"""
+    return kind + ":" + json.dumps(params.model_dump(mode="json"), sort_keys=True, separators=(",", ":"))
+
+
+class MemoryJobStore:
+    """Jobs kept in this process only"""
+
+    def __init__(self):
+        self._jobs: Dict[str, Job] = {}
+        self._lock = threading.Lock()
+
+    def save(self, job: Job) -> None:
+        with self._lock:
+            self._jobs[job.id] = Job(**asdict(job))
+
+    def get(self, job_id: str) -> Optional[Job]:
+        with self._lock:
+            job = self._jobs.get(job_id)
+            return Job(**asdict(job)) if job else None
+
+    def find_recent(self, key: str, since: datetime) -> Optional[Job]:
+        """The newest job with this key created at or after since that has not failed"""
+        with self._lock:
+            matches = [job for job in self._jobs.values()
+                       if job.key == key and job.created_at >= since and job.status != FAILED]
+            job = max(matches, key=lambda job: job.created_at, default=None)
+            return Job(**asdict(job)) if job else None
+
+    def unfinished(self) -> List[Job]:
+        with self._lock:
+            return [Job(**asdict(job)) for job in self._jobs.values() if job.status in (QUEUED, RUNNING)]
+
+    def finished_before(self, cutoff: datetime) -> List[Job]:
+        with self._lock:
+            return [Job(**asdict(job)) for job in self._jobs.values()
+                    if job.finished_at is not None and job.finished_at < cutoff]
+
+    def delete(self, job_id: str) -> None:
+        with self._lock:
+            self._jobs.pop(job_id, None)
+
+
+class SQLiteJobStore:
+    """Jobs kept in a SQLite file, so they survive a restart"""
+
+    COLUMNS = [f.name for f in fields(Job)]
+    TIMESTAMPS = ("created_at", "started_at", "finished_at")
+
+    def __init__(self, path: str):
+        self.path = path
+        self._lock = threading.Lock()
+        with self._connect() as connection:
+            connection.execute(
+                "CREATE TABLE IF NOT EXISTS jobs (id TEXT PRIMARY KEY, kind TEXT NOT NULL, params TEXT NOT NULL, "
+                "key TEXT NOT NULL, status TEXT NOT NULL, created_at TEXT NOT NULL, started_at TEXT, "
+                "finished_at TEXT, error TEXT, result_path TEXT, media_type TEXT, filename TEXT)"
+            )
+            connection.execute("CREATE INDEX IF NOT EXISTS ix_jobs_key_created ON jobs (key, created_at)")
+            connection.execute("CREATE INDEX IF NOT EXISTS ix_jobs_status ON jobs (status)")
+            connection.execute("CREATE INDEX IF NOT EXISTS ix_jobs_finished ON jobs (finished_at)")
+
+    @contextmanager
+    def _connect(self) -> Iterator[sqlite3.Connection]:
+        """A connection that commits on success and is closed afterwards"""
+        connection = sqlite3.connect(self.path, timeout=30)
+        try:
+            with connection:
+                yield connection
+        finally:
+            connection.close()
+
+    def _row(self, job: Job) -> list:
+        values = asdict(job)
+        values["params"] = json.dumps(values["params"])
+        for name in self.TIMESTAMPS:
+            values[name] = values[name].isoformat() if values[name] else None
+        return [values[name] for name in self.COLUMNS]
+
+    def _job(self, row) -> Job:
+        values = dict(zip(self.COLUMNS, row))
+        values["params"] = json.loads(values["params"])
+        for name in self.TIMESTAMPS:
+            values[name] = datetime.fromisoformat(values[name]) if values[name] else None
+        return Job(**values)
+
+    def _select(self, where: str, parameters: tuple) -> List[Job]:
+        with self._lock, self._connect() as connection:
+            rows = connection.execute(f"SELECT {', '.join(self.COLUMNS)} FROM jobs WHERE {where}", parameters)
+            return [self._job(row) for row in rows.fetchall()]
+
+    def save(self, job: Job) -> None:
+        placeholders = ", ".join("?" for _ in self.COLUMNS)
+        with self._lock, self._connect() as connection:
+            connection.execute(
+                f"INSERT OR REPLACE INTO jobs ({', '.join(self.COLUMNS)}) VALUES ({placeholders})", self._row(job)
+            )
+
+    def get(self, job_id: str) -> Optional[Job]:
+        jobs = self._select("id = ?", (job_id,))
+        return jobs[0] if jobs else None
+
+    def find_recent(self, key: str, since: datetime) -> Optional[Job]:
+        """The newest job with this key created at or after since that has not failed"""
+        jobs = self._select(
+            "key = ? AND created_at >= ? AND status != ? ORDER BY created_at DESC LIMIT 1",
+            (key, since.isoformat(), FAILED),
+        )
+        return jobs[0] if jobs else None
+
+    def unfinished(self) -> List[Job]:
+        return self._select("status IN (?, ?) ORDER BY created_at", (QUEUED, RUNNING))
+
+    def finished_before(self, cutoff: datetime) -> List[Job]:
+        return self._select("finished_at < ?", (cutoff.isoformat(),))
+
+    def delete(self, job_id: str) -> None:
+        with self._lock, self._connect() as connection:
+            connection.execute("DELETE FROM jobs WHERE id = ?", (job_id,))
+
+
+# Report name -> (function reading the rows, response type)
+REPORTS: Dict[str, Tuple[Callable[[Session, ReportJobCreate], list], type]] = {
+    "event-popularity": (
+        lambda db, params: crud.get_event_popularity_report(db=db, limit=params.limit),
+        List[EventPopularityReport],
+    ),
+    "student-participation": (
+        lambda db, params: crud.get_student_participation_report(db=db, limit=params.limit),
+        List[StudentParticipationReport],
+    ),
+    "top-active-students": (
+        lambda db, params: crud.get_top_active_students(db=db, limit=params.limit or 10),
+        List[TopActiveStudentsReport],
+    ),
+    "trends": (
+        lambda db, params: crud.get_trend_report(
+            db=db, granularity=params.granularity, since=params.since, until=params.until,
+            event_type=params.event_type, college_id=params.college_id, by=tuple(params.by)
+        ),
+        List[TrendReport],
+    ),
+}
+
+
+def _run_report(db: Session, params: dict, path: str) -> Tuple[str, str]:
+    params = ReportJobCreate(**params)
+    read, response_type = REPORTS[params.report]
+    adapter = TypeAdapter(response_type)
+    with open(path, "wb") as out:
+        out.write(adapter.dump_json(adapter.validate_python(read(db, params))))
+    return "application/json", f"{params.report}.json"
+
+
+def _run_export(db: Session, params: dict, path: str) -> Tuple[str, str]:
+    params = ExportJobCreate(**params)
+    file_format, chunks = stream_export(db, params.table, params.format, params.since, params.until)
+    with open(path, "wb") as out:
+        for chunk in chunks:
+            out.write(chunk)
+    return FORMATS[file_format][1], export_filename(params.table, file_format)
+
+
+RUNNERS = {REPORT_JOB: _run_report, EXPORT_JOB: _run_export}
+
+
+def _read_session() -> Session:
+    return Session(read_replicas.choose() or engine)
+
+
+class JobQueue:
+    """Runs jobs on a bounded thread pool and records their progress in a store"""
+
+    def __init__(
+        self,
+        store,
+        result_dir: str,
+        workers: int = 2,
+        fresh_seconds: float = 300.0,
+        ttl: float = 24 * 3600,
+        purge_interval: float = 60.0,
+        session_factory: Callable[[], Session] = _read_session,
+    ):
+        self.store = store
+        self.result_dir = result_dir
+        self.workers = workers
+        self.fresh_seconds = fresh_seconds
+        self.ttl = ttl
+        self.purge_interval = purge_interval
+        self.session_factory = session_factory
+        self._next_purge = 0.0
+        self._executor: Optional[ThreadPoolExecutor] = None
+        self._futures: Dict[str, Future] = {}
+        self._lock = threading.Lock()
+
+    def start(self) -> None:
+        """Start the workers, requeue the jobs a previous process left unfinished and purge expired ones"""
+        with self._lock:
+            if self._executor is not None:
+                return
+            self._executor = ThreadPoolExecutor(max_workers=self.workers, thread_name_prefix="job")
+        for job in self.store.unfinished():
+            job.status = QUEUED
+            job.started_at = None
+            self.store.save(job)
+            self._schedule(job)
+        self.purge_expired()
+
+    def purge_expired(self) -> int:
+        """Delete the jobs that finished more than ttl seconds ago and their result files, returning how many"""
+        self._next_purge = time.monotonic() + self.purge_interval
+        expired = self.store.finished_before(datetime.utcnow() - timedelta(seconds=self.ttl))
+        for job in expired:
+            if job.result_path:
+                with suppress(FileNotFoundError):
+                    os.remove(job.result_path)
+            self.store.delete(job.id)
+        return len(expired)
+
+    def shutdown(self, wait: bool = True) -> None:
+        """Stop the workers; jobs that have not started stay queued for the next start"""
+        with self._lock:
+            executor, self._executor = self._executor, None
+        if executor is not None:
+            executor.shutdown(wait=wait, cancel_futures=True)
+
+    def _schedule(self, job: Job) -> None:
+        future = self._executor.submit(self._run, job.id)
+        with self._lock:
+            self._futures[job.id] = future
+        future.add_done_callback(lambda _: self._futures.pop(job.id, None))
+
+    def submit_report(self, params: ReportJobCreate) -> Tuple[Job, bool]:
+        """Queue a report job, or return a recent one with the same parameters; the flag is True when reused"""
+        if params.since is not None and params.until is not None and params.since >= params.until:
+            raise ValueError("since must be earlier than until")
+        key = job_key(REPORT_JOB, params)
+        since = datetime.utcnow() - timedelta(seconds=self.fresh_seconds)
+        recent = self.store.find_recent(key, since)
+        if recent and (recent.status != DONE or os.path.exists(recent.result_path)):
+            return recent, True
+        return self._submit(REPORT_JOB, params, key), False
+
+    def submit_export(self, params: ExportJobCreate) -> Job:
+        """
+        Queue an export job.
+
+        Raises LookupError for an unknown table and ValueError for bad
+        parameters, so they are rejected before the job is queued.
+        """
+        params = params.model_copy(update={"format": validate_export(
+            params.table, params.format, params.since, params.until
+        )})
+        return self._submit(EXPORT_JOB, params, job_key(EXPORT_JOB, params))
+
+    def _submit(self, kind: str, params: BaseModel, key: str) -> Job:
+        self.start()
+        if time.monotonic() >= self._next_purge:
+            self.purge_expired()
+        job = Job(kind=kind, params=params.model_dump(mode="json"), key=key)
+        self.store.save(job)
+        self._schedule(job)
+        return job
+
+    def get(self, job_id: str) -> Optional[Job]:
+        return self.store.get(job_id)
+
+    def wait(self, job_id: str, timeout: Optional[float] = None) -> Optional[Job]:
+        """Block until the job has finished or the timeout passes, then return its state"""
+        future = self._futures.get(job_id)
+        if future is not None:
+            wait([future], timeout=timeout)
+        return self.get(job_id)
+
+    def _run(self, job_id: str) -> None:
+        job = self.store.get(job_id)
+        job.status = RUNNING
+        job.started_at = datetime.utcnow()
+        self.store.save(job)
+
+        path = os.path.join(self.result_dir, job.id)
+        try:
+            os.makedirs(self.result_dir, exist_ok=True)
+            with self.session_factory() as db:
+                job.media_type, job.filename = RUNNERS[job.kind](db, job.params, path)
+        except Exception as e:
+            job.status = FAILED
+            job.error = str(e) or type(e).__name__
+            if os.path.exists(path):
+                os.remove(path)
+        else:
+            job.status = DONE
+            job.result_path = path
+        job.finished_at = datetime.utcnow()
+        self.store.save(job)
+
+
+def create_job_queue(config: Settings = settings) -> JobQueue:
+    """Build the job queue selected by JOB_STORE"""
+    if config.job_store == "memory":
+        store = MemoryJobStore()
+    elif config.job_store == "sqlite":
+        store = SQLiteJobStore(config.job_store_path)
+    else:
+        raise ValueError(f"Unknown job store: {config.job_store}")
+    return JobQueue(store, config.job_result_dir, workers=config.job_workers,
+                    fresh_seconds=config.job_fresh_seconds, ttl=config.job_ttl_seconds)
+
+
+job_queue = create_job_queue()
@@ -7,15 +7,30 @@ from fastapi.middleware.cors import CORSMiddleware
 from contextlib import asynccontextmanager
 import os
 
-from app.db import init_db
-from app.routers import events, registrations, reports, students
+from app.config import settings
+from app.db import async_engine, init_db
+from app.jobs import job_queue
+from app.group_commit import group_writer
+from app.cache import ETAG_HEADER
+from app.idempotency import REPLAYED_HEADER, IdempotencyMiddleware
+from app.metrics import SERVER_TIMING_HEADER, MetricsMiddleware
+from app.ratelimit import RETRY_AFTER_HEADER, AdmissionMiddleware, RateLimitMiddleware
+from app import metrics
+from app.pagination import NEXT_CURSOR_HEADER
+from app.routers import events, exports, jobs, registrations, reports, students
+from app.routers import async_events, async_registrations, async_reports
 
 
 @asynccontextmanager
 async def lifespan(app: FastAPI):
-    """Initialize database on startup"""
+    """Initialize database and start the job workers on startup"""
     await init_db()
+    job_queue.start()
     yield
+    job_queue.shutdown(wait=False)
+    group_writer.shutdown()
+    if async_engine is not None:
+        await async_engine.dispose()
 
 
 app = FastAPI(
@@ -25,6 +40,11 @@ app = FastAPI(
     lifespan=lifespan
 )
 
+# Innermost, so retries are answered before any route runs and CORS still applies to replays
+app.add_middleware(IdempotencyMiddleware)
+# Rate limits are checked first, so requests over their limit never take an admission slot
+app.add_middleware(AdmissionMiddleware)
+app.add_middleware(RateLimitMiddleware)
 # Configure CORS for frontend integration
 app.add_middleware(
     CORSMiddleware,
@@ -32,13 +52,26 @@ app.add_middleware(
     allow_credentials=True,
     allow_methods=["*"],
     allow_headers=["*"],
+    expose_headers=[NEXT_CURSOR_HEADER, ETAG_HEADER, SERVER_TIMING_HEADER, REPLAYED_HEADER, RETRY_AFTER_HEADER],
 )
+# Added last so it wraps every other layer and times the whole request
+app.add_middleware(MetricsMiddleware)
 
 # Include routers
+if settings.async_db:
+    # Async handlers are registered first so they take over the hot endpoints;
+    # everything they do not cover falls through to the sync routers below
+    app.include_router(async_events.router, prefix="/events", tags=["events"])
+    app.include_router(async_registrations.router, prefix="/events", tags=["registrations"])
+    app.include_router(async_reports.router, prefix="/reports", tags=["reports"])
+
 app.include_router(events.router, prefix="/events", tags=["events"])
 app.include_router(registrations.router, prefix="/events", tags=["registrations"])
 app.include_router(reports.router, prefix="/reports", tags=["reports"])
 app.include_router(students.router, prefix="/students", tags=["students"])
+app.include_router(exports.router, prefix="/exports", tags=["exports"])
+app.include_router(jobs.router, prefix="/jobs", tags=["jobs"])
+app.include_router(metrics.router)
 
 
 @app.get("/")
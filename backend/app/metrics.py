@@ -0,0 +1,179 @@
+"""
+Per-request database and latency instrumentation
+
+The engine hooks in app.db count every statement and its time into the
+stats of the current request, found through a context variable that
+Starlette copies into the worker thread of sync handlers. MetricsMiddleware
+reports the totals in a Server-Timing header and records them per route
+template in histograms that /metrics exposes in the Prometheus text format.
+Statements slower than SLOW_QUERY_MS are logged with their parameters.
+"""
+
+import logging
+import threading
+import time
+from contextvars import ContextVar
+from dataclasses import dataclass
+from typing import Dict, Optional, Sequence, Tuple
+
+from fastapi import APIRouter
+from fastapi.responses import PlainTextResponse
+
+from app.config import settings
+
+logger = logging.getLogger("app.slow_queries")
+
+SERVER_TIMING_HEADER = "Server-Timing"
+PROMETHEUS_MEDIA_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+
+LATENCY_BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+STATEMENT_BUCKETS = (0, 1, 2, 3, 5, 10, 20, 50, 100, 250, 1000)
+# Requests that matched no route share one label so bad URLs cannot grow the label set
+UNMATCHED_ROUTE = "<unmatched>"
+
+
+@dataclass
+class RequestStats:
+    """Database work done on behalf of one request"""
+    statements: int = 0
+    db_seconds: float = 0.0
+
+
+_current_request: ContextVar[Optional[RequestStats]] = ContextVar("current_request", default=None)
+
+
+def record_statement(seconds: float, statement: str, parameters) -> None:
+    """Add one executed statement to the current request and log it if it was slow"""
+    stats = _current_request.get()
+    if stats is not None:
+        stats.statements += 1
+        stats.db_seconds += seconds
+    if settings.slow_query_ms and seconds * 1000 >= settings.slow_query_ms:
+        logger.warning("Slow query (%.1f ms): %s; parameters=%r", seconds * 1000, statement, parameters)
+
+
+class Histogram:
+    """Cumulative histogram per label set, in the Prometheus data model"""
+
+    def __init__(self, name: str, help_text: str, buckets: Sequence[float]):
+        self.name = name
+        self.help_text = help_text
+        self.buckets = tuple(buckets)
+        self._series: Dict[Tuple[Tuple[str, str], ...], list] = {}
+        self._lock = threading.Lock()
+
+    def observe(self, value: float, **labels: str) -> None:
+        key = tuple(sorted(labels.items()))
+        with self._lock:
+            series = self._series.get(key)
+            if series is None:
+                # One counter per bucket, then the sum and the count
+                series = self._series[key] = [0] * len(self.buckets) + [0.0, 0]
+            for i, bound in enumerate(self.buckets):
+                if value <= bound:
+                    series[i] += 1
+            series[-2] += value
+            series[-1] += 1
+
+    def render(self) -> str:
+        lines = [f"# HELP {self.name} {self.help_text}", f"# TYPE {self.name} histogram"]
+        with self._lock:
+            for key, series in sorted(self._series.items()):
+                for bound, count in zip(self.buckets, series):
+                    lines.append(f"{self.name}_bucket{_labels(key, le=_number(bound))} {count}")
+                lines.append(f"{self.name}_bucket{_labels(key, le='+Inf')} {series[-1]}")
+                lines.append(f"{self.name}_sum{_labels(key)} {_number(series[-2])}")
+                lines.append(f"{self.name}_count{_labels(key)} {series[-1]}")
+        return "\n".join(lines)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._series.clear()
+
+
+def _number(value: float) -> str:
+    return repr(float(value)) if isinstance(value, float) else str(value)
+
+
+def _labels(key: Tuple[Tuple[str, str], ...], **extra: str) -> str:
+    pairs = list(key) + list(extra.items())
+    escape = lambda value: value.replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+    return "{" + ",".join(f'{name}="{escape(value)}"' for name, value in pairs) + "}"
+
+
+REQUEST_DURATION = Histogram(
+    "http_request_duration_seconds", "Time from receiving a request to sending the last body chunk", LATENCY_BUCKETS
+)
+REQUEST_DB_TIME = Histogram(
+    "http_request_db_seconds", "Time spent executing SQL statements per request", LATENCY_BUCKETS
+)
+REQUEST_STATEMENTS = Histogram(
+    "http_request_db_statements", "Number of SQL statements executed per request", STATEMENT_BUCKETS
+)
+HISTOGRAMS = (REQUEST_DURATION, REQUEST_DB_TIME, REQUEST_STATEMENTS)
+
+
+def server_timing(stats: RequestStats, total_seconds: float) -> str:
+    return (
+        f'db;desc="{stats.statements} statements";dur={stats.db_seconds * 1000:.2f}, '
+        f"total;dur={total_seconds * 1000:.2f}"
+    )
+
+
+class MetricsMiddleware:
+    """
+    ASGI middleware recording statement count, DB time and latency per route.
+
+    The Server-Timing header is written when the response starts, so for
+    streamed responses it covers the work done before the first chunk; the
+    histograms are updated once the whole body has been sent.
+    """
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        stats = RequestStats()
+        token = _current_request.set(stats)
+        started = time.perf_counter()
+        status = 500
+
+        async def send_with_timing(message):
+            nonlocal status
+            if message["type"] == "http.response.start":
+                status = message["status"]
+                headers = list(message.get("headers", []))
+                headers.append((
+                    SERVER_TIMING_HEADER.lower().encode(),
+                    server_timing(stats, time.perf_counter() - started).encode(),
+                ))
+                message = {**message, "headers": headers}
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_with_timing)
+        finally:
+            _current_request.reset(token)
+            route = scope.get("route")
+            labels = {
+                "method": scope["method"],
+                "route": getattr(route, "path", UNMATCHED_ROUTE),
+                "status": str(status),
+            }
+            REQUEST_DURATION.observe(time.perf_counter() - started, **labels)
+            REQUEST_DB_TIME.observe(stats.db_seconds, **labels)
+            REQUEST_STATEMENTS.observe(stats.statements, **labels)
+
+
+router = APIRouter()
+
+
+@router.get("/metrics", response_class=PlainTextResponse, include_in_schema=False)
+def get_metrics():
+    """Prometheus scrape endpoint"""
+    body = "\n\n".join(histogram.render() for histogram in HISTOGRAMS) + "\n"
+    return PlainTextResponse(body, media_type=PROMETHEUS_MEDIA_TYPE)
@@ -2,10 +2,13 @@
 Database models for the Campus Event Management System
 """
 
-from datetime import datetime
+from datetime import date, datetime
 from typing import Optional, List
+from sqlalchemy import Index, UniqueConstraint, event, text
 from sqlmodel import SQLModel, Field, Relationship
 
+from app.search import install_search_index
+
 
 class College(SQLModel, table=True):
     """College/University model"""
@@ -42,6 +45,13 @@ class Student(SQLModel, table=True):
 class Event(SQLModel, table=True):
     """Event model"""
     __tablename__ = "events"
+    __table_args__ = (
+        # The listing orders by (date, id); with an equality filter on college or type in front,
+        # "upcoming at my college" is a range scan of one index instead of a sort
+        Index("ix_events_date", "date", "id"),
+        Index("ix_events_college_date", "college_id", "date", "id"),
+        Index("ix_events_type_date", "event_type", "date", "id"),
+    )
     
     id: Optional[int] = Field(default=None, primary_key=True)
     title: str = Field(max_length=200)
@@ -63,6 +73,11 @@ class Event(SQLModel, table=True):
 class Registration(SQLModel, table=True):
     """Event registration model"""
     __tablename__ = "registrations"
+    __table_args__ = (
+        # A unique index rather than a constraint, so it can be added to an existing table
+        Index("uq_registrations_event_student", "event_id", "student_id", unique=True),
+        Index("ix_registrations_student_event", "student_id", "event_id"),
+    )
     
     id: Optional[int] = Field(default=None, primary_key=True)
     event_id: int = Field(foreign_key="events.id")
@@ -77,6 +92,10 @@ class Registration(SQLModel, table=True):
 class Attendance(SQLModel, table=True):
     """Event attendance model"""
     __tablename__ = "attendance"
+    __table_args__ = (
+        Index("uq_attendance_event_student", "event_id", "student_id", unique=True),
+        Index("ix_attendance_student_event", "student_id", "event_id"),
+    )
     
     id: Optional[int] = Field(default=None, primary_key=True)
     event_id: int = Field(foreign_key="events.id")
@@ -91,6 +110,11 @@ class Attendance(SQLModel, table=True):
 class Feedback(SQLModel, table=True):
     """Event feedback model"""
     __tablename__ = "feedback"
+    __table_args__ = (
+        # Cover the per-event and per-student rating aggregates in the reports
+        Index("ix_feedback_event_rating", "event_id", "rating"),
+        Index("ix_feedback_student_rating", "student_id", "rating"),
+    )
     
     id: Optional[int] = Field(default=None, primary_key=True)
     event_id: int = Field(foreign_key="events.id")
@@ -102,3 +126,80 @@ class Feedback(SQLModel, table=True):
     # Relationships
     event: Event = Relationship(back_populates="feedback")
     student: Student = Relationship(back_populates="feedback")
+
+
+class WaitlistEntry(SQLModel, table=True):
+    """Waitlist entry for a student who tried to register for a full event"""
+    __tablename__ = "waitlist"
+    __table_args__ = (
+        UniqueConstraint("event_id", "student_id", name="uq_waitlist_event_student"),
+    )
+    
+    id: Optional[int] = Field(default=None, primary_key=True)
+    event_id: int = Field(foreign_key="events.id")
+    student_id: int = Field(foreign_key="students.id")
+    joined_at: datetime = Field(default_factory=datetime.utcnow)
+
+
+class EventStats(SQLModel, table=True):
+    """Running registration, attendance and rating totals per event, kept current by the crud write path"""
+    __tablename__ = "event_stats"
+    __table_args__ = (
+        # Serves the popularity report's (registration_count desc, event_id) order and keyset seeks
+        Index("ix_event_stats_registrations", text("registration_count DESC"), "event_id"),
+    )
+    
+    event_id: int = Field(foreign_key="events.id", primary_key=True)
+    registration_count: int = Field(default=0)
+    attendance_count: int = Field(default=0)
+    rating_sum: int = Field(default=0)
+    rating_count: int = Field(default=0)
+
+
+class StudentStats(SQLModel, table=True):
+    """Running registration, attendance and rating totals per student, kept current by the crud write path"""
+    __tablename__ = "student_stats"
+    __table_args__ = (
+        # Serves the participation reports' (attendance_count desc, student_id) order and keyset seeks
+        Index("ix_student_stats_attendance", text("attendance_count DESC"), "student_id"),
+    )
+    
+    student_id: int = Field(foreign_key="students.id", primary_key=True)
+    registration_count: int = Field(default=0)
+    attendance_count: int = Field(default=0)
+    rating_sum: int = Field(default=0)
+    rating_count: int = Field(default=0)
+
+
+class TrendStats(SQLModel, table=True):
+    """Registration, attendance and rating totals per time bucket, event type and college"""
+    __tablename__ = "trend_stats"
+    
+    # The key order serves the trend reports' scan of one granularity over a period range
+    granularity: str = Field(primary_key=True, max_length=5)  # day, week or month
+    period: date = Field(primary_key=True)  # first day of the bucket; weeks start on Monday
+    event_type: str = Field(primary_key=True, max_length=100)
+    college_id: int = Field(default=0, primary_key=True)  # 0 for events without a college
+    registration_count: int = Field(default=0)
+    attendance_count: int = Field(default=0)
+    rating_sum: int = Field(default=0)
+    rating_count: int = Field(default=0)
+
+
+class IdempotencyRecord(SQLModel, table=True):
+    """The stored response to a write request sent with an Idempotency-Key header"""
+    __tablename__ = "idempotency_keys"
+    
+    key: str = Field(primary_key=True, max_length=255)
+    fingerprint: str = Field(max_length=64)  # hash of the method, path and body the key was first used with
+    status_code: Optional[int] = Field(default=None)  # None while the first request is still running
+    # While running, the claim lapses at this time, so a retry can take over from a worker that died
+    locked_until: Optional[datetime] = Field(default=None)
+    headers: Optional[str] = Field(default=None)  # JSON list of [name, value] pairs
+    body: Optional[bytes] = Field(default=None)
+    created_at: datetime = Field(default_factory=datetime.utcnow)
+    expires_at: datetime = Field(index=True)
+
+
+# Every create_all also installs the events full-text index and its triggers
+event.listen(SQLModel.metadata, "after_create", install_search_index)
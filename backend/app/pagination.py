@@ -0,0 +1,40 @@
+"""
+Keyset pagination cursors and NDJSON streaming helpers
+"""
+
+import base64
+import json
+from typing import AsyncIterable, Callable, Iterable, Tuple, Union
+
+from fastapi.responses import StreamingResponse
+from pydantic import BaseModel
+
+NEXT_CURSOR_HEADER = "X-Next-Cursor"
+NDJSON_MEDIA_TYPE = "application/x-ndjson"
+
+
+def encode_cursor(*values) -> str:
+    """Encode the sort key of the last row of a page as an opaque cursor"""
+    payload = json.dumps(list(values), separators=(",", ":"), default=str)
+    return base64.urlsafe_b64encode(payload.encode()).decode().rstrip("=")
+
+
+def decode_cursor(cursor: str, *types: Callable) -> Tuple:
+    """Decode a cursor produced by encode_cursor, converting each value with the matching type"""
+    try:
+        padded = cursor + "=" * (-len(cursor) % 4)
+        values = json.loads(base64.urlsafe_b64decode(padded.encode()))
+        if not isinstance(values, list) or len(values) != len(types):
+            raise ValueError
+        return tuple(convert(value) for convert, value in zip(types, values))
+    except Exception as e:
+        raise ValueError("Invalid cursor") from e
+
+
+def ndjson_response(items: Union[Iterable[BaseModel], AsyncIterable[BaseModel]]) -> StreamingResponse:
+    """Stream models as newline-delimited JSON without building the full list"""
+    if hasattr(items, "__aiter__"):
+        lines = (item.model_dump_json() + "\n" async for item in items)
+    else:
+        lines = (item.model_dump_json() + "\n" for item in items)
+    return StreamingResponse(lines, media_type=NDJSON_MEDIA_TYPE)
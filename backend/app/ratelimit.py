@@ -0,0 +1,262 @@
+"""
+Rate limiting and admission control for the write endpoints
+
+RateLimitMiddleware keeps a token bucket per route and client (or per
+route and student, read from the student_id of the JSON body) for the
+routes configured in RATE_LIMITS. A request that finds its bucket empty
+gets 429 with a Retry-After of the seconds until the next token. Buckets
+live in this process, or with RATE_LIMIT_BACKEND=redis in a Redis server
+shared by every worker.
+
+AdmissionMiddleware caps the write requests (anything but GET, HEAD and
+OPTIONS) running at once at MAX_IN_FLIGHT_WRITES. Up to WRITE_QUEUE_SIZE
+more wait at most WRITE_QUEUE_TIMEOUT seconds for a slot; everything
+beyond that is shed with 429 straight away, so a spike costs the database
+a bounded amount of work and clients a bounded wait.
+"""
+
+import asyncio
+import json
+import math
+import threading
+import time
+from collections import OrderedDict
+from dataclasses import dataclass
+from typing import List, Optional, Pattern, Tuple
+
+from starlette.concurrency import run_in_threadpool
+from starlette.routing import compile_path
+
+from app.config import Settings, settings
+from app.idempotency import read_body, replaying_receive, send_json
+
+RETRY_AFTER_HEADER = "Retry-After"
+READ_METHODS = ("GET", "HEAD", "OPTIONS")
+KEY_KINDS = ("client", "student")
+
+
+@dataclass(frozen=True)
+class RateLimit:
+    """A token bucket refilled with rate tokens per second up to burst, one bucket per key"""
+    rate: float
+    burst: int
+    key: str = "client"
+
+
+@dataclass(frozen=True)
+class RateLimitRule:
+    method: str
+    path: str  # route template, e.g. /events/{event_id}/register
+    pattern: Pattern
+    limit: RateLimit
+
+
+def parse_rate_limits(raw: str) -> List[RateLimitRule]:
+    """Parse RATE_LIMITS, a JSON object of "METHOD /route/{template}" -> {"rate", "burst", "key"}"""
+    if not raw.strip():
+        return []
+    rules = []
+    for route, options in json.loads(raw).items():
+        method, _, path = route.partition(" ")
+        limit = RateLimit(float(options["rate"]), int(options["burst"]), options.get("key", "client"))
+        if limit.rate <= 0 or limit.burst < 1:
+            raise ValueError(f"Rate limit for {route} needs a positive rate and a burst of at least 1")
+        if limit.key not in KEY_KINDS:
+            raise ValueError(f"Rate limit key for {route} must be one of {', '.join(KEY_KINDS)}")
+        rules.append(RateLimitRule(method.upper(), path, compile_path(path)[0], limit))
+    return rules
+
+
+class MemoryBuckets:
+    """Token buckets in this process"""
+
+    blocking = False
+
+    def __init__(self, max_keys: int = 100000):
+        self.max_keys = max_keys
+        self._buckets: "OrderedDict[str, Tuple[float, float]]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def take(self, key: str, limit: RateLimit) -> float:
+        """Take a token, returning 0 or, when the bucket is empty, the seconds until it has one"""
+        now = time.monotonic()
+        with self._lock:
+            tokens, updated = self._buckets.get(key, (limit.burst, now))
+            tokens = min(limit.burst, tokens + (now - updated) * limit.rate)
+            wait = 0.0
+            if tokens >= 1:
+                tokens -= 1
+            else:
+                wait = (1 - tokens) / limit.rate
+            self._buckets[key] = (tokens, now)
+            self._buckets.move_to_end(key)
+            if len(self._buckets) > self.max_keys:
+                self._forget_oldest()
+            return wait
+
+    def _forget_oldest(self) -> None:
+        # Buckets are kept in order of last use; those untouched the longest are the likeliest to be full again
+        for _ in range(len(self._buckets) // 10):
+            self._buckets.popitem(last=False)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._buckets.clear()
+
+
+# Refill and take in one atomic step; state is a hash of tokens and the time it was last updated
+_TAKE_SCRIPT = """
+local rate = tonumber(ARGV[1])
+local burst = tonumber(ARGV[2])
+local now = tonumber(ARGV[3])
+local state = redis.call('HMGET', KEYS[1], 'tokens', 'updated')
+local tokens = tonumber(state[1]) or burst
+local updated = tonumber(state[2]) or now
+tokens = math.min(burst, tokens + math.max(0, now - updated) * rate)
+local wait = 0
+if tokens >= 1 then tokens = tokens - 1 else wait = (1 - tokens) / rate end
+redis.call('HSET', KEYS[1], 'tokens', tostring(tokens), 'updated', tostring(now))
+redis.call('PEXPIRE', KEYS[1], math.ceil(burst / rate * 1000))
+return tostring(wait)
+"""
+
+
+class RedisBuckets:
+    """Token buckets in a Redis server, shared by every worker"""
+
+    blocking = True
+
+    def __init__(self, client, prefix: str = "campus-events:bucket:"):
+        self.client = client
+        self.prefix = prefix
+        self._take = client.register_script(_TAKE_SCRIPT)
+
+    @classmethod
+    def from_url(cls, url: str) -> "RedisBuckets":
+        try:
+            import redis
+        except ImportError as e:
+            raise ImportError("RATE_LIMIT_BACKEND=redis requires the redis package") from e
+        return cls(redis.Redis.from_url(url))
+
+    def take(self, key: str, limit: RateLimit) -> float:
+        """Take a token, returning 0 or, when the bucket is empty, the seconds until it has one"""
+        return float(self._take(keys=[self.prefix + key], args=[limit.rate, limit.burst, time.time()]))
+
+
+def create_buckets(config: Settings = settings):
+    """Build the bucket store selected by RATE_LIMIT_BACKEND"""
+    if config.rate_limit_backend == "memory":
+        return MemoryBuckets()
+    if config.rate_limit_backend == "redis":
+        return RedisBuckets.from_url(config.rate_limit_url)
+    raise ValueError(f"Unknown rate limit backend: {config.rate_limit_backend}")
+
+
+def _retry_after(seconds: float) -> list:
+    return [(RETRY_AFTER_HEADER.lower().encode(), str(max(1, math.ceil(seconds))).encode())]
+
+
+class RateLimitMiddleware:
+    """ASGI middleware answering 429 to requests over their route's token bucket"""
+
+    def __init__(self, app, rules: Optional[List[RateLimitRule]] = None, buckets=None):
+        self.app = app
+        self.rules = parse_rate_limits(settings.rate_limits) if rules is None else rules
+        self.buckets = buckets if buckets is not None else (create_buckets() if self.rules else None)
+
+    def _rule(self, scope) -> Optional[RateLimitRule]:
+        for rule in self.rules:
+            if rule.method == scope["method"] and rule.pattern.match(scope["path"]):
+                return rule
+        return None
+
+    async def __call__(self, scope, receive, send):
+        rule = self._rule(scope) if scope["type"] == "http" and self.rules else None
+        if rule is None:
+            await self.app(scope, receive, send)
+            return
+
+        client = scope.get("client")
+        key = client[0] if client else "unknown"
+        if rule.limit.key == "student":
+            body = await read_body(receive)
+            if body is None:
+                return
+            receive = replaying_receive(body, receive)
+            try:
+                key = f"student:{int(json.loads(body)['student_id'])}"
+            except (ValueError, TypeError, KeyError):
+                pass  # Malformed bodies are limited per client and rejected by the route
+
+        bucket = f"{rule.method} {rule.path} {key}"
+        if self.buckets.blocking:
+            wait = await run_in_threadpool(self.buckets.take, bucket, rule.limit)
+        else:
+            wait = self.buckets.take(bucket, rule.limit)
+        if wait > 0:
+            await send_json(send, 429, "Rate limit exceeded, retry later", _retry_after(wait))
+            return
+        await self.app(scope, receive, send)
+
+
+class AdmissionController:
+    """Bounds the writes running at once and the writes waiting for a slot"""
+
+    def __init__(self, max_in_flight: int, queue_size: int, timeout: float):
+        self.max_in_flight = max_in_flight
+        self.queue_size = queue_size
+        self.timeout = timeout
+        self.waiting = 0
+        self._loop = None
+        self._slots: Optional[asyncio.Semaphore] = None
+
+    def _semaphore(self) -> asyncio.Semaphore:
+        # One event loop serves the app; a new one (as in tests) starts with fresh slots
+        loop = asyncio.get_running_loop()
+        if loop is not self._loop:
+            self._loop, self._slots, self.waiting = loop, asyncio.Semaphore(self.max_in_flight), 0
+        return self._slots
+
+    async def acquire(self) -> bool:
+        """Take a slot, waiting for one if the queue has room; False when the request should be shed"""
+        slots = self._semaphore()
+        if not slots.locked():
+            await slots.acquire()
+            return True
+        if self.waiting >= self.queue_size:
+            return False
+        self.waiting += 1
+        try:
+            await asyncio.wait_for(slots.acquire(), self.timeout)
+            return True
+        except asyncio.TimeoutError:
+            return False
+        finally:
+            self.waiting -= 1
+
+    def release(self) -> None:
+        self._slots.release()
+
+
+class AdmissionMiddleware:
+    """ASGI middleware shedding write requests with 429 once the in-flight and waiting limits are reached"""
+
+    def __init__(self, app, controller: Optional[AdmissionController] = None):
+        self.app = app
+        self.controller = controller or AdmissionController(
+            settings.max_in_flight_writes, settings.write_queue_size, settings.write_queue_timeout
+        )
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http" or scope["method"] in READ_METHODS or self.controller.max_in_flight <= 0:
+            await self.app(scope, receive, send)
+            return
+        if not await self.controller.acquire():
+            await send_json(send, 429, "Too many writes in progress, retry later",
+                            _retry_after(self.controller.timeout))
+            return
+        try:
+            await self.app(scope, receive, send)
+        finally:
+            self.controller.release()
@@ -0,0 +1,61 @@
+"""
+Async event listing endpoints, served when ASYNC_DB is enabled
+"""
+
+from typing import List, Literal, Optional
+from fastapi import APIRouter, Depends, Query, Request
+from sqlmodel.ext.asyncio.session import AsyncSession
+
+from app.db import get_async_session
+from app.schemas import EventListResponse
+from app.pagination import NEXT_CURSOR_HEADER, encode_cursor, ndjson_response
+from app.routers.events import _event_list_response, event_cursor, event_filters
+from app.cache import EVENT_LIST, response_cache
+from app import async_crud, crud
+
+router = APIRouter()
+
+
+@router.get("/", response_model=List[EventListResponse])
+async def get_events(
+    request: Request,
+    filters: crud.EventFilters = Depends(event_filters),
+    order: Literal["desc", "asc"] = Query(default="desc", description="Sort by date, latest or soonest first"),
+    limit: Optional[int] = Query(default=None, ge=1, le=1000, description="Page size, enables keyset pagination"),
+    cursor: Optional[str] = Query(default=None, description=f"Value of the {NEXT_CURSOR_HEADER} header of the previous page"),
+    output: Literal["json", "ndjson"] = Query(default="json", alias="format", description="Use ndjson to stream rows"),
+    db: AsyncSession = Depends(get_async_session)
+):
+    """Get events filtered by college, type, location, date range and free seats"""
+    after = event_cursor(cursor, order)
+
+    if output == "ndjson":
+        rows = async_crud.iter_events_with_stats(
+            db=db, filters=filters, limit=limit, after=after, ascending=order == "asc"
+        )
+        return ndjson_response(_event_list_response(row) async for row in rows)
+
+    key, cached = response_cache.lookup(request, [EVENT_LIST])
+    if cached:
+        return cached
+
+    if response_cache.fast_json:
+        # Plain column rows skip both the ORM entities and the per-row response models
+        events = await async_crud.get_event_rows_with_stats(
+            db=db, filters=filters, limit=limit, after=after, ascending=order == "asc"
+        )
+        keys = [(event["date"], event["id"]) for event in events]
+    else:
+        rows = await async_crud.get_events_with_stats(
+            db=db, filters=filters, limit=limit, after=after, ascending=order == "asc"
+        )
+        events = [_event_list_response(row) for row in rows]
+        keys = [(event.date, event.id) for event in events]
+
+    headers = {}
+    if limit and len(events) == limit:
+        headers[NEXT_CURSOR_HEADER] = encode_cursor(keys[-1][0].isoformat(), keys[-1][1], order)
+
+    # An upcoming listing goes stale when its soonest event starts, not only on writes
+    ttl = response_cache.ttl_until(min(keys)[0]) if filters.upcoming_only and keys else None
+    return response_cache.store(key, request, List[EventListResponse], events, headers, ttl=ttl)
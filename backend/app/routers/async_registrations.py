@@ -0,0 +1,110 @@
+"""
+Async registration, attendance, and feedback endpoints, served when ASYNC_DB is enabled
+"""
+
+import asyncio
+
+from fastapi import APIRouter, Depends, HTTPException
+from fastapi.encoders import jsonable_encoder
+from fastapi.responses import JSONResponse
+from sqlmodel.ext.asyncio.session import AsyncSession
+
+from app.db import get_async_session
+from app.schemas import (
+    RegistrationCreate, RegistrationResponse, WaitlistResponse,
+    AttendanceCreate, AttendanceResponse,
+    FeedbackCreate, FeedbackResponse
+)
+from app.cache import FACT_TAGS, response_cache
+from app.group_commit import group_writer
+from app import async_crud, crud
+
+router = APIRouter()
+
+
+@router.post(
+    "/{event_id}/register",
+    response_model=RegistrationResponse,
+    responses={202: {"model": WaitlistResponse, "description": "Event is full, student was added to the waitlist"}}
+)
+async def register_for_event(
+    event_id: int,
+    registration: RegistrationCreate,
+    db: AsyncSession = Depends(get_async_session)
+):
+    """Register a student for an event, optionally joining the waitlist if it is full"""
+    try:
+        if group_writer.enabled:
+            db_registration = await asyncio.wait_for(
+                asyncio.wrap_future(group_writer.submit_registration(event_id, registration.student_id)),
+                group_writer.timeout,
+            )
+        else:
+            db_registration = await async_crud.create_registration(db=db, event_id=event_id, registration=registration)
+    except asyncio.TimeoutError:
+        raise HTTPException(status_code=503, detail="Registration could not be saved in time, retry later")
+    except LookupError as e:
+        raise HTTPException(status_code=404, detail=str(e))
+    except crud.EventFullError as e:
+        if not registration.join_waitlist:
+            raise HTTPException(status_code=409, detail=str(e))
+    except ValueError as e:
+        raise HTTPException(status_code=409, detail=str(e))
+    else:
+        response_cache.invalidate(*FACT_TAGS)
+        return db_registration
+
+    try:
+        entry, position = await async_crud.create_waitlist_entry(
+            db=db, event_id=event_id, student_id=registration.student_id
+        )
+    except ValueError as e:
+        raise HTTPException(status_code=409, detail=str(e))
+
+    waitlisted = WaitlistResponse(**entry.model_dump(), position=position)
+    return JSONResponse(status_code=202, content=jsonable_encoder(waitlisted))
+
+
+@router.post("/{event_id}/attendance", response_model=AttendanceResponse)
+async def mark_attendance(
+    event_id: int,
+    attendance: AttendanceCreate,
+    db: AsyncSession = Depends(get_async_session)
+):
+    """Mark attendance for an event"""
+    try:
+        if group_writer.enabled:
+            db_attendance = await asyncio.wait_for(
+                asyncio.wrap_future(group_writer.submit_attendance(event_id, attendance.student_id)),
+                group_writer.timeout,
+            )
+        else:
+            db_attendance = await async_crud.create_attendance(db=db, event_id=event_id, attendance=attendance)
+    except asyncio.TimeoutError:
+        raise HTTPException(status_code=503, detail="Attendance could not be saved in time, retry later")
+    except LookupError as e:
+        raise HTTPException(status_code=404, detail=str(e))
+    except ValueError as e:
+        raise HTTPException(status_code=409, detail=str(e))
+
+    response_cache.invalidate(*FACT_TAGS)
+    return db_attendance
+
+
+@router.post("/{event_id}/feedback", response_model=FeedbackResponse)
+async def submit_feedback(
+    event_id: int,
+    feedback: FeedbackCreate,
+    db: AsyncSession = Depends(get_async_session)
+):
+    """Submit feedback for an event"""
+    # Validate rating
+    if not (1 <= feedback.rating <= 5):
+        raise HTTPException(status_code=400, detail="Rating must be between 1 and 5")
+
+    try:
+        db_feedback = await async_crud.create_feedback(db=db, event_id=event_id, feedback=feedback)
+    except LookupError as e:
+        raise HTTPException(status_code=404, detail=str(e))
+    response_cache.invalidate(*FACT_TAGS)
+    return db_feedback
@@ -0,0 +1,87 @@
+"""
+Async reports and analytics endpoints, served when ASYNC_DB is enabled
+"""
+
+from typing import List, Literal, Optional
+from fastapi import APIRouter, Depends, Query, Request
+from sqlmodel.ext.asyncio.session import AsyncSession
+
+from app.db import get_async_session
+from app.schemas import (
+    EventPopularityReport, StudentParticipationReport, TopActiveStudentsReport
+)
+from app.pagination import NEXT_CURSOR_HEADER, encode_cursor, ndjson_response
+from app.routers.reports import _report_cursor
+from app.cache import EVENT_REPORTS, STUDENT_REPORTS, response_cache
+from app import async_crud
+
+router = APIRouter()
+
+
+@router.get("/event-popularity", response_model=List[EventPopularityReport])
+async def get_event_popularity_report(
+    request: Request,
+    limit: Optional[int] = Query(default=None, ge=1, le=1000, description="Page size, enables keyset pagination"),
+    cursor: Optional[str] = Query(default=None, description=f"Value of the {NEXT_CURSOR_HEADER} header of the previous page"),
+    output: Literal["json", "ndjson"] = Query(default="json", alias="format", description="Use ndjson to stream rows"),
+    db: AsyncSession = Depends(get_async_session)
+):
+    """Get event popularity report sorted by registrations"""
+    after = _report_cursor(cursor)
+
+    if output == "ndjson":
+        rows = async_crud.iter_event_popularity_report(db=db, limit=limit, after=after)
+        return ndjson_response(EventPopularityReport(**row) async for row in rows)
+
+    key, cached = response_cache.lookup(request, [EVENT_REPORTS])
+    if cached:
+        return cached
+
+    report = await async_crud.get_event_popularity_report(db=db, limit=limit, after=after)
+    headers = {}
+    if limit and len(report) == limit:
+        last = report[-1]
+        headers[NEXT_CURSOR_HEADER] = encode_cursor(last["registration_count"], last["event_id"])
+    return response_cache.store(key, request, List[EventPopularityReport], report, headers)
+
+
+@router.get("/student-participation", response_model=List[StudentParticipationReport])
+async def get_student_participation_report(
+    request: Request,
+    limit: Optional[int] = Query(default=None, ge=1, le=1000, description="Page size, enables keyset pagination"),
+    cursor: Optional[str] = Query(default=None, description=f"Value of the {NEXT_CURSOR_HEADER} header of the previous page"),
+    output: Literal["json", "ndjson"] = Query(default="json", alias="format", description="Use ndjson to stream rows"),
+    db: AsyncSession = Depends(get_async_session)
+):
+    """Get student participation report showing events attended count"""
+    after = _report_cursor(cursor)
+
+    if output == "ndjson":
+        rows = async_crud.iter_student_participation_report(db=db, limit=limit, after=after)
+        return ndjson_response(StudentParticipationReport(**row) async for row in rows)
+
+    key, cached = response_cache.lookup(request, [STUDENT_REPORTS])
+    if cached:
+        return cached
+
+    report = await async_crud.get_student_participation_report(db=db, limit=limit, after=after)
+    headers = {}
+    if limit and len(report) == limit:
+        last = report[-1]
+        headers[NEXT_CURSOR_HEADER] = encode_cursor(last["events_attended"], last["student_id"])
+    return response_cache.store(key, request, List[StudentParticipationReport], report, headers)
+
+
+@router.get("/top-active-students", response_model=List[TopActiveStudentsReport])
+async def get_top_active_students(
+    request: Request,
+    limit: int = Query(default=10, ge=1, le=100, description="Number of top students to return"),
+    db: AsyncSession = Depends(get_async_session)
+):
+    """Get top active students by attendance count"""
+    key, cached = response_cache.lookup(request, [STUDENT_REPORTS])
+    if cached:
+        return cached
+
+    report = await async_crud.get_top_active_students(db=db, limit=limit)
+    return response_cache.store(key, request, List[TopActiveStudentsReport], report)
@@ -2,13 +2,16 @@
 Event management endpoints
 """
 
-from typing import List, Optional
-from fastapi import APIRouter, Depends, HTTPException
+from datetime import date, datetime, time, timezone
+from typing import List, Literal, Optional, Tuple, Union
+from fastapi import APIRouter, Depends, HTTPException, Query, Request
 from sqlmodel import Session
 
-from app.db import get_session
+from app.db import get_read_session, get_session
 from app.models import Event
 from app.schemas import EventCreate, EventResponse, EventListResponse
+from app.pagination import NEXT_CURSOR_HEADER, decode_cursor, encode_cursor, ndjson_response
+from app.cache import EVENT_LIST, EVENT_REPORTS, response_cache
 from app import crud
 
 router = APIRouter()
@@ -20,44 +23,149 @@ def create_event(
     db: Session = Depends(get_session)
 ):
     """Create a new event"""
-    return crud.create_event(db=db, event=event)
+    db_event = crud.create_event(db=db, event=event)
+    response_cache.invalidate(EVENT_LIST, EVENT_REPORTS)
+    return db_event
 
 
-@router.get("/", response_model=List[EventListResponse])
-def get_events(
+def _event_list_response(row) -> EventListResponse:
+    event, registration_count, attendance_count, avg_rating = row
+    return EventListResponse(
+        **event.model_dump(),
+        registration_count=registration_count,
+        attendance_count=attendance_count,
+        avg_rating=avg_rating
+    )
+
+
+def _as_datetime(value: Optional[Union[datetime, date]]) -> Optional[datetime]:
+    """A filter bound as stored: naive UTC, with a date meaning its midnight"""
+    if value is None:
+        return None
+    if not isinstance(value, datetime):
+        return datetime.combine(value, time.min)
+    if value.tzinfo is not None:
+        return value.astimezone(timezone.utc).replace(tzinfo=None)
+    return value
+
+
+def event_cursor(cursor: Optional[str], order: str) -> Optional[Tuple[datetime, int]]:
+    """Decode a listing cursor; it records the order of the page it came from, which must match"""
+    if not cursor:
+        return None
+    try:
+        event_date, event_id, cursor_order = decode_cursor(cursor, datetime.fromisoformat, int, str)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    if cursor_order != order:
+        raise HTTPException(status_code=400, detail=f"Cursor belongs to a listing with order={cursor_order}")
+    return event_date, event_id
+
+
+def event_filters(
     college_id: Optional[int] = None,
     event_type: Optional[str] = None,
-    db: Session = Depends(get_session)
+    location: Optional[str] = None,
+    date_from: Optional[Union[datetime, date]] = Query(
+        default=None, alias="from", description="Only events at or after this time; a date means its midnight"
+    ),
+    date_to: Optional[Union[datetime, date]] = Query(
+        default=None, alias="to", description="Only events before this time; a date means its midnight"
+    ),
+    upcoming_only: bool = Query(default=False, description="Only events that have not started yet"),
+    has_capacity: bool = Query(default=False, description="Only events with seats left"),
+) -> crud.EventFilters:
+    """Event listing filters from the query string, shared by the sync and async listings"""
+    date_from, date_to = _as_datetime(date_from), _as_datetime(date_to)
+    if date_from and date_to and date_from >= date_to:
+        raise HTTPException(status_code=400, detail="from must be earlier than to")
+    return crud.EventFilters(
+        college_id=college_id, event_type=event_type, location=location, date_from=date_from,
+        date_to=date_to, upcoming_only=upcoming_only, has_capacity=has_capacity,
+    )
+
+
+@router.get("/", response_model=List[EventListResponse])
+def get_events(
+    request: Request,
+    filters: crud.EventFilters = Depends(event_filters),
+    order: Literal["desc", "asc"] = Query(default="desc", description="Sort by date, latest or soonest first"),
+    limit: Optional[int] = Query(default=None, ge=1, le=1000, description="Page size, enables keyset pagination"),
+    cursor: Optional[str] = Query(default=None, description=f"Value of the {NEXT_CURSOR_HEADER} header of the previous page"),
+    output: Literal["json", "ndjson"] = Query(default="json", alias="format", description="Use ndjson to stream rows"),
+    db: Session = Depends(get_read_session)
 ):
-    """Get events with optional filtering by college and event type"""
-    events = crud.get_events(db=db, college_id=college_id, event_type=event_type)
-    
-    # Enhance with statistics
-    result = []
-    for event in events:
-        registrations = crud.get_registrations_by_event(db, event.id)
-        attendance = crud.get_attendance_by_event(db, event.id)
-        feedback = crud.get_feedback_by_event(db, event.id)
-        
-        # Calculate average rating
-        avg_rating = None
-        if feedback:
-            avg_rating = sum(f.rating for f in feedback) / len(feedback)
-        
-        result.append(EventListResponse(
-            **event.dict(),
-            registration_count=len(registrations),
-            attendance_count=len(attendance),
-            avg_rating=avg_rating
-        ))
-    
-    return result
+    """Get events filtered by college, type, location, date range and free seats"""
+    after = event_cursor(cursor, order)
+
+    if output == "ndjson":
+        rows = crud.iter_events_with_stats(
+            db=db, filters=filters, limit=limit, after=after, ascending=order == "asc"
+        )
+        return ndjson_response(_event_list_response(row) for row in rows)
+
+    key, cached = response_cache.lookup(request, [EVENT_LIST])
+    if cached:
+        return cached
+
+    if response_cache.fast_json:
+        # Plain column rows skip both the ORM entities and the per-row response models
+        events = crud.get_event_rows_with_stats(
+            db=db, filters=filters, limit=limit, after=after, ascending=order == "asc"
+        )
+        keys = [(event["date"], event["id"]) for event in events]
+    else:
+        rows = crud.get_events_with_stats(
+            db=db, filters=filters, limit=limit, after=after, ascending=order == "asc"
+        )
+        events = [_event_list_response(row) for row in rows]
+        keys = [(event.date, event.id) for event in events]
+
+    headers = {}
+    if limit and len(events) == limit:
+        headers[NEXT_CURSOR_HEADER] = encode_cursor(keys[-1][0].isoformat(), keys[-1][1], order)
+
+    # An upcoming listing goes stale when its soonest event starts, not only on writes
+    ttl = response_cache.ttl_until(min(keys)[0]) if filters.upcoming_only and keys else None
+    return response_cache.store(key, request, List[EventListResponse], events, headers, ttl=ttl)
+
+
+@router.get("/search", response_model=List[EventListResponse])
+def search_events(
+    request: Request,
+    q: str = Query(min_length=1, max_length=200, description="Words to find in the title, description, type or location"),
+    limit: int = Query(default=20, ge=1, le=100),
+    cursor: Optional[str] = Query(default=None, description=f"Value of the {NEXT_CURSOR_HEADER} header of the previous page"),
+    db: Session = Depends(get_read_session)
+):
+    """Search events by relevance, best match first"""
+    try:
+        after = decode_cursor(cursor, float, int) if cursor else None
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+    key, cached = response_cache.lookup(request, [EVENT_LIST])
+    if cached:
+        return cached
+
+    try:
+        rows = crud.search_events(db=db, query=q, limit=limit, after=after)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    headers = {}
+    if len(rows) == limit:
+        last, score = rows[-1][0], rows[-1][-1]
+        headers[NEXT_CURSOR_HEADER] = encode_cursor(score, last.id)
+
+    return response_cache.store(
+        key, request, List[EventListResponse], [_event_list_response(row[:4]) for row in rows], headers
+    )
 
 
 @router.get("/{event_id}", response_model=EventResponse)
 def get_event(
     event_id: int,
-    db: Session = Depends(get_session)
+    db: Session = Depends(get_read_session)
 ):
     """Get a specific event by ID"""
     event = crud.get_event(db=db, event_id=event_id)
@@ -0,0 +1,40 @@
+"""
+Analytics export endpoints
+"""
+
+from datetime import datetime
+from typing import Literal, Optional
+from fastapi import APIRouter, Depends, HTTPException, Query
+from fastapi.responses import StreamingResponse
+from sqlmodel import Session
+
+from app.db import get_session
+from app.export import FORMATS, export_filename, stream_export
+
+router = APIRouter()
+
+
+@router.get("/{table}", response_class=StreamingResponse)
+def export_table(
+    table: str,
+    output: Optional[Literal["parquet", "arrow", "csv"]] = Query(
+        default=None, alias="format", description="Defaults to parquet when pyarrow is installed, otherwise gzip csv"
+    ),
+    since: Optional[datetime] = Query(default=None, description="Only rows stamped at or after this time"),
+    until: Optional[datetime] = Query(default=None, description="Only rows stamped before this time"),
+    db: Session = Depends(get_session)
+):
+    """Stream a table as Parquet, Arrow IPC or gzip CSV"""
+    try:
+        file_format, chunks = stream_export(db, table, output, since, until)
+    except LookupError as e:
+        raise HTTPException(status_code=404, detail=str(e))
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+    filename = export_filename(table, file_format)
+    return StreamingResponse(
+        chunks,
+        media_type=FORMATS[file_format][1],
+        headers={"Content-Disposition": f'attachment; filename="{filename}"'},
+    )
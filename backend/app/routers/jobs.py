@@ -0,0 +1,74 @@
+"""
+Background job endpoints for reports and exports
+"""
+
+import os
+from fastapi import APIRouter, HTTPException, Response
+from fastapi.responses import FileResponse
+
+from app.jobs import DONE, FAILED, Job, job_queue
+from app.schemas import ReportJobCreate, ExportJobCreate, JobResponse
+
+router = APIRouter()
+
+
+def _job_response(job: Job, response: Response) -> JobResponse:
+    response.headers["Location"] = f"/jobs/{job.id}"
+    return JobResponse(
+        id=job.id,
+        kind=job.kind,
+        status=job.status,
+        created_at=job.created_at,
+        started_at=job.started_at,
+        finished_at=job.finished_at,
+        error=job.error,
+        result_url=f"/jobs/{job.id}/result" if job.status == DONE else None,
+    )
+
+
+@router.post("/reports", response_model=JobResponse, status_code=202)
+def submit_report_job(params: ReportJobCreate, response: Response):
+    """Queue a report, or return a job for the same report submitted within the freshness window"""
+    try:
+        job, reused = job_queue.submit_report(params)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    if reused:
+        response.status_code = 200
+    return _job_response(job, response)
+
+
+@router.post("/exports", response_model=JobResponse, status_code=202)
+def submit_export_job(params: ExportJobCreate, response: Response):
+    """Queue a table export"""
+    try:
+        job = job_queue.submit_export(params)
+    except LookupError as e:
+        raise HTTPException(status_code=404, detail=str(e))
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    return _job_response(job, response)
+
+
+@router.get("/{job_id}", response_model=JobResponse)
+def get_job(job_id: str, response: Response):
+    """Get a job's status"""
+    job = job_queue.get(job_id)
+    if not job:
+        raise HTTPException(status_code=404, detail="Job not found")
+    return _job_response(job, response)
+
+
+@router.get("/{job_id}/result", response_class=FileResponse)
+def get_job_result(job_id: str):
+    """Download a finished job's result"""
+    job = job_queue.get(job_id)
+    if not job:
+        raise HTTPException(status_code=404, detail="Job not found")
+    if job.status == FAILED:
+        raise HTTPException(status_code=409, detail=f"Job failed: {job.error}")
+    if job.status != DONE:
+        raise HTTPException(status_code=409, detail=f"Job is {job.status}")
+    if not os.path.exists(job.result_path):
+        raise HTTPException(status_code=410, detail="Job result is no longer available, submit the job again")
+    return FileResponse(job.result_path, media_type=job.media_type, filename=job.filename)
@@ -2,61 +2,94 @@
 Registration, attendance, and feedback endpoints
 """
 
-from fastapi import APIRouter, Depends, HTTPException
+from collections import Counter
+from concurrent import futures
+from fastapi import APIRouter, Depends, HTTPException, Response
+from fastapi.encoders import jsonable_encoder
+from fastapi.responses import JSONResponse
 from sqlmodel import Session
 
-from app.db import get_session
+from app.db import pin_reads_to_primary, get_session
 from app.schemas import (
-    RegistrationCreate, RegistrationResponse,
+    RegistrationCreate, RegistrationResponse, WaitlistResponse,
     AttendanceCreate, AttendanceResponse,
-    FeedbackCreate, FeedbackResponse
+    FeedbackCreate, FeedbackResponse,
+    StudentIdBatch, FeedbackBatch, BatchResponse, BatchRowResult
 )
+from app.cache import FACT_TAGS, response_cache
+from app.group_commit import group_writer
 from app import crud
 
 router = APIRouter()
 
 
-@router.post("/{event_id}/register", response_model=RegistrationResponse)
+@router.post(
+    "/{event_id}/register",
+    response_model=RegistrationResponse,
+    responses={202: {"model": WaitlistResponse, "description": "Event is full, student was added to the waitlist"}}
+)
 def register_for_event(
     event_id: int,
     registration: RegistrationCreate,
+    response: Response,
     db: Session = Depends(get_session)
 ):
-    """Register a student for an event"""
-    # Check if event exists
-    event = crud.get_event(db=db, event_id=event_id)
-    if not event:
-        raise HTTPException(status_code=404, detail="Event not found")
-    
-    # Check if student exists
-    student = crud.get_student(db=db, student_id=registration.student_id)
-    if not student:
-        raise HTTPException(status_code=404, detail="Student not found")
-    
+    """Register a student for an event, optionally joining the waitlist if it is full"""
+    try:
+        if group_writer.enabled:
+            db_registration = group_writer.result(group_writer.submit_registration(event_id, registration.student_id))
+            pin_reads_to_primary(response)
+        else:
+            db_registration = crud.create_registration(db=db, event_id=event_id, registration=registration)
+    except futures.TimeoutError:
+        raise HTTPException(status_code=503, detail="Registration could not be saved in time, retry later")
+    except LookupError as e:
+        raise HTTPException(status_code=404, detail=str(e))
+    except crud.EventFullError as e:
+        if not registration.join_waitlist:
+            raise HTTPException(status_code=409, detail=str(e))
+    except ValueError as e:
+        raise HTTPException(status_code=409, detail=str(e))
+    else:
+        response_cache.invalidate(*FACT_TAGS)
+        return db_registration
+
     try:
-        return crud.create_registration(db=db, event_id=event_id, registration=registration)
+        entry, position = crud.create_waitlist_entry(db=db, event_id=event_id, student_id=registration.student_id)
     except ValueError as e:
         raise HTTPException(status_code=409, detail=str(e))
 
+    waitlisted = WaitlistResponse(**entry.model_dump(), position=position)
+    accepted = JSONResponse(status_code=202, content=jsonable_encoder(waitlisted))
+    # Headers set on the injected response, such as the read-your-writes cookie, only reach plain return values
+    for cookie in response.headers.getlist("set-cookie"):
+        accepted.headers.append("set-cookie", cookie)
+    return accepted
+
 
 @router.post("/{event_id}/attendance", response_model=AttendanceResponse)
 def mark_attendance(
     event_id: int,
     attendance: AttendanceCreate,
+    response: Response,
     db: Session = Depends(get_session)
 ):
     """Mark attendance for an event"""
-    # Check if event exists
-    event = crud.get_event(db=db, event_id=event_id)
-    if not event:
-        raise HTTPException(status_code=404, detail="Event not found")
-    
-    # Check if student exists
-    student = crud.get_student(db=db, student_id=attendance.student_id)
-    if not student:
-        raise HTTPException(status_code=404, detail="Student not found")
-    
-    return crud.create_attendance(db=db, event_id=event_id, attendance=attendance)
+    try:
+        if group_writer.enabled:
+            db_attendance = group_writer.result(group_writer.submit_attendance(event_id, attendance.student_id))
+            pin_reads_to_primary(response)
+        else:
+            db_attendance = crud.create_attendance(db=db, event_id=event_id, attendance=attendance)
+    except futures.TimeoutError:
+        raise HTTPException(status_code=503, detail="Attendance could not be saved in time, retry later")
+    except LookupError as e:
+        raise HTTPException(status_code=404, detail=str(e))
+    except ValueError as e:
+        raise HTTPException(status_code=409, detail=str(e))
+
+    response_cache.invalidate(*FACT_TAGS)
+    return db_attendance
 
 
 @router.post("/{event_id}/feedback", response_model=FeedbackResponse)
@@ -66,18 +99,69 @@ def submit_feedback(
     db: Session = Depends(get_session)
 ):
     """Submit feedback for an event"""
-    # Check if event exists
-    event = crud.get_event(db=db, event_id=event_id)
-    if not event:
-        raise HTTPException(status_code=404, detail="Event not found")
-    
-    # Check if student exists
-    student = crud.get_student(db=db, student_id=feedback.student_id)
-    if not student:
-        raise HTTPException(status_code=404, detail="Student not found")
-    
     # Validate rating
     if not (1 <= feedback.rating <= 5):
         raise HTTPException(status_code=400, detail="Rating must be between 1 and 5")
-    
-    return crud.create_feedback(db=db, event_id=event_id, feedback=feedback)
+
+    try:
+        db_feedback = crud.create_feedback(db=db, event_id=event_id, feedback=feedback)
+    except LookupError as e:
+        raise HTTPException(status_code=404, detail=str(e))
+    response_cache.invalidate(*FACT_TAGS)
+    return db_feedback
+
+
+def _batch_response(statuses) -> BatchResponse:
+    counts = Counter(status for _, status in statuses)
+    if counts[crud.BATCH_ACCEPTED]:
+        response_cache.invalidate(*FACT_TAGS)
+    return BatchResponse(
+        accepted=counts[crud.BATCH_ACCEPTED],
+        duplicate=counts[crud.BATCH_DUPLICATE],
+        unknown=counts[crud.BATCH_UNKNOWN],
+        full=counts[crud.BATCH_FULL],
+        invalid=counts[crud.BATCH_INVALID],
+        results=[BatchRowResult(student_id=student_id, status=status) for student_id, status in statuses]
+    )
+
+
+@router.post("/{event_id}/register:batch", response_model=BatchResponse)
+def register_batch(
+    event_id: int,
+    batch: StudentIdBatch,
+    db: Session = Depends(get_session)
+):
+    """Register many students for an event in one transaction"""
+    try:
+        statuses = crud.create_registration_batch(db=db, event_id=event_id, student_ids=batch.student_ids)
+    except LookupError as e:
+        raise HTTPException(status_code=404, detail=str(e))
+    return _batch_response(statuses)
+
+
+@router.post("/{event_id}/attendance:batch", response_model=BatchResponse)
+def mark_attendance_batch(
+    event_id: int,
+    batch: StudentIdBatch,
+    db: Session = Depends(get_session)
+):
+    """Mark attendance for many students, e.g. from badge scans, in one transaction"""
+    try:
+        statuses = crud.create_attendance_batch(db=db, event_id=event_id, student_ids=batch.student_ids)
+    except LookupError as e:
+        raise HTTPException(status_code=404, detail=str(e))
+    return _batch_response(statuses)
+
+
+@router.post("/{event_id}/feedback:batch", response_model=BatchResponse)
+def submit_feedback_batch(
+    event_id: int,
+    batch: FeedbackBatch,
+    db: Session = Depends(get_session)
+):
+    """Submit many feedback entries for an event in one transaction"""
+    try:
+        statuses = crud.create_feedback_batch(db=db, event_id=event_id, items=batch.items)
+    except LookupError as e:
+        raise HTTPException(status_code=404, detail=str(e))
+    return _batch_response(statuses)
@@ -2,39 +2,119 @@
 Reports and analytics endpoints
 """
 
-from typing import List
-from fastapi import APIRouter, Depends, Query
+from datetime import date
+from typing import List, Literal, Optional, Tuple
+from fastapi import APIRouter, Depends, HTTPException, Query, Request
 from sqlmodel import Session
 
-from app.db import get_session
+from app.db import get_read_session
 from app.schemas import (
-    EventPopularityReport, StudentParticipationReport, TopActiveStudentsReport
+    EventPopularityReport, StudentParticipationReport, TopActiveStudentsReport, TrendReport
 )
+from app.pagination import NEXT_CURSOR_HEADER, decode_cursor, encode_cursor, ndjson_response
+from app.cache import EVENT_REPORTS, STUDENT_REPORTS, TREND_REPORTS, response_cache
 from app import crud
 
 router = APIRouter()
 
 
+def _report_cursor(cursor: Optional[str]) -> Optional[Tuple[int, int]]:
+    try:
+        return decode_cursor(cursor, int, int) if cursor else None
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+
 @router.get("/event-popularity", response_model=List[EventPopularityReport])
 def get_event_popularity_report(
-    db: Session = Depends(get_session)
+    request: Request,
+    limit: Optional[int] = Query(default=None, ge=1, le=1000, description="Page size, enables keyset pagination"),
+    cursor: Optional[str] = Query(default=None, description=f"Value of the {NEXT_CURSOR_HEADER} header of the previous page"),
+    output: Literal["json", "ndjson"] = Query(default="json", alias="format", description="Use ndjson to stream rows"),
+    db: Session = Depends(get_read_session)
 ):
     """Get event popularity report sorted by registrations"""
-    return crud.get_event_popularity_report(db=db)
+    after = _report_cursor(cursor)
+
+    if output == "ndjson":
+        rows = crud.iter_event_popularity_report(db=db, limit=limit, after=after)
+        return ndjson_response(EventPopularityReport(**row) for row in rows)
+
+    key, cached = response_cache.lookup(request, [EVENT_REPORTS])
+    if cached:
+        return cached
+
+    report = crud.get_event_popularity_report(db=db, limit=limit, after=after)
+    headers = {}
+    if limit and len(report) == limit:
+        last = report[-1]
+        headers[NEXT_CURSOR_HEADER] = encode_cursor(last["registration_count"], last["event_id"])
+    return response_cache.store(key, request, List[EventPopularityReport], report, headers)
 
 
 @router.get("/student-participation", response_model=List[StudentParticipationReport])
 def get_student_participation_report(
-    db: Session = Depends(get_session)
+    request: Request,
+    limit: Optional[int] = Query(default=None, ge=1, le=1000, description="Page size, enables keyset pagination"),
+    cursor: Optional[str] = Query(default=None, description=f"Value of the {NEXT_CURSOR_HEADER} header of the previous page"),
+    output: Literal["json", "ndjson"] = Query(default="json", alias="format", description="Use ndjson to stream rows"),
+    db: Session = Depends(get_read_session)
 ):
     """Get student participation report showing events attended count"""
-    return crud.get_student_participation_report(db=db)
+    after = _report_cursor(cursor)
+
+    if output == "ndjson":
+        rows = crud.iter_student_participation_report(db=db, limit=limit, after=after)
+        return ndjson_response(StudentParticipationReport(**row) for row in rows)
+
+    key, cached = response_cache.lookup(request, [STUDENT_REPORTS])
+    if cached:
+        return cached
+
+    report = crud.get_student_participation_report(db=db, limit=limit, after=after)
+    headers = {}
+    if limit and len(report) == limit:
+        last = report[-1]
+        headers[NEXT_CURSOR_HEADER] = encode_cursor(last["events_attended"], last["student_id"])
+    return response_cache.store(key, request, List[StudentParticipationReport], report, headers)
 
 
 @router.get("/top-active-students", response_model=List[TopActiveStudentsReport])
 def get_top_active_students(
+    request: Request,
     limit: int = Query(default=10, ge=1, le=100, description="Number of top students to return"),
-    db: Session = Depends(get_session)
+    db: Session = Depends(get_read_session)
 ):
     """Get top active students by attendance count"""
-    return crud.get_top_active_students(db=db, limit=limit)
+    key, cached = response_cache.lookup(request, [STUDENT_REPORTS])
+    if cached:
+        return cached
+
+    report = crud.get_top_active_students(db=db, limit=limit)
+    return response_cache.store(key, request, List[TopActiveStudentsReport], report)
+
+
+@router.get("/trends", response_model=List[TrendReport])
+def get_trends(
+    request: Request,
+    granularity: Literal["day", "week", "month"] = "day",
+    since: Optional[date] = Query(default=None, description="First period to include"),
+    until: Optional[date] = Query(default=None, description="Periods starting on or after this date are excluded"),
+    event_type: Optional[str] = None,
+    college_id: Optional[int] = None,
+    by: List[Literal["event_type", "college_id"]] = Query(default=[], description="Break the totals down by these"),
+    db: Session = Depends(get_read_session)
+):
+    """Get registrations, attendance and average rating per day, week or month"""
+    key, cached = response_cache.lookup(request, [TREND_REPORTS])
+    if cached:
+        return cached
+
+    try:
+        report = crud.get_trend_report(
+            db=db, granularity=granularity, since=since, until=until,
+            event_type=event_type, college_id=college_id, by=tuple(by)
+        )
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    return response_cache.store(key, request, List[TrendReport], report)
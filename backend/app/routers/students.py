@@ -2,13 +2,14 @@
 Student management endpoints
 """
 
-from fastapi import APIRouter, Depends, HTTPException
+from fastapi import APIRouter, Depends, HTTPException, Request
 from sqlmodel import Session
 from typing import List
 
-from app.db import get_session
+from app.db import get_read_session, get_session
 from app.models import Student
-from app.schemas import StudentCreate, StudentResponse
+from app.schemas import StudentCreate, StudentResponse, StudentDashboard
+from app.cache import EVENT_LIST, STUDENT_REPORTS, response_cache
 from app import crud
 
 router = APIRouter()
@@ -25,16 +26,40 @@ def create_student(
     if existing_student:
         raise HTTPException(status_code=409, detail="Student with this email already exists")
     
-    return crud.create_student(db=db, student=student)
+    db_student = crud.create_student(db=db, student=student)
+    response_cache.invalidate(STUDENT_REPORTS)
+    return db_student
 
 
 @router.get("/{student_id}", response_model=StudentResponse)
 def get_student(
     student_id: int,
-    db: Session = Depends(get_session)
+    db: Session = Depends(get_read_session)
 ):
     """Get a specific student by ID"""
     student = crud.get_student(db=db, student_id=student_id)
     if not student:
         raise HTTPException(status_code=404, detail="Student not found")
     return student
+
+
+@router.get("/{student_id}/dashboard", response_model=StudentDashboard)
+def get_student_dashboard(
+    request: Request,
+    student_id: int,
+    db: Session = Depends(get_read_session)
+):
+    """Get a student's events, feedback and participation totals in one response"""
+    # Registrations, attendance and feedback bump STUDENT_REPORTS; new events bump EVENT_LIST
+    key, cached = response_cache.lookup(request, [STUDENT_REPORTS, EVENT_LIST])
+    if cached:
+        return cached
+
+    dashboard = crud.get_student_dashboard(db=db, student_id=student_id)
+    if not dashboard:
+        raise HTTPException(status_code=404, detail="Student not found")
+
+    # upcoming_events depends on the time, not only on writes: expire the entry when the soonest one starts
+    upcoming = dashboard["upcoming_events"]
+    ttl = response_cache.ttl_until(upcoming[0]["date"] if upcoming else None)
+    return response_cache.store(key, request, StudentDashboard, dashboard, ttl=ttl)
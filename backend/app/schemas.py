@@ -2,9 +2,12 @@
 Pydantic schemas for request/response models
 """
 
-from datetime import datetime
-from typing import Optional, List
-from pydantic import BaseModel, EmailStr
+from datetime import date, datetime
+from typing import Literal, Optional, List
+from pydantic import BaseModel, EmailStr, Field
+
+# Largest number of rows accepted by a single batch request
+MAX_BATCH_SIZE = 10000
 
 
 # College schemas
@@ -53,9 +56,45 @@ class EventListResponse(EventResponse):
     avg_rating: Optional[float] = None
 
 
+# Student dashboard schemas
+class RegisteredEvent(EventResponse):
+    registered_at: datetime
+    attended: bool
+
+
+class AttendedEvent(EventResponse):
+    attended_at: datetime
+
+
+class GivenFeedback(BaseModel):
+    event_id: int
+    event_title: str
+    rating: int
+    comment: Optional[str] = None
+    submitted_at: datetime
+
+
+class StudentDashboardStats(BaseModel):
+    events_registered: int
+    events_attended: int
+    feedback_given: int
+    avg_rating_given: Optional[float] = None
+    attendance_rate: Optional[float] = None  # attended / registered
+
+
+class StudentDashboard(BaseModel):
+    student: StudentResponse
+    stats: StudentDashboardStats
+    upcoming_events: List[RegisteredEvent]  # soonest first
+    registered_events: List[RegisteredEvent]  # latest event first
+    attended_events: List[AttendedEvent]  # most recently attended first
+    feedback: List[GivenFeedback]  # most recent first
+
+
 # Registration schemas
 class RegistrationCreate(BaseModel):
     student_id: int
+    join_waitlist: bool = False  # join the waitlist instead of failing when the event is full
 
 
 class RegistrationResponse(BaseModel):
@@ -65,6 +104,14 @@ class RegistrationResponse(BaseModel):
     registered_at: datetime
 
 
+class WaitlistResponse(BaseModel):
+    id: int
+    event_id: int
+    student_id: int
+    position: int
+    joined_at: datetime
+
+
 # Attendance schemas
 class AttendanceCreate(BaseModel):
     student_id: int
@@ -93,6 +140,29 @@ class FeedbackResponse(BaseModel):
     submitted_at: datetime
 
 
+# Batch ingestion schemas
+class StudentIdBatch(BaseModel):
+    student_ids: List[int] = Field(min_length=1, max_length=MAX_BATCH_SIZE)
+
+
+class FeedbackBatch(BaseModel):
+    items: List[FeedbackCreate] = Field(min_length=1, max_length=MAX_BATCH_SIZE)
+
+
+class BatchRowResult(BaseModel):
+    student_id: int
+    status: str  # accepted, duplicate, unknown, full or invalid
+
+
+class BatchResponse(BaseModel):
+    accepted: int
+    duplicate: int
+    unknown: int
+    full: int = 0
+    invalid: int = 0
+    results: List[BatchRowResult]
+
+
 # Report schemas
 class EventPopularityReport(BaseModel):
     event_id: int
@@ -117,3 +187,43 @@ class TopActiveStudentsReport(BaseModel):
     email: str
     events_attended: int
     avg_rating_given: Optional[float] = None
+
+
+class TrendReport(BaseModel):
+    period: date  # first day of the day, week or month
+    event_type: Optional[str] = None  # set when broken down by event_type
+    college_id: Optional[int] = None  # set when broken down by college_id and the events have a college
+    registration_count: int
+    attendance_count: int
+    avg_rating: Optional[float] = None
+
+
+# Background job schemas
+class ReportJobCreate(BaseModel):
+    report: Literal["event-popularity", "student-participation", "top-active-students", "trends"]
+    limit: Optional[int] = Field(default=None, ge=1)  # top-active-students defaults to 10, the others to every row
+    # Trend report parameters, see GET /reports/trends
+    granularity: Literal["day", "week", "month"] = "day"
+    since: Optional[date] = None
+    until: Optional[date] = None
+    event_type: Optional[str] = None
+    college_id: Optional[int] = None
+    by: List[Literal["event_type", "college_id"]] = []
+
+
+class ExportJobCreate(BaseModel):
+    table: str
+    format: Optional[Literal["parquet", "arrow", "csv"]] = None
+    since: Optional[datetime] = None
+    until: Optional[datetime] = None
+
+
+class JobResponse(BaseModel):
+    id: str
+    kind: str
+    status: str  # queued, running, done or failed
+    created_at: datetime
+    started_at: Optional[datetime] = None
+    finished_at: Optional[datetime] = None
+    error: Optional[str] = None
+    result_url: Optional[str] = None  # set once the job is done
@@ -0,0 +1,104 @@
+"""
+Full-text search index over events
+
+SQLite keeps an external-content FTS5 table, events_fts, in step with the
+events table through triggers; PostgreSQL keeps a generated tsvector column
+with a GIN index. Either index is installed idempotently every time the
+tables are created, so existing databases pick it up on the next start.
+search_query returns (event_id, score) rows for a free-text query, where a
+higher score is a better match.
+"""
+
+import re
+from sqlalchemy import func, literal_column, select, table, text
+
+# Indexed columns, most significant first; SQLite weighs them with these bm25 weights
+SEARCH_COLUMNS = ("title", "description", "event_type", "location")
+BM25_WEIGHTS = (10.0, 4.0, 2.0, 1.0)
+TEXT_SEARCH_CONFIG = "english"
+
+_COLUMNS = ", ".join(SEARCH_COLUMNS)
+_NEW_VALUES = ", ".join(f"new.{name}" for name in SEARCH_COLUMNS)
+_OLD_VALUES = ", ".join(f"old.{name}" for name in SEARCH_COLUMNS)
+
+SQLITE_TRIGGERS = (
+    f"""CREATE TRIGGER IF NOT EXISTS events_fts_insert AFTER INSERT ON events BEGIN
+        INSERT INTO events_fts(rowid, {_COLUMNS}) VALUES (new.id, {_NEW_VALUES});
+    END""",
+    f"""CREATE TRIGGER IF NOT EXISTS events_fts_delete AFTER DELETE ON events BEGIN
+        INSERT INTO events_fts(events_fts, rowid, {_COLUMNS}) VALUES ('delete', old.id, {_OLD_VALUES});
+    END""",
+    f"""CREATE TRIGGER IF NOT EXISTS events_fts_update AFTER UPDATE OF {_COLUMNS} ON events BEGIN
+        INSERT INTO events_fts(events_fts, rowid, {_COLUMNS}) VALUES ('delete', old.id, {_OLD_VALUES});
+        INSERT INTO events_fts(rowid, {_COLUMNS}) VALUES (new.id, {_NEW_VALUES});
+    END""",
+)
+
+_WEIGHTED_VECTORS = " || ".join(
+    f"setweight(to_tsvector('{TEXT_SEARCH_CONFIG}', coalesce({name}, '')), '{weight}')"
+    for name, weight in zip(SEARCH_COLUMNS, "ABCD")
+)
+POSTGRES_DDL = (
+    f"ALTER TABLE events ADD COLUMN IF NOT EXISTS search_vector tsvector "
+    f"GENERATED ALWAYS AS ({_WEIGHTED_VECTORS}) STORED",
+    "CREATE INDEX IF NOT EXISTS ix_events_search_vector ON events USING GIN (search_vector)",
+)
+
+
+def install_search_index(target, connection, **kw) -> None:
+    """Create the full-text index and its maintenance if missing; a MetaData after_create listener"""
+    dialect = connection.dialect.name
+    if dialect == "sqlite":
+        exists = connection.exec_driver_sql(
+            "SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = 'events_fts'"
+        ).first()
+        if not exists:
+            # Porter stemming lets "learning" find "learn"; prefix indexes keep type-ahead queries fast
+            connection.exec_driver_sql(
+                f"CREATE VIRTUAL TABLE events_fts USING fts5({_COLUMNS}, content='events', "
+                "content_rowid='id', tokenize='porter unicode61', prefix='2 3')"
+            )
+            connection.exec_driver_sql("INSERT INTO events_fts(events_fts) VALUES ('rebuild')")
+        for trigger in SQLITE_TRIGGERS:
+            connection.exec_driver_sql(trigger)
+    elif dialect == "postgresql":
+        for statement in POSTGRES_DDL:
+            connection.exec_driver_sql(statement)
+
+
+def match_expression(query: str) -> str:
+    """
+    Turn free text into an FTS5 query matching every word, the last one as a prefix.
+
+    Only word characters are kept, so user input can never be parsed as
+    FTS5 query syntax.
+    """
+    terms = re.findall(r"\w+", query.lower())
+    if not terms:
+        raise ValueError("Search query has no words")
+    return " ".join(f'"{term}"' for term in terms) + "*"
+
+
+def search_query(dialect: str, query: str):
+    """Select (event_id, score) for the events matching query"""
+    if dialect == "sqlite":
+        # bm25 is lower for better matches, so negate it into a score
+        return (
+            select(
+                literal_column("events_fts.rowid").label("event_id"),
+                (-func.bm25(literal_column("events_fts"), *BM25_WEIGHTS)).label("score"),
+            )
+            .select_from(table("events_fts"))
+            .where(text("events_fts MATCH :terms").bindparams(terms=match_expression(query)))
+        )
+    if dialect == "postgresql":
+        if not re.search(r"\w", query):
+            raise ValueError("Search query has no words")
+        tsquery = func.websearch_to_tsquery(TEXT_SEARCH_CONFIG, query)
+        vector = literal_column("events.search_vector")
+        return (
+            select(literal_column("events.id").label("event_id"), func.ts_rank_cd(vector, tsquery).label("score"))
+            .select_from(table("events"))
+            .where(vector.op("@@")(tsquery))
+        )
+    raise NotImplementedError(f"Full-text search is not supported on {dialect}")
@@ -0,0 +1,272 @@
+"""
+Materialised report statistics for the Campus Event Management System
+
+event_stats and student_stats hold running totals that the crud write path
+bumps in the same transaction as the fact row it inserts, so the reports read
+them in O(rows returned) instead of aggregating the fact tables per request.
+trend_stats holds the same totals per day, week and month of the fact
+timestamps and per event type and college, for the trend reports.
+
+Rebuild the tables from the fact tables or compare them against a full
+recompute with:
+
+    python -m app.stats rebuild
+    python -m app.stats check
+"""
+
+import argparse
+import logging
+import sys
+from datetime import date, timedelta
+from typing import Dict, List, Tuple
+from sqlmodel import Session, select, func
+from sqlalchemy import Date, Integer, String, bindparam, delete, exists, insert, literal, union_all
+
+from app.models import Student, Event, Registration, Attendance, Feedback, EventStats, StudentStats, TrendStats
+
+COUNTERS = ("registration_count", "attendance_count", "rating_sum", "rating_count")
+GRANULARITIES = ("day", "week", "month")
+TREND_KEY = ("granularity", "period", "event_type", "college_id")
+
+logger = logging.getLogger("app.stats")
+
+
+def _upsert(db: Session):
+    """Return the dialect's INSERT construct that supports ON CONFLICT"""
+    dialect = db.get_bind().dialect.name
+    if dialect == "postgresql":
+        from sqlalchemy.dialects.postgresql import insert as dialect_insert
+    elif dialect == "sqlite":
+        from sqlalchemy.dialects.sqlite import insert as dialect_insert
+    else:
+        raise NotImplementedError(f"Incremental statistics are not supported on {dialect}")
+    return dialect_insert
+
+
+def _add_on_conflict(stmt, table, keys):
+    """Make an upsert add its counters to the existing row with the same keys"""
+    return stmt.on_conflict_do_update(
+        index_elements=[table.c[key] for key in keys],
+        set_={name: table.c[name] + stmt.excluded[name] for name in COUNTERS},
+    )
+
+
+def _bump(db: Session, model, key: str, rows: List[dict]) -> None:
+    """Add each row's counter deltas to the stats row for its key, creating missing rows"""
+    if not rows:
+        return
+    table = model.__table__
+    stmt = _add_on_conflict(_upsert(db)(table), table, [key])
+    db.connection().execute(stmt, [{**dict.fromkeys(COUNTERS, 0), **row} for row in rows])
+
+
+def bump_event_stats(db: Session, rows: List[dict]) -> None:
+    """Apply counter deltas, given as dicts with an event_id, to event_stats"""
+    _bump(db, EventStats, "event_id", rows)
+
+
+def bump_student_stats(db: Session, rows: List[dict]) -> None:
+    """Apply counter deltas, given as dicts with a student_id, to student_stats"""
+    _bump(db, StudentStats, "student_id", rows)
+
+
+def period_start(day: date, granularity: str) -> date:
+    """First day of the day, week (starting Monday) or month containing day"""
+    if granularity == "week":
+        return day - timedelta(days=day.weekday())
+    if granularity == "month":
+        return day.replace(day=1)
+    return day
+
+
+def bump_trend_stats(db: Session, rows: List[dict]) -> None:
+    """Apply counter deltas, given as dicts with an event_id and a day, to trend_stats"""
+    totals: Dict[Tuple, Dict[str, int]] = {}
+    for row in rows:
+        for granularity in GRANULARITIES:
+            delta = totals.setdefault(
+                (granularity, period_start(row["day"], granularity), row["event_id"]), dict.fromkeys(COUNTERS, 0)
+            )
+            for name in COUNTERS:
+                delta[name] += row.get(name, 0)
+    if not totals:
+        return
+
+    # The event's type and college are read by the INSERT itself, saving a lookup per write
+    source = select(
+        bindparam("granularity", type_=String),
+        bindparam("period", type_=Date),
+        Event.event_type,
+        func.coalesce(Event.college_id, 0),
+        *(bindparam(name, type_=Integer) for name in COUNTERS),
+    ).where(Event.id == bindparam("event_id"))
+    table = TrendStats.__table__
+    stmt = _add_on_conflict(_upsert(db)(table).from_select(TREND_KEY + COUNTERS, source), table, TREND_KEY)
+    db.connection().execute(stmt, [
+        {"granularity": granularity, "period": period, "event_id": event_id, **delta}
+        for (granularity, period, event_id), delta in totals.items()
+    ])
+
+
+# Full recompute
+def _counts_by(key):
+    return select(key.label("key"), func.count().label("value")).group_by(key).subquery()
+
+
+def _recompute_query(entity, key: str):
+    """Statistics for every row of entity, aggregated from the fact tables"""
+    registrations = _counts_by(getattr(Registration, key))
+    attendance = _counts_by(getattr(Attendance, key))
+    ratings = (
+        select(
+            getattr(Feedback, key).label("key"),
+            func.sum(Feedback.rating).label("total"),
+            func.count().label("value"),
+        )
+        .group_by(getattr(Feedback, key))
+        .subquery()
+    )
+    return (
+        select(
+            entity.id.label(key),
+            func.coalesce(registrations.c.value, 0).label("registration_count"),
+            func.coalesce(attendance.c.value, 0).label("attendance_count"),
+            func.coalesce(ratings.c.total, 0).label("rating_sum"),
+            func.coalesce(ratings.c.value, 0).label("rating_count"),
+        )
+        .outerjoin(registrations, registrations.c.key == entity.id)
+        .outerjoin(attendance, attendance.c.key == entity.id)
+        .outerjoin(ratings, ratings.c.key == entity.id)
+    )
+
+
+STATS_TABLES = (
+    (EventStats, Event, "event_id"),
+    (StudentStats, Student, "student_id"),
+)
+
+
+def _recompute_trends(db: Session) -> Dict[Tuple, Tuple[int, ...]]:
+    """trend_stats rows keyed by TREND_KEY, aggregated from the fact tables"""
+    zero, one = literal(0), literal(1)
+    facts = union_all(
+        select(func.date(Registration.registered_at).label("day"), Registration.event_id.label("event_id"),
+               one.label("registration_count"), zero.label("attendance_count"),
+               zero.label("rating_sum"), zero.label("rating_count")),
+        select(func.date(Attendance.attended_at), Attendance.event_id, zero, one, zero, zero),
+        select(func.date(Feedback.submitted_at), Feedback.event_id, zero, zero, Feedback.rating, one),
+    ).subquery()
+    college = func.coalesce(Event.college_id, 0)
+    query = (
+        select(facts.c.day, Event.event_type, college, *(func.sum(facts.c[name]) for name in COUNTERS))
+        .join(Event, Event.id == facts.c.event_id)
+        .group_by(facts.c.day, Event.event_type, college)
+    )
+
+    totals: Dict[Tuple, Tuple[int, ...]] = {}
+    for day, event_type, college_id, *counts in db.exec(query):
+        # SQLite returns date() as text
+        day = date.fromisoformat(day) if isinstance(day, str) else day
+        for granularity in GRANULARITIES:
+            key = (granularity, period_start(day, granularity), event_type, college_id)
+            totals[key] = tuple(a + b for a, b in zip(totals.get(key, (0,) * len(COUNTERS)), counts))
+    return totals
+
+
+def rebuild_stats(db: Session) -> None:
+    """Recompute event_stats, student_stats and trend_stats from scratch in one transaction"""
+    try:
+        for model, entity, key in STATS_TABLES:
+            db.execute(delete(model))
+            db.execute(insert(model).from_select((key,) + COUNTERS, _recompute_query(entity, key)))
+        trends = _recompute_trends(db)
+        db.execute(delete(TrendStats))
+        if trends:
+            db.execute(insert(TrendStats), [dict(zip(TREND_KEY + COUNTERS, key + counts)) for key, counts in trends.items()])
+        db.commit()
+    except Exception:
+        db.rollback()
+        raise
+
+
+def stats_missing(db: Session) -> bool:
+    """Whether a stats table is empty although the rows it summarises exist, as in a database from before it"""
+    def any_rows(*models) -> bool:
+        return any(db.exec(select(exists().select_from(model))).one() for model in models)
+
+    return (
+        (any_rows(Event) and not any_rows(EventStats))
+        or (any_rows(Student) and not any_rows(StudentStats))
+        or (any_rows(Registration, Attendance, Feedback) and not any_rows(TrendStats))
+    )
+
+
+def ensure_stats(db: Session) -> bool:
+    """Rebuild the stats tables if they were never filled, returning whether they were rebuilt"""
+    if not stats_missing(db):
+        return False
+    logger.warning("Report statistics are missing for existing data; rebuilding them from the fact tables")
+    rebuild_stats(db)
+    logger.warning("Report statistics rebuilt")
+    return True
+
+
+def check_stats(db: Session) -> List[dict]:
+    """Compare the stats tables against a full recompute and return every row that differs"""
+    mismatches = []
+    for model, entity, key in STATS_TABLES:
+        expected: Dict[int, Tuple[int, ...]] = {
+            row[0]: tuple(row[1:]) for row in db.exec(_recompute_query(entity, key))
+        }
+        actual: Dict[int, Tuple[int, ...]] = {
+            row[0]: tuple(row[1:])
+            for row in db.exec(select(getattr(model, key), *(getattr(model, name) for name in COUNTERS)))
+        }
+        for row_id in sorted(expected.keys() | actual.keys()):
+            if expected.get(row_id) != actual.get(row_id):
+                mismatches.append({
+                    "table": model.__tablename__,
+                    "id": row_id,
+                    "expected": dict(zip(COUNTERS, expected[row_id])) if row_id in expected else None,
+                    "actual": dict(zip(COUNTERS, actual[row_id])) if row_id in actual else None,
+                })
+
+    expected = _recompute_trends(db)
+    actual = {
+        tuple(row[:len(TREND_KEY)]): tuple(row[len(TREND_KEY):])
+        for row in db.exec(select(*(getattr(TrendStats, name) for name in TREND_KEY + COUNTERS)))
+    }
+    for key in sorted(expected.keys() | actual.keys()):
+        if expected.get(key) != actual.get(key):
+            mismatches.append({
+                "table": TrendStats.__tablename__,
+                "id": dict(zip(TREND_KEY, key)),
+                "expected": dict(zip(COUNTERS, expected[key])) if key in expected else None,
+                "actual": dict(zip(COUNTERS, actual[key])) if key in actual else None,
+            })
+    return mismatches
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description="Maintain the materialised report statistics")
+    parser.add_argument("command", choices=["rebuild", "check"])
+    args = parser.parse_args()
+
+    from app.db import engine, create_db_and_tables
+
+    create_db_and_tables()
+    with Session(engine) as db:
+        if args.command == "rebuild":
+            rebuild_stats(db)
+            print("Rebuilt event_stats, student_stats and trend_stats")
+            return 0
+
+        mismatches = check_stats(db)
+        for mismatch in mismatches:
+            print(mismatch)
+        print(f"{len(mismatches)} mismatched rows")
+        return 1 if mismatches else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
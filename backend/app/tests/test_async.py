@@ -0,0 +1,122 @@
+"""
+Tests for the async database stack
+"""
+
+import pytest
+import sys
+import os
+from datetime import datetime
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+from sqlmodel import Session, SQLModel, create_engine
+from sqlmodel.ext.asyncio.session import AsyncSession
+from sqlalchemy.ext.asyncio import create_async_engine
+from sqlalchemy.pool import NullPool
+
+# Add the backend directory to Python path
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', '..'))
+
+from app.db import async_database_url, get_async_session
+from app.models import Event, Student, Registration
+from app.cache import response_cache
+from app.stats import rebuild_stats
+from app.routers import async_events, async_registrations, async_reports
+from app import async_crud
+
+
+@pytest.fixture(name="client")
+def client_fixture(tmp_path):
+    url = f"sqlite:///{tmp_path / 'async.db'}"
+    engine = create_engine(url)
+    SQLModel.metadata.create_all(engine)
+    with Session(engine) as session:
+        session.add(Event(id=1, title="Workshop", event_type="workshop",
+                          date=datetime(2024, 1, 15), location="Lab", max_participants=1))
+        session.add(Event(id=2, title="Seminar", event_type="seminar",
+                          date=datetime(2024, 1, 20), location="Auditorium"))
+        session.add(Student(id=1, name="Student 1", email="student1@test.edu", student_id="TS001"))
+        session.add(Student(id=2, name="Student 2", email="student2@test.edu", student_id="TS002"))
+        session.add(Registration(event_id=2, student_id=1))
+        session.commit()
+        rebuild_stats(session)
+    engine.dispose()
+
+    # TestClient runs each request on a fresh event loop, so connections must not be pooled across requests
+    async_engine = create_async_engine(async_database_url(url), poolclass=NullPool)
+
+    async def get_async_session_override():
+        async with AsyncSession(async_engine, expire_on_commit=False) as session:
+            yield session
+
+    app = FastAPI()
+    app.include_router(async_events.router, prefix="/events")
+    app.include_router(async_registrations.router, prefix="/events")
+    app.include_router(async_reports.router, prefix="/reports")
+    app.dependency_overrides[get_async_session] = get_async_session_override
+    response_cache.clear()
+    yield TestClient(app)
+
+
+def test_async_database_url():
+    """Test that sync URLs map onto async drivers"""
+    assert async_database_url("sqlite:///./campus_events.db") == "sqlite+aiosqlite:///./campus_events.db"
+    assert async_database_url("postgresql://u:p@db/campus") == "postgresql+asyncpg://u:p@db/campus"
+    assert async_database_url("postgresql+psycopg2://u:p@db/campus") == "postgresql+asyncpg://u:p@db/campus"
+
+
+def test_async_event_listing(client: TestClient):
+    """Test the async event listing, pagination and streaming"""
+    data = client.get("/events/").json()
+    assert [event["title"] for event in data] == ["Seminar", "Workshop"]
+    assert data[0]["registration_count"] == 1
+
+    response = client.get("/events/?limit=1")
+    assert len(response.json()) == 1
+    cursor = response.headers["X-Next-Cursor"]
+    assert client.get(f"/events/?limit=1&cursor={cursor}").json()[0]["title"] == "Workshop"
+
+    lines = client.get("/events/?format=ndjson").text.splitlines()
+    assert len(lines) == 2
+
+
+def test_async_event_listing_fast_json(client: TestClient, monkeypatch):
+    """Test that the async listing takes the FAST_JSON row path and matches the response models"""
+    standard = client.get("/events/?limit=1")
+    monkeypatch.setattr(response_cache, "fast_json", True)
+    response_cache.clear()
+    get_rows, served = async_crud.get_event_rows_with_stats, []
+
+    async def counted_rows(*args, **kwargs):
+        served.append(kwargs["limit"])
+        return await get_rows(*args, **kwargs)
+
+    monkeypatch.setattr(async_crud, "get_event_rows_with_stats", counted_rows)
+    fast = client.get("/events/?limit=1")
+
+    assert served == [1]
+    assert fast.json() == standard.json()
+    assert fast.headers["X-Next-Cursor"] == standard.headers["X-Next-Cursor"]
+
+
+def test_async_registration(client: TestClient):
+    """Test registration, capacity and waitlist on the async stack"""
+    response = client.post("/events/1/register", json={"student_id": 1})
+    assert response.status_code == 200
+    assert client.post("/events/1/register", json={"student_id": 1}).status_code == 409
+    assert client.post("/events/1/register", json={"student_id": 2}).status_code == 409
+    assert client.post("/events/1/register", json={"student_id": 2, "join_waitlist": True}).status_code == 202
+    assert client.post("/events/1/register", json={"student_id": 9}).status_code == 404
+
+    assert client.post("/events/1/attendance", json={"student_id": 1}).status_code == 200
+    assert client.post("/events/1/feedback", json={"student_id": 1, "rating": 4}).status_code == 200
+
+
+def test_async_reports(client: TestClient):
+    """Test the async reports"""
+    report = client.get("/reports/event-popularity").json()
+    assert report[0]["event_id"] == 2
+    assert report[0]["registration_count"] == 1
+
+    participation = client.get("/reports/student-participation?format=ndjson").text.splitlines()
+    assert len(participation) == 2
+    assert len(client.get("/reports/top-active-students").json()) == 2
@@ -0,0 +1,120 @@
+"""
+Tests for the bulk importer
+"""
+
+import json
+import pytest
+import sys
+import os
+from sqlmodel import Session, SQLModel, create_engine, select, func
+from sqlalchemy.pool import StaticPool
+
+# Add the backend directory to Python path
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', '..'))
+
+from app import crud
+from app.fixtures.bulk_import import import_file
+from app.models import Student, Event, Attendance, Feedback
+from app.stats import check_stats
+
+
+@pytest.fixture(name="session")
+def session_fixture():
+    engine = create_engine(
+        "sqlite:///:memory:",
+        connect_args={"check_same_thread": False},
+        poolclass=StaticPool,
+    )
+    SQLModel.metadata.create_all(engine)
+    with Session(engine) as session:
+        yield session
+
+
+def write(path, text: str) -> str:
+    path.write_text(text.strip() + "\n")
+    return str(path)
+
+
+@pytest.fixture(name="loaded")
+def loaded_fixture(session: Session, tmp_path):
+    """Import colleges, students and events through natural keys"""
+    import_file(session, "colleges", write(tmp_path / "colleges.csv", """
+name,location
+Tech University,San Francisco
+State College,Austin
+"""))
+    import_file(session, "students", write(tmp_path / "students.csv", """
+name,email,student_id,college
+Alice,alice@tech.edu,TU001,Tech University
+Bob,bob@state.edu,SC001,State College
+Carol,carol@tech.edu,TU002,
+"""))
+    import_file(session, "events", write(tmp_path / "events.ndjson", """
+{"title": "Python Workshop", "event_type": "workshop", "date": "2024-01-15T10:00:00", "location": "Lab", "college": "Tech University"}
+{"title": "Data Seminar", "event_type": "seminar", "date": "2024-01-20T14:00:00", "location": "Hall", "max_participants": "1"}
+"""))
+    return session
+
+
+def test_import_entities(loaded: Session):
+    """Test that natural keys are resolved to primary keys"""
+    alice = loaded.exec(select(Student).where(Student.student_id == "TU001")).one()
+    assert alice.college.name == "Tech University"
+    assert loaded.exec(select(Student).where(Student.student_id == "TU002")).one().college_id is None
+
+    workshop = loaded.exec(select(Event).where(Event.title == "Python Workshop")).one()
+    assert workshop.college.name == "Tech University"
+    assert check_stats(loaded) == []
+
+
+def test_import_rejects_bad_rows(loaded: Session, tmp_path):
+    """Test that unresolvable, duplicate and invalid rows are rejected with a reason"""
+    result = import_file(loaded, "attendance", write(tmp_path / "attendance.csv", """
+event_title,event_date,student_id,email
+Python Workshop,2024-01-15T10:00:00,TU001,
+Python Workshop,2024-01-15T10:00:00,,bob@state.edu
+Python Workshop,2024-01-15T10:00:00,TU001,
+Python Workshop,2024-01-15T10:00:00,XX999,
+Unknown Event,2024-01-15T10:00:00,TU002,
+"""), chunk_size=2)
+
+    assert (result.read, result.inserted) == (5, 2)
+    assert [(reject["line"], reject["reason"]) for reject in result.rejected] == [
+        (4, "Duplicate row"),
+        (5, "Unknown student_id 'XX999'"),
+        (6, "Unknown event 'Unknown Event' on 2024-01-15T10:00:00"),
+    ]
+    assert result.rows_per_second > 0
+
+    # A second run rejects rows that are already stored
+    again = import_file(loaded, "attendance", str(tmp_path / "attendance.csv"))
+    assert again.inserted == 0
+    assert loaded.exec(select(func.count()).select_from(Attendance)).one() == 2
+
+    duplicate = import_file(loaded, "students", write(tmp_path / "more_students.csv", """
+name,email,student_id
+Alice Again,alice@tech.edu,TU009
+"""))
+    assert duplicate.rejected[0]["reason"] == "Duplicate email 'alice@tech.edu'"
+
+
+def test_import_facts_update_report_statistics(loaded: Session, tmp_path):
+    """Test that imported facts are reflected in the reports, ignoring event capacity"""
+    workshop = loaded.exec(select(Event.id).where(Event.title == "Data Seminar")).one()
+    import_file(loaded, "registrations", write(tmp_path / "registrations.ndjson", "\n".join(
+        json.dumps({"event_id": workshop, "student_id": code}) for code in ["TU001", "SC001"]
+    )))
+    result = import_file(loaded, "feedback", write(tmp_path / "feedback.ndjson", "\n".join([
+        json.dumps({"event_id": workshop, "student_id": "TU001", "rating": 4, "comment": "Good"}),
+        json.dumps({"event_id": workshop, "email": "bob@state.edu", "rating": "2"}),
+        json.dumps({"event_id": workshop, "student_id": "TU002", "rating": 9}),
+    ])))
+
+    assert result.inserted == 2
+    assert result.rejected[0]["reason"] == "Rating must be between 1 and 5"
+    assert loaded.exec(select(func.count()).select_from(Feedback)).one() == 2
+    assert check_stats(loaded) == []
+
+    report = {row["event_id"]: row for row in crud.get_event_popularity_report(loaded)}
+    assert report[workshop]["registration_count"] == 2
+    assert report[workshop]["avg_rating"] == 3.0
@@ -0,0 +1,153 @@
+"""
+Tests for the response cache
+"""
+
+import pytest
+import sys
+import os
+import time
+from datetime import datetime
+from fastapi.testclient import TestClient
+from sqlmodel import Session, SQLModel, create_engine
+from sqlalchemy import event as sa_event
+from sqlalchemy.pool import StaticPool
+
+# Add the backend directory to Python path
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', '..'))
+
+from app.main import app
+from app.cache import FakeRedis, MemoryCache, RedisCache, response_cache
+from app.db import get_session
+from app.models import Event, Student
+from app.stats import rebuild_stats
+
+
+@pytest.fixture(name="engine")
+def engine_fixture():
+    engine = create_engine(
+        "sqlite:///:memory:",
+        connect_args={"check_same_thread": False},
+        poolclass=StaticPool,
+    )
+    SQLModel.metadata.create_all(engine)
+    with Session(engine) as session:
+        session.add(Event(id=1, title="Workshop", event_type="workshop", date=datetime(2024, 1, 15), location="Lab"))
+        session.add(Event(id=2, title="Seminar", event_type="seminar", date=datetime(2024, 1, 20), location="Hall"))
+        for i in range(1, 4):
+            session.add(Student(id=i, name=f"Student {i}", email=f"student{i}@test.edu", student_id=f"TS{i:03d}"))
+        session.commit()
+        rebuild_stats(session)
+    yield engine
+
+
+@pytest.fixture(name="client", params=["memory", "redis"])
+def client_fixture(request, engine, monkeypatch):
+    backend = MemoryCache() if request.param == "memory" else RedisCache(FakeRedis())
+    monkeypatch.setattr(response_cache, "backend", backend)
+
+    def get_session_override():
+        with Session(engine) as session:
+            yield session
+
+    app.dependency_overrides[get_session] = get_session_override
+    yield TestClient(app)
+    app.dependency_overrides.clear()
+
+
+def count_statements(engine, client: TestClient, url: str, **kwargs):
+    statements = []
+
+    def before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+        statements.append(statement)
+
+    sa_event.listen(engine, "before_cursor_execute", before_cursor_execute)
+    try:
+        response = client.get(url, **kwargs)
+    finally:
+        sa_event.remove(engine, "before_cursor_execute", before_cursor_execute)
+    return response, len(statements)
+
+
+def test_repeated_requests_are_served_from_cache(engine, client: TestClient):
+    """Test that an unchanged report is served without touching the database"""
+    first, statements = count_statements(engine, client, "/reports/event-popularity")
+    assert first.status_code == 200
+    assert statements > 0
+
+    second, statements = count_statements(engine, client, "/reports/event-popularity")
+    assert second.json() == first.json()
+    assert second.headers["ETag"] == first.headers["ETag"]
+    assert statements == 0
+
+
+def test_if_none_match_returns_304(client: TestClient):
+    """Test that a client holding the current ETag gets an empty 304"""
+    etag = client.get("/events/").headers["ETag"]
+
+    response = client.get("/events/", headers={"If-None-Match": etag})
+    assert response.status_code == 304
+    assert response.content == b""
+    assert response.headers["ETag"] == etag
+
+
+def test_query_parameters_are_part_of_the_key(client: TestClient):
+    """Test that differently filtered listings are cached separately"""
+    workshops = client.get("/events/?event_type=workshop").json()
+    seminars = client.get("/events/?event_type=seminar").json()
+    assert [event["title"] for event in workshops] == ["Workshop"]
+    assert [event["title"] for event in seminars] == ["Seminar"]
+
+    page = client.get("/events/?limit=1")
+    assert len(page.json()) == 1
+    assert client.get("/events/?limit=1").headers["X-Next-Cursor"] == page.headers["X-Next-Cursor"]
+
+
+def test_writes_invalidate_dependent_responses(client: TestClient):
+    """Test that registrations, attendance, feedback and new events refresh the cached responses"""
+    etag = client.get("/reports/event-popularity").headers["ETag"]
+
+    assert client.post("/events/1/register", json={"student_id": 1}).status_code == 200
+    response = client.get("/reports/event-popularity", headers={"If-None-Match": etag})
+    assert response.status_code == 200
+    assert {row["event_id"]: row["registration_count"] for row in response.json()}[1] == 1
+
+    client.post("/events/1/attendance", json={"student_id": 1})
+    assert client.get("/reports/top-active-students").json()[0]["events_attended"] == 1
+
+    client.post("/events/1/feedback", json={"student_id": 1, "rating": 4})
+    assert client.get("/events/?event_type=workshop").json()[0]["avg_rating"] == 4.0
+
+    client.post("/events/", json={"title": "Hackathon", "event_type": "competition",
+                                  "date": "2024-02-01T09:00:00", "location": "Hall"})
+    assert "Hackathon" in [event["title"] for event in client.get("/events/").json()]
+
+
+def test_failed_writes_keep_the_cache(engine, client: TestClient):
+    """Test that a rejected write does not invalidate anything"""
+    client.post("/events/2/register", json={"student_id": 2})
+    client.get("/reports/student-participation")
+
+    assert client.post("/events/2/register", json={"student_id": 2}).status_code == 409
+    _, statements = count_statements(engine, client, "/reports/student-participation")
+    assert statements == 0
+
+
+def test_memory_cache_evicts_and_expires():
+    """Test LRU eviction and TTL expiry of the in-process backend"""
+    cache = MemoryCache(max_entries=2)
+    cache.set("a", b"1")
+    cache.set("b", b"2")
+    cache.get("a")
+    cache.set("c", b"3")
+    assert cache.get("b") is None
+    assert cache.get("a") == b"1"
+
+    cache.set("short", b"x", ttl=0.01)
+    time.sleep(0.02)
+    assert cache.get("short") is None
+
+    # Tag versions survive eviction
+    cache.incr("tag:events")
+    for i in range(5):
+        cache.set(str(i), b"")
+    assert cache.get("tag:events") == b"1"
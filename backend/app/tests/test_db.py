@@ -0,0 +1,112 @@
+"""
+Tests for the engine configuration layer
+"""
+
+import pytest
+import sys
+import os
+import shutil
+from datetime import datetime
+from sqlalchemy import inspect
+from sqlalchemy.exc import OperationalError
+from sqlmodel import Session, SQLModel
+
+# Add the backend directory to Python path
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', '..'))
+
+from app import crud
+from app.config import Settings
+from app.db import create_db_engine, create_missing_indexes, engine_options
+from app.models import Event, Student
+from app.schemas import AttendanceCreate, RegistrationCreate
+
+
+def test_settings_from_env():
+    """Test that settings are read from upper-cased environment variables"""
+    config = Settings.from_env({"ASYNC_DB": "true", "DB_POOL_SIZE": "7", "SQLITE_JOURNAL_MODE": "DELETE"})
+    assert config.async_db is True
+    assert config.db_pool_size == 7
+    assert config.sqlite_journal_mode == "DELETE"
+    assert config.db_max_overflow == Settings().db_max_overflow
+
+
+def test_engine_options():
+    """Test pool options per backend"""
+    config = Settings(db_pool_size=12, db_max_overflow=3)
+
+    postgres = engine_options("postgresql://user:secret@db/campus", config)
+    assert postgres["pool_size"] == 12
+    assert postgres["max_overflow"] == 3
+    assert postgres["pool_pre_ping"] is True
+
+    sqlite_file = engine_options("sqlite:///./campus_events.db", config)
+    assert sqlite_file["pool_size"] == 12
+    assert sqlite_file["connect_args"]["check_same_thread"] is False
+
+    assert "pool_size" not in engine_options("sqlite:///:memory:", config)
+    assert "pool_size" not in engine_options("sqlite://", config)
+
+
+def test_sqlite_pragmas(tmp_path):
+    """Test that every connection gets the configured pragmas"""
+    config = Settings(sqlite_busy_timeout_ms=1234, sqlite_cache_size_kib=2048)
+    engine = create_db_engine(f"sqlite:///{tmp_path / 'pragmas.db'}", config)
+
+    with engine.connect() as connection:
+        pragma = lambda name: connection.exec_driver_sql(f"PRAGMA {name}").scalar()
+        assert pragma("foreign_keys") == 1
+        assert pragma("journal_mode") == "wal"
+        assert pragma("synchronous") == 1  # NORMAL
+        assert pragma("busy_timeout") == 1234
+        assert pragma("cache_size") == -2048
+    engine.dispose()
+
+
+@pytest.mark.parametrize("journal_mode, writer_blocked", [("WAL", False), ("DELETE", True)])
+def test_open_report_does_not_block_writer(tmp_path, journal_mode, writer_blocked):
+    """Test that in WAL mode a registration commits while a report read is still open"""
+    config = Settings(sqlite_journal_mode=journal_mode, sqlite_busy_timeout_ms=100)
+    engine = create_db_engine(f"sqlite:///{tmp_path / 'wal.db'}", config)
+    SQLModel.metadata.create_all(engine)
+    with Session(engine) as session:
+        session.add(Event(id=1, title="Workshop", event_type="workshop", date=datetime(2024, 1, 1), location="Lab"))
+        session.add(Student(id=1, name="Student", email="student@test.edu", student_id="TS001"))
+        session.commit()
+
+    reader = engine.raw_connection()
+    try:
+        # Hold a read transaction open, as a long report query would
+        cursor = reader.cursor()
+        cursor.execute("BEGIN")
+        cursor.execute("SELECT count(*) FROM registrations").fetchall()
+
+        with Session(engine) as session:
+            if writer_blocked:
+                with pytest.raises(OperationalError):
+                    crud.create_registration(session, 1, RegistrationCreate(student_id=1))
+            else:
+                assert crud.create_registration(session, 1, RegistrationCreate(student_id=1)).id
+        cursor.execute("ROLLBACK")
+    finally:
+        reader.close()
+    engine.dispose()
+
+
+def test_existing_database_gets_missing_indexes(tmp_path):
+    """Test that the shipped database, created before the unique indexes, rejects duplicate attendance once migrated"""
+    path = tmp_path / "campus_events.db"
+    shutil.copy(os.path.join(os.path.dirname(__file__), '..', '..', 'campus_events.db'), path)
+    engine = create_db_engine(f"sqlite:///{path}")
+    SQLModel.metadata.create_all(engine)
+    create_missing_indexes(engine)
+    create_missing_indexes(engine)
+
+    indexes = {index["name"]: index for index in inspect(engine).get_indexes("attendance")}
+    assert indexes["uq_attendance_event_student"]["unique"]
+    event_indexes = {index["name"] for index in inspect(engine).get_indexes("events")}
+    assert {"ix_events_date", "ix_events_college_date", "ix_events_type_date"} <= event_indexes
+    with Session(engine) as session:
+        assert crud.create_attendance(session, 1, AttendanceCreate(student_id=2)).id
+        with pytest.raises(ValueError):
+            crud.create_attendance(session, 1, AttendanceCreate(student_id=2))
+    engine.dispose()
@@ -0,0 +1,262 @@
+"""
+Tests for the events endpoints
+"""
+
+import pytest
+import sys
+import os
+import json
+import time
+from datetime import datetime, timedelta
+from fastapi.testclient import TestClient
+from sqlmodel import Session, SQLModel, create_engine, select
+from sqlalchemy import event as sa_event
+from sqlalchemy.pool import StaticPool
+
+# Add the backend directory to Python path
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', '..'))
+
+from app.main import app
+from app.cache import response_cache
+from app.db import get_session
+from app.models import Event, Student, College, Registration, Attendance, Feedback
+from app.stats import rebuild_stats
+
+
+@pytest.fixture(name="engine")
+def engine_fixture():
+    engine = create_engine(
+        "sqlite:///:memory:",
+        connect_args={"check_same_thread": False},
+        poolclass=StaticPool,
+    )
+    SQLModel.metadata.create_all(engine)
+    yield engine
+
+
+@pytest.fixture(name="session")
+def session_fixture(engine):
+    with Session(engine) as session:
+        yield session
+
+
+@pytest.fixture(name="client")
+def client_fixture(session: Session):
+    def get_session_override():
+        return session
+
+    app.dependency_overrides[get_session] = get_session_override
+    response_cache.clear()
+    client = TestClient(app)
+    yield client
+    app.dependency_overrides.clear()
+
+
+def add_events(session: Session, count: int):
+    """Create a college, two students and `count` events that each have registrations, attendance and feedback"""
+    college = College(name="Test University", location="Test City")
+    session.add(college)
+    session.commit()
+
+    students = [
+        Student(name=f"Student {i}", email=f"student{i}@test.edu", student_id=f"TS{i:03d}", college_id=college.id)
+        for i in range(2)
+    ]
+    session.add_all(students)
+    session.commit()
+
+    for i in range(count):
+        event = Event(
+            title=f"Event {i}", event_type="workshop", date=datetime(2024, 1, 1) + timedelta(days=i),
+            location="Hall", college_id=college.id,
+        )
+        session.add(event)
+        session.commit()
+        session.add_all([
+            Registration(event_id=event.id, student_id=students[0].id),
+            Registration(event_id=event.id, student_id=students[1].id),
+            Attendance(event_id=event.id, student_id=students[0].id),
+            Feedback(event_id=event.id, student_id=students[0].id, rating=5),
+            Feedback(event_id=event.id, student_id=students[1].id, rating=2),
+        ])
+        session.commit()
+    rebuild_stats(session)
+
+
+def count_statements(engine, client: TestClient, url: str) -> int:
+    statements = []
+
+    def before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+        statements.append(statement)
+
+    sa_event.listen(engine, "before_cursor_execute", before_cursor_execute)
+    try:
+        response = client.get(url)
+    finally:
+        sa_event.remove(engine, "before_cursor_execute", before_cursor_execute)
+    assert response.status_code == 200
+    return len(statements)
+
+
+def test_get_events_includes_statistics(session: Session, client: TestClient):
+    """Test that event listings carry aggregated statistics"""
+    add_events(session, 2)
+
+    response = client.get("/events/")
+    assert response.status_code == 200
+
+    data = response.json()
+    assert [event["title"] for event in data] == ["Event 1", "Event 0"]
+    for event in data:
+        assert event["registration_count"] == 2
+        assert event["attendance_count"] == 1
+        assert event["avg_rating"] == 3.5
+
+
+def test_get_events_without_activity(session: Session, client: TestClient):
+    """Test that events without registrations report zero counts"""
+    session.add(Event(title="Quiet Event", event_type="seminar", date=datetime(2024, 1, 1), location="Room 1"))
+    session.commit()
+
+    data = client.get("/events/").json()
+    assert data[0]["registration_count"] == 0
+    assert data[0]["attendance_count"] == 0
+    assert data[0]["avg_rating"] is None
+
+
+def test_get_events_statement_count_is_constant(engine, session: Session, client: TestClient):
+    """Test that listing events does not issue per-event queries"""
+    add_events(session, 1)
+    baseline = count_statements(engine, client, "/events/")
+
+    for i in range(25):
+        session.add(Event(title=f"Extra {i}", event_type="seminar", date=datetime(2024, 6, 1), location="Hall"))
+    session.commit()
+    # Rows added behind the routers' back do not invalidate the cached listing
+    response_cache.clear()
+
+    assert count_statements(engine, client, "/events/") == baseline
+
+
+def test_get_events_keyset_pagination(session: Session, client: TestClient):
+    """Test that following the next cursor walks every event exactly once"""
+    add_events(session, 5)
+    # Two events on the same date exercise the id tiebreak
+    session.add(Event(title="Same Day", event_type="seminar", date=datetime(2024, 1, 3), location="Hall"))
+    session.commit()
+
+    titles = []
+    url = "/events/?limit=2"
+    while url:
+        response = client.get(url)
+        assert response.status_code == 200
+        assert len(response.json()) <= 2
+        titles.extend(event["title"] for event in response.json())
+        cursor = response.headers.get("X-Next-Cursor")
+        url = f"/events/?limit=2&cursor={cursor}" if cursor else None
+
+    assert titles == [event["title"] for event in client.get("/events/").json()]
+    assert len(titles) == 6
+
+
+def test_get_events_fast_json_matches_models(session: Session, client: TestClient, monkeypatch):
+    """Test that the fast JSON path returns the same listing and cursors as the response models"""
+    add_events(session, 3)
+    session.add(Event(title="Quiet Event", event_type="seminar", date=datetime(2024, 1, 2, 9, 30), location="Room 1"))
+    session.commit()
+
+    standard = client.get("/events/?limit=2")
+    monkeypatch.setattr(response_cache, "fast_json", True)
+    response_cache.clear()
+    fast = client.get("/events/?limit=2")
+
+    assert fast.json() == standard.json()
+    assert fast.headers["X-Next-Cursor"] == standard.headers["X-Next-Cursor"]
+
+
+def test_get_events_ndjson_stream(session: Session, client: TestClient):
+    """Test that the NDJSON mode streams one event per line"""
+    add_events(session, 3)
+
+    response = client.get("/events/?format=ndjson")
+    assert response.status_code == 200
+    assert response.headers["content-type"].startswith("application/x-ndjson")
+
+    lines = [json.loads(line) for line in response.text.splitlines()]
+    assert lines == client.get("/events/").json()
+
+
+def test_get_events_invalid_cursor(client: TestClient):
+    """Test that a malformed cursor is rejected"""
+    response = client.get("/events/?limit=2&cursor=not-a-cursor")
+    assert response.status_code == 400
+
+
+def test_get_events_date_range_and_order(session: Session, client: TestClient):
+    """Test that from is inclusive, to exclusive, and order=asc lists the soonest first"""
+    add_events(session, 5)
+
+    response = client.get("/events/?from=2024-01-02T00:00:00&to=2024-01-04T00:00:00&order=asc")
+    assert [event["title"] for event in response.json()] == ["Event 1", "Event 2"]
+
+    # Ascending keyset pagination
+    first = client.get("/events/?order=asc&limit=3")
+    cursor = first.headers["X-Next-Cursor"]
+    second = client.get(f"/events/?order=asc&limit=3&cursor={cursor}")
+    assert [event["title"] for event in first.json() + second.json()] == [f"Event {i}" for i in range(5)]
+
+    assert client.get("/events/?from=2024-01-04T00:00:00&to=2024-01-02T00:00:00").status_code == 400
+
+    # Plain dates mean midnight
+    response = client.get("/events/?from=2024-01-02&to=2024-01-04&order=asc")
+    assert [event["title"] for event in response.json()] == ["Event 1", "Event 2"]
+
+    # Times with an offset are converted to UTC, as the dates are stored
+    response = client.get("/events/?from=2024-01-02T05:30:00%2B05:30&to=2024-01-04T00:00:00&order=asc")
+    assert [event["title"] for event in response.json()] == ["Event 1", "Event 2"]
+    response = client.get("/events/?from=2024-01-02T00:00:00Z&to=2024-01-03T00:00:00-01:00&order=asc")
+    assert [event["title"] for event in response.json()] == ["Event 1", "Event 2"]
+
+    # A cursor only continues a listing in the order it was issued for
+    response = client.get(f"/events/?order=desc&limit=3&cursor={cursor}")
+    assert response.status_code == 400
+    assert response.json()["detail"] == "Cursor belongs to a listing with order=asc"
+
+
+def test_get_events_upcoming_location_and_capacity(session: Session, client: TestClient):
+    """Test the upcoming, location and free seat filters"""
+    add_events(session, 2)
+    soon = datetime.utcnow() + timedelta(days=3)
+    session.add_all([
+        Event(title="Upcoming Talk", event_type="talk", date=soon, location="Library", max_participants=1),
+        Event(title="Upcoming Open Day", event_type="talk", date=soon, location="Hall"),
+        Event(title="Full Past Workshop", event_type="workshop", date=datetime(2023, 1, 1), location="Hall",
+              max_participants=0),
+    ])
+    session.commit()
+
+    titles = lambda url: sorted(event["title"] for event in client.get(url).json())
+    assert titles("/events/?upcoming_only=true") == ["Upcoming Open Day", "Upcoming Talk"]
+    assert titles("/events/?upcoming_only=true&location=Library") == ["Upcoming Talk"]
+    assert "Full Past Workshop" not in titles("/events/?has_capacity=true")
+    assert "Event 0" in titles("/events/?has_capacity=true")
+
+    student = session.exec(select(Student)).first()
+    talk = session.exec(select(Event).where(Event.title == "Upcoming Talk")).one()
+    assert client.post(f"/events/{talk.id}/register", json={"student_id": student.id}).status_code == 200
+    assert titles("/events/?upcoming_only=true&has_capacity=true") == ["Upcoming Open Day"]
+
+
+def test_upcoming_listing_cache_expires_when_an_event_starts(session: Session, client: TestClient):
+    """Test that a cached upcoming listing drops an event once it has started"""
+    session.add_all([
+        Event(title="Starting Soon", event_type="talk", date=datetime.utcnow() + timedelta(seconds=0.5),
+              location="Library"),
+        Event(title="Next Week", event_type="talk", date=datetime.utcnow() + timedelta(days=7), location="Hall"),
+    ])
+    session.commit()
+
+    titles = lambda: [event["title"] for event in client.get("/events/?upcoming_only=true").json()]
+    assert titles() == ["Next Week", "Starting Soon"]
+    time.sleep(0.6)
+    assert titles() == ["Next Week"]
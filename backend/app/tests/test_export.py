@@ -0,0 +1,126 @@
+"""
+Tests for the columnar table export
+"""
+
+import csv
+import gzip
+import io
+import pytest
+import sys
+import os
+from datetime import datetime
+from fastapi.testclient import TestClient
+from sqlmodel import Session, SQLModel, create_engine
+from sqlalchemy.pool import StaticPool
+
+# Add the backend directory to Python path
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', '..'))
+
+from app.main import app
+from app.db import get_session
+from app.export import stream_export, _pyarrow
+from app.models import Student, Event, Registration
+
+
+@pytest.fixture(name="session")
+def session_fixture():
+    engine = create_engine(
+        "sqlite:///:memory:",
+        connect_args={"check_same_thread": False},
+        poolclass=StaticPool,
+    )
+    SQLModel.metadata.create_all(engine)
+    with Session(engine) as session:
+        session.add(Event(id=1, title="Workshop", event_type="workshop", date=datetime(2024, 3, 10), location="Lab"))
+        for i in range(1, 6):
+            session.add(Student(id=i, name=f"Student {i}", email=f"s{i}@example.edu", student_id=f"S{i}"))
+            # One registration per day from March 1st
+            session.add(Registration(event_id=1, student_id=i, registered_at=datetime(2024, 3, i, 12)))
+        session.commit()
+        yield session
+
+
+@pytest.fixture(name="client")
+def client_fixture(session: Session):
+    def get_session_override():
+        return session
+
+    app.dependency_overrides[get_session] = get_session_override
+    client = TestClient(app)
+    yield client
+    app.dependency_overrides.clear()
+
+
+def read_csv(data: bytes) -> list:
+    return list(csv.DictReader(io.StringIO(gzip.decompress(data).decode())))
+
+
+def test_export_csv(client: TestClient):
+    """Test that a table is exported as gzip CSV with a header row"""
+    response = client.get("/exports/registrations?format=csv")
+    assert response.status_code == 200
+    assert response.headers["content-type"] == "application/gzip"
+    assert 'filename="registrations.csv.gz"' in response.headers["content-disposition"]
+
+    rows = read_csv(response.content)
+    assert [row["student_id"] for row in rows] == ["1", "2", "3", "4", "5"]
+    assert rows[0]["registered_at"] == "2024-03-01T12:00:00"
+
+
+def test_export_incremental_window(client: TestClient):
+    """Test that since is inclusive and until exclusive, so consecutive windows do not overlap"""
+    first = read_csv(client.get("/exports/registrations?format=csv&until=2024-03-03T12:00:00").content)
+    second = read_csv(client.get("/exports/registrations?format=csv&since=2024-03-03T12:00:00").content)
+    assert [row["student_id"] for row in first] == ["1", "2"]
+    assert [row["student_id"] for row in second] == ["3", "4", "5"]
+
+    empty = read_csv(client.get("/exports/registrations?format=csv&since=2025-01-01T00:00:00").content)
+    assert empty == []
+
+    # Bounds with a UTC offset are compared with the stored naive UTC timestamps
+    shifted = read_csv(client.get(
+        "/exports/registrations?format=csv&since=2024-03-03T14:00:00%2B02:00&until=2024-03-10T00:00:00"
+    ).content)
+    assert [row["student_id"] for row in shifted] == ["3", "4", "5"]
+
+
+def test_export_errors(client: TestClient):
+    """Test that bad tables and windows are rejected before streaming"""
+    assert client.get("/exports/event_stats").status_code == 404
+    response = client.get("/exports/registrations?since=2024-03-05T00:00:00&until=2024-03-01T00:00:00")
+    assert response.status_code == 400
+    response = client.get("/exports/registrations?format=csv&since=2024-03-05T00:00:00Z&until=2024-03-01T00:00:00")
+    assert response.status_code == 400
+
+
+@pytest.mark.skipif(_pyarrow() is not None, reason="pyarrow is installed")
+def test_export_without_pyarrow(client: TestClient):
+    """Test that the export falls back to CSV and refuses binary formats without pyarrow"""
+    response = client.get("/exports/students")
+    assert response.headers["content-type"] == "application/gzip"
+    assert client.get("/exports/students?format=parquet").status_code == 400
+
+
+def test_export_reads_in_chunks(session: Session):
+    """Test that every chunk is read and compressed into one valid gzip stream"""
+    chunks = []
+    file_format, data = stream_export(session, "registrations", "csv", chunk_size=2, on_chunk=chunks.append)
+    rows = read_csv(b"".join(data))
+
+    assert file_format == "csv"
+    assert chunks == [2, 2, 1]
+    assert len(rows) == 5
+
+
+@pytest.mark.parametrize("file_format", ["parquet", "arrow"])
+def test_export_arrow_formats(session: Session, file_format: str):
+    """Test that Parquet and Arrow IPC exports round-trip through pyarrow"""
+    pa = pytest.importorskip("pyarrow")
+    import pyarrow.parquet as pq
+
+    _, data = stream_export(session, "registrations", file_format, since=datetime(2024, 3, 2), chunk_size=2)
+    buffer = pa.BufferReader(b"".join(data))
+    table = pq.read_table(buffer) if file_format == "parquet" else pa.ipc.open_stream(buffer).read_all()
+
+    assert table.column("student_id").to_pylist() == [2, 3, 4, 5]
+    assert table.schema.field("registered_at").type == pa.timestamp("us")
@@ -0,0 +1,60 @@
+"""
+Tests for the synthetic data generator
+"""
+
+import pytest
+import sys
+import os
+from sqlmodel import Session, SQLModel, create_engine, select, func
+from sqlalchemy.pool import StaticPool
+
+# Add the backend directory to Python path
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', '..'))
+
+from app.fixtures.generate_data import GeneratorConfig, generate
+from app.models import Event, Registration, Attendance, Feedback
+from app.stats import check_stats
+
+
+def generated(config: GeneratorConfig) -> Session:
+    engine = create_engine(
+        "sqlite:///:memory:",
+        connect_args={"check_same_thread": False},
+        poolclass=StaticPool,
+    )
+    SQLModel.metadata.create_all(engine)
+    session = Session(engine)
+    generate(session, config)
+    return session
+
+
+def test_same_seed_same_dataset():
+    """Test that the generator is reproducible and the seed changes the data"""
+    config = GeneratorConfig(students=300, events=20, density=0.1)
+    rows = lambda db: db.exec(
+        select(Registration.event_id, Registration.student_id).order_by(Registration.event_id, Registration.student_id)
+    ).all()
+
+    first, second = generated(config), generated(config)
+    other = generated(GeneratorConfig(students=300, events=20, density=0.1, seed=7))
+    assert rows(first) == rows(second)
+    assert rows(first) != rows(other)
+
+
+def test_dataset_shape():
+    """Test the row counts follow the configured rates and the data obeys the write rules"""
+    db = generated(GeneratorConfig(students=1000, events=50, density=0.05, attendance_rate=0.5, feedback_rate=0.5))
+    count = lambda model: db.exec(select(func.count()).select_from(model)).one()
+
+    registrations, attendance, feedback = count(Registration), count(Attendance), count(Feedback)
+    assert 1000 < registrations < 5000
+    assert 0.4 < attendance / registrations < 0.6
+    assert 0.4 < feedback / attendance < 0.6
+
+    over_capacity = db.exec(
+        select(func.count()).select_from(Event).where(
+            Event.max_participants < select(func.count()).where(Registration.event_id == Event.id).scalar_subquery()
+        )
+    ).one()
+    assert over_capacity == 0
+    assert check_stats(db) == []
@@ -0,0 +1,171 @@
+"""
+Tests for the group-commit writer behind the register and attendance endpoints
+"""
+
+import pytest
+import sys
+import os
+import threading
+from datetime import datetime
+from fastapi.testclient import TestClient
+from sqlalchemy.exc import OperationalError
+from sqlmodel import Session, SQLModel, select, func
+
+# Add the backend directory to Python path
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', '..'))
+
+from app.main import app
+from app.cache import response_cache
+from app.db import create_db_engine, get_session
+from app.group_commit import GroupCommitWriter
+from app.models import Event, Student, Registration, Attendance, EventStats, StudentStats
+from app.routers import registrations as registrations_router
+from app.stats import rebuild_stats
+from app import crud
+
+
+@pytest.fixture(name="engine")
+def engine_fixture(tmp_path):
+    engine = create_db_engine(f"sqlite:///{tmp_path / 'group.db'}")
+    SQLModel.metadata.create_all(engine)
+    with Session(engine) as session:
+        session.add(Event(id=1, title="Small Workshop", event_type="workshop",
+                          date=datetime(2024, 1, 15), location="Lab", max_participants=3))
+        session.add(Event(id=2, title="Open Seminar", event_type="seminar",
+                          date=datetime(2024, 1, 20), location="Auditorium"))
+        for i in range(1, 7):
+            session.add(Student(id=i, name=f"Student {i}", email=f"student{i}@test.edu", student_id=f"TS{i:03d}"))
+        session.commit()
+        rebuild_stats(session)
+    yield engine
+    engine.dispose()
+
+
+@pytest.fixture(name="commits")
+def commits_fixture():
+    return []
+
+
+@pytest.fixture(name="writer")
+def writer_fixture(engine, commits):
+    class CountingSession(Session):
+        def commit(self):
+            super().commit()
+            commits.append(1)
+
+    writer = GroupCommitWriter(max_rows=100, max_wait_ms=50,
+                               session_factory=lambda: CountingSession(engine, expire_on_commit=False))
+    yield writer
+    writer.shutdown()
+
+
+def outcome(future):
+    try:
+        return future.result(timeout=10)
+    except Exception as e:
+        return e
+
+
+def test_batch_is_committed_once_with_individual_results(engine, writer: GroupCommitWriter, commits):
+    """Test that writes queued together share one commit and each gets its own outcome"""
+    futures = [writer.submit_registration(1, student_id) for student_id in (1, 2, 1, 3, 4, 99)]
+    futures += [writer.submit_registration(42, 1), writer.submit_attendance(2, 5), writer.submit_attendance(2, 5)]
+    results = [outcome(future) for future in futures]
+
+    accepted = [results[i] for i in (0, 1, 3)]
+    assert all(isinstance(row, Registration) and row.id for row in accepted)
+    assert [row.student_id for row in accepted] == [1, 2, 3]
+    assert str(results[2]) == "Student is already registered for this event"
+    assert isinstance(results[4], crud.EventFullError)
+    assert (type(results[5]), str(results[5])) == (LookupError, "Student not found")
+    assert (type(results[6]), str(results[6])) == (LookupError, "Event not found")
+    assert isinstance(results[7], Attendance) and results[7].id
+    assert str(results[8]) == "Attendance is already marked for this student"
+    assert len(commits) == 1
+
+    with Session(engine) as session:
+        assert session.exec(select(func.count()).select_from(Registration)).one() == 3
+        assert session.get(EventStats, 1).registration_count == 3
+        assert session.get(EventStats, 2).attendance_count == 1
+        assert session.get(StudentStats, 5).attendance_count == 1
+
+
+def test_failed_batch_is_retried_row_by_row(engine, commits):
+    """Test that when a batch commit fails its writes still go through one at a time"""
+    class FlakySession(Session):
+        def commit(self):
+            if not commits:
+                commits.append("failed")
+                raise OperationalError("COMMIT", {}, Exception("disk I/O error"))
+            super().commit()
+            commits.append(1)
+
+    writer = GroupCommitWriter(max_wait_ms=50, session_factory=lambda: FlakySession(engine, expire_on_commit=False))
+    futures = [writer.submit_registration(2, student_id) for student_id in (1, 2, 2)]
+    results = [outcome(future) for future in futures]
+    writer.shutdown()
+
+    assert [row.student_id for row in results[:2]] == [1, 2]
+    assert str(results[2]) == "Student is already registered for this event"
+    assert commits == ["failed", 1, 1]
+    with Session(engine) as session:
+        assert session.get(EventStats, 2).registration_count == 2
+
+
+def test_endpoints_use_the_writer(engine, writer: GroupCommitWriter, monkeypatch):
+    """Test the register and attendance endpoints with group commit enabled"""
+    def get_session_override():
+        with Session(engine, expire_on_commit=False) as session:
+            yield session
+
+    monkeypatch.setattr(registrations_router, "group_writer", writer)
+    app.dependency_overrides[get_session] = get_session_override
+    response_cache.clear()
+    client = TestClient(app)
+    try:
+        response = client.post("/events/1/register", json={"student_id": 1})
+        assert response.status_code == 200
+        assert response.json()["student_id"] == 1
+        assert "read_primary_until" not in response.cookies  # No replicas, so there is nothing to pin
+        assert client.post("/events/1/register", json={"student_id": 1}).status_code == 409
+        assert client.post("/events/1/register", json={"student_id": 99}).status_code == 404
+        for student_id in (2, 3):
+            client.post("/events/1/register", json={"student_id": student_id})
+        assert client.post("/events/1/register", json={"student_id": 4}).status_code == 409
+        assert client.post("/events/1/register", json={"student_id": 4, "join_waitlist": True}).status_code == 202
+
+        assert client.post("/events/1/attendance", json={"student_id": 1}).status_code == 200
+        assert client.post("/events/1/attendance", json={"student_id": 1}).status_code == 409
+        listed = {event["id"]: event for event in client.get("/events/").json()}
+        assert (listed[1]["registration_count"], listed[1]["attendance_count"]) == (3, 1)
+    finally:
+        app.dependency_overrides.clear()
+
+
+def test_stalled_writer_answers_503(engine, monkeypatch):
+    """Test that requests give up on a stalled writer, and a write it has not picked up yet is dropped"""
+    release = threading.Event()
+
+    def stalled_session():
+        release.wait(10)
+        return Session(engine, expire_on_commit=False)
+
+    def get_session_override():
+        with Session(engine) as session:
+            yield session
+
+    writer = GroupCommitWriter(max_wait_ms=0, timeout=0.2, session_factory=stalled_session)
+    monkeypatch.setattr(registrations_router, "group_writer", writer)
+    app.dependency_overrides[get_session] = get_session_override
+    try:
+        client = TestClient(app)
+        assert client.post("/events/2/register", json={"student_id": 1}).status_code == 503
+        assert client.post("/events/2/register", json={"student_id": 2}).status_code == 503
+    finally:
+        app.dependency_overrides.clear()
+        release.set()
+        writer.shutdown()
+
+    # The first write was already being committed when its caller gave up; the second never started
+    with Session(engine) as session:
+        assert session.exec(select(Registration.student_id).where(Registration.event_id == 2)).all() == [1]
@@ -0,0 +1,163 @@
+"""
+Tests for Idempotency-Key handling on the write endpoints
+"""
+
+import pytest
+import sys
+import os
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
+from fastapi import FastAPI, Response
+from fastapi.testclient import TestClient
+from sqlmodel import Session, SQLModel, create_engine, select, func
+from sqlalchemy.pool import StaticPool
+
+# Add the backend directory to Python path
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', '..'))
+
+from app.main import app
+from app.cache import response_cache
+from app.db import create_db_engine, get_session
+from app.idempotency import (
+    IN_PROGRESS, NEW, IdempotencyMiddleware, IdempotencyStore, idempotency_store, request_fingerprint
+)
+from app.models import Event, Student, Feedback, EventStats, IdempotencyRecord
+from app.stats import rebuild_stats
+
+
+@pytest.fixture(name="engine")
+def engine_fixture():
+    engine = create_engine(
+        "sqlite:///:memory:",
+        connect_args={"check_same_thread": False},
+        poolclass=StaticPool,
+    )
+    SQLModel.metadata.create_all(engine)
+    with Session(engine) as session:
+        session.add(Event(id=1, title="Workshop", event_type="workshop", date=datetime(2024, 1, 15), location="Lab"))
+        session.add(Student(id=1, name="Alice", email="alice@test.edu", student_id="TS001"))
+        session.commit()
+        rebuild_stats(session)
+    yield engine
+
+
+@pytest.fixture(name="client")
+def client_fixture(engine, monkeypatch):
+    def get_session_override():
+        with Session(engine) as session:
+            yield session
+
+    monkeypatch.setattr(idempotency_store, "engine", engine)
+    app.dependency_overrides[get_session] = get_session_override
+    response_cache.clear()
+    yield TestClient(app)
+    app.dependency_overrides.clear()
+
+
+def test_retried_feedback_is_written_once(engine, client: TestClient):
+    """Test that a retry with the same key replays the response instead of adding a second row"""
+    headers = {"Idempotency-Key": "feedback-1"}
+    first = client.post("/events/1/feedback", json={"student_id": 1, "rating": 5}, headers=headers)
+    retry = client.post("/events/1/feedback", json={"student_id": 1, "rating": 5}, headers=headers)
+
+    assert first.status_code == retry.status_code == 200
+    assert retry.json() == first.json()
+    assert retry.headers["Idempotent-Replayed"] == "true"
+    assert "Idempotent-Replayed" not in first.headers
+    with Session(engine) as session:
+        assert session.exec(select(func.count()).select_from(Feedback)).one() == 1
+        assert session.get(EventStats, 1).rating_count == 1
+
+    # Without a key every request is a new write
+    client.post("/events/1/feedback", json={"student_id": 1, "rating": 3})
+    with Session(engine) as session:
+        assert session.exec(select(func.count()).select_from(Feedback)).one() == 2
+
+
+def test_client_errors_are_replayed(client: TestClient):
+    """Test that 4xx responses are stored too, so a retry gets the same answer"""
+    headers = {"Idempotency-Key": "register-unknown"}
+    first = client.post("/events/99/register", json={"student_id": 1}, headers=headers)
+    retry = client.post("/events/99/register", json={"student_id": 1}, headers=headers)
+    assert first.status_code == retry.status_code == 404
+    assert retry.headers["Idempotent-Replayed"] == "true"
+
+
+def test_key_reuse_and_in_progress_requests_are_rejected(client: TestClient):
+    """Test a key reused for a different request and a retry while the first request still runs"""
+    headers = {"Idempotency-Key": "student-1"}
+    body = {"name": "Bob", "email": "bob@test.edu", "student_id": "TS002"}
+    assert client.post("/students/", json=body, headers=headers).status_code == 200
+    assert client.post("/students/", json={**body, "name": "Rob"}, headers=headers).status_code == 422
+    assert client.post("/students/", json=body, headers={"Idempotency-Key": "x" * 256}).status_code == 400
+
+    event = b'{"title": "Talk", "event_type": "talk", "date": "2024-02-01T10:00:00", "location": "Hall"}'
+    assert idempotency_store.begin("event-1", request_fingerprint("POST", "/events/", b"", event))[0] == NEW
+    response = client.post("/events/", content=event, headers={
+        "Idempotency-Key": "event-1", "Content-Type": "application/json"
+    })
+    assert response.status_code == 409
+
+
+def test_concurrent_retries_claim_the_key_once(tmp_path):
+    """Test that exactly one of many concurrent requests with the same key gets to run"""
+    engine = create_db_engine(f"sqlite:///{tmp_path / 'keys.db'}")
+    SQLModel.metadata.create_all(engine)
+    store = IdempotencyStore(engine)
+
+    with ThreadPoolExecutor(max_workers=8) as pool:
+        outcomes = list(pool.map(lambda _: store.begin("same-key", "fingerprint")[0], range(16)))
+    engine.dispose()
+
+    assert outcomes.count(NEW) == 1
+    assert outcomes.count(IN_PROGRESS) == 15
+
+
+def test_lapsed_claims_are_taken_over(tmp_path):
+    """Test that a retry runs once the claim of a request whose worker died has lapsed, and only one retry wins"""
+    engine = create_db_engine(f"sqlite:///{tmp_path / 'keys.db'}")
+    SQLModel.metadata.create_all(engine)
+    assert IdempotencyStore(engine).begin("crashed", "fingerprint")[0] == NEW
+    assert IdempotencyStore(engine).begin("crashed", "fingerprint")[0] == IN_PROGRESS
+
+    assert IdempotencyStore(engine, lease=-1).begin("abandoned", "fingerprint")[0] == NEW
+    store = IdempotencyStore(engine)
+    with ThreadPoolExecutor(max_workers=8) as pool:
+        outcomes = list(pool.map(lambda _: store.begin("abandoned", "fingerprint")[0], range(16)))
+    engine.dispose()
+
+    assert outcomes.count(NEW) == 1
+    assert outcomes.count(IN_PROGRESS) == 15
+
+
+def test_expired_records_are_purged(engine):
+    """Test that keys are forgotten after the TTL"""
+    store = IdempotencyStore(engine, ttl=-1)
+    assert store.begin("old-key", "fingerprint")[0] == NEW
+    store.complete("old-key", 200, [], b"{}")
+    assert store.begin("old-key", "fingerprint")[0] == NEW
+
+    assert store.purge_expired() == 1
+    with Session(engine) as session:
+        assert session.exec(select(func.count()).select_from(IdempotencyRecord)).one() == 0
+
+
+def test_server_errors_are_not_stored(engine):
+    """Test that a retry after a 5xx runs the request again"""
+    calls = []
+    failing = FastAPI()
+
+    @failing.post("/events/flaky")
+    def flaky():
+        calls.append(1)
+        return Response(status_code=503 if len(calls) == 1 else 201)
+
+    failing.add_middleware(IdempotencyMiddleware, store=IdempotencyStore(engine))
+    client = TestClient(failing)
+    headers = {"Idempotency-Key": "flaky-1"}
+
+    assert client.post("/events/flaky", headers=headers).status_code == 503
+    assert client.post("/events/flaky", headers=headers).status_code == 201
+    replay = client.post("/events/flaky", headers=headers)
+    assert (replay.status_code, replay.headers["Idempotent-Replayed"]) == (201, "true")
+    assert len(calls) == 2
@@ -0,0 +1,211 @@
+"""
+Tests for the background report and export jobs
+"""
+
+import csv
+import gzip
+import io
+import pytest
+import sys
+import os
+import threading
+import time
+from datetime import datetime, timedelta
+from fastapi.testclient import TestClient
+from sqlmodel import Session, SQLModel, create_engine
+from sqlalchemy.pool import StaticPool
+
+# Add the backend directory to Python path
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', '..'))
+
+from app.main import app
+from app.cache import response_cache
+from app.db import get_session
+from app.jobs import DONE, FAILED, REPORT_JOB, Job, JobQueue, MemoryJobStore, SQLiteJobStore, job_key
+from app.models import Event, Student, Registration
+from app.routers import jobs as jobs_router
+from app.schemas import ReportJobCreate
+from app.stats import rebuild_stats
+
+
+@pytest.fixture(name="engine")
+def engine_fixture():
+    engine = create_engine(
+        "sqlite:///:memory:",
+        connect_args={"check_same_thread": False},
+        poolclass=StaticPool,
+    )
+    SQLModel.metadata.create_all(engine)
+    with Session(engine) as session:
+        session.add(Event(id=1, title="Workshop", event_type="workshop", date=datetime(2024, 3, 10), location="Lab"))
+        session.add(Event(id=2, title="Seminar", event_type="seminar", date=datetime(2024, 3, 12), location="Hall"))
+        for i in range(1, 4):
+            session.add(Student(id=i, name=f"Student {i}", email=f"s{i}@example.edu", student_id=f"S{i}"))
+            session.add(Registration(event_id=1, student_id=i, registered_at=datetime(2024, 3, i, 12)))
+        session.commit()
+        rebuild_stats(session)
+    yield engine
+
+
+@pytest.fixture(name="queue")
+def queue_fixture(engine, tmp_path):
+    queue = JobQueue(MemoryJobStore(), str(tmp_path / "results"), workers=2,
+                     session_factory=lambda: Session(engine))
+    yield queue
+    queue.shutdown()
+
+
+@pytest.fixture(name="client")
+def client_fixture(engine, queue: JobQueue, monkeypatch):
+    def get_session_override():
+        with Session(engine) as session:
+            yield session
+
+    monkeypatch.setattr(jobs_router, "job_queue", queue)
+    app.dependency_overrides[get_session] = get_session_override
+    response_cache.clear()
+    yield TestClient(app)
+    app.dependency_overrides.clear()
+
+
+def finished(client: TestClient, queue: JobQueue, response) -> dict:
+    job_id = response.json()["id"]
+    queue.wait(job_id, timeout=10)
+    return client.get(f"/jobs/{job_id}").json()
+
+
+def test_report_job(client: TestClient, queue: JobQueue):
+    """Test that a report job runs in the background and its result matches the inline report"""
+    response = client.post("/jobs/reports", json={"report": "event-popularity"})
+    assert response.status_code == 202
+    assert response.headers["Location"] == f"/jobs/{response.json()['id']}"
+
+    job = finished(client, queue, response)
+    assert job["status"] == DONE
+    result = client.get(job["result_url"])
+    assert result.status_code == 200
+    assert result.headers["content-type"] == "application/json"
+    assert result.json() == client.get("/reports/event-popularity").json()
+
+
+def test_report_jobs_reuse_fresh_results(client: TestClient, queue: JobQueue):
+    """Test that identical report jobs within the freshness window share one run"""
+    first = client.post("/jobs/reports", json={"report": "trends", "granularity": "week"})
+    again = client.post("/jobs/reports", json={"report": "trends", "granularity": "week"})
+    other = client.post("/jobs/reports", json={"report": "trends", "granularity": "month"})
+
+    assert again.status_code == 200
+    assert again.json()["id"] == first.json()["id"]
+    assert other.status_code == 202
+    assert other.json()["id"] != first.json()["id"]
+
+    queue.fresh_seconds = 0
+    time.sleep(0.01)
+    assert client.post("/jobs/reports", json={"report": "trends", "granularity": "week"}).status_code == 202
+
+
+def test_export_job(client: TestClient, queue: JobQueue):
+    """Test that an export job writes the table and is downloaded under the export's file name"""
+    response = client.post("/jobs/exports", json={
+        "table": "registrations", "format": "csv", "since": "2024-03-02T00:00:00"
+    })
+    job = finished(client, queue, response)
+    result = client.get(job["result_url"])
+
+    assert result.headers["content-type"] == "application/gzip"
+    assert 'filename="registrations.csv.gz"' in result.headers["content-disposition"]
+    rows = list(csv.DictReader(io.StringIO(gzip.decompress(result.content).decode())))
+    assert [row["student_id"] for row in rows] == ["2", "3"]
+
+
+def test_job_errors(client: TestClient, engine, tmp_path, monkeypatch):
+    """Test rejected submissions, unknown jobs and failed jobs"""
+    assert client.post("/jobs/exports", json={"table": "event_stats"}).status_code == 404
+    assert client.post("/jobs/exports", json={
+        "table": "registrations", "since": "2024-03-05T00:00:00", "until": "2024-03-01T00:00:00"
+    }).status_code == 400
+    assert client.post("/jobs/reports", json={"report": "nope"}).status_code == 422
+    assert client.get("/jobs/missing").status_code == 404
+
+    def unavailable():
+        raise RuntimeError("database unavailable")
+
+    broken = JobQueue(MemoryJobStore(), str(tmp_path / "broken"), session_factory=unavailable)
+    monkeypatch.setattr(jobs_router, "job_queue", broken)
+    job = finished(client, broken, client.post("/jobs/reports", json={"report": "event-popularity"}))
+    broken.shutdown()
+
+    assert job["status"] == FAILED
+    assert job["error"] == "database unavailable"
+    assert job["result_url"] is None
+    assert client.get(f"/jobs/{job['id']}/result").status_code == 409
+
+
+def test_concurrent_jobs_are_bounded(engine, tmp_path):
+    """Test that no more than the configured number of jobs run at once"""
+    running, peak, lock = [0], [0], threading.Lock()
+
+    class CountingSession(Session):
+        def __enter__(self):
+            with lock:
+                running[0] += 1
+                peak[0] = max(peak[0], running[0])
+            time.sleep(0.05)
+            return super().__enter__()
+
+        def __exit__(self, *exc):
+            with lock:
+                running[0] -= 1
+            return super().__exit__(*exc)
+
+    queue = JobQueue(MemoryJobStore(), str(tmp_path), workers=2, session_factory=lambda: CountingSession(engine))
+    submitted = [queue.submit_report(ReportJobCreate(report="top-active-students", limit=i))[0] for i in range(1, 7)]
+    for job in submitted:
+        assert queue.wait(job.id, timeout=10).status == DONE
+    queue.shutdown()
+
+    assert peak[0] == 2
+
+
+def test_sqlite_store_resumes_unfinished_jobs(engine, tmp_path):
+    """Test that a durable queue keeps finished jobs and runs the ones left queued by a previous process"""
+    store_path = str(tmp_path / "jobs.db")
+    params = ReportJobCreate(report="student-participation")
+    left_over = Job(kind=REPORT_JOB, params=params.model_dump(mode="json"), key=job_key(REPORT_JOB, params))
+    SQLiteJobStore(store_path).save(left_over)
+
+    queue = JobQueue(SQLiteJobStore(store_path), str(tmp_path / "results"), session_factory=lambda: Session(engine))
+    queue.start()
+    job = queue.wait(left_over.id, timeout=10)
+    queue.shutdown()
+    assert job.status == DONE
+
+    restarted = JobQueue(SQLiteJobStore(store_path), str(tmp_path / "results"))
+    reloaded = restarted.get(left_over.id)
+    assert (reloaded.status, reloaded.created_at) == (DONE, left_over.created_at)
+    assert restarted.submit_report(params) == (reloaded, True)
+
+
+def test_missing_result_is_gone(client: TestClient, queue: JobQueue):
+    """Test that a finished job whose result file was removed answers 410 rather than failing"""
+    job = finished(client, queue, client.post("/jobs/reports", json={"report": "event-popularity"}))
+    os.remove(queue.get(job["id"]).result_path)
+    response = client.get(job["result_url"])
+    assert response.status_code == 410
+
+
+@pytest.mark.parametrize("store", ["memory", "sqlite"])
+def test_expired_jobs_are_purged(engine, tmp_path, store):
+    """Test that finished jobs older than the TTL are deleted with their result files, and newer ones kept"""
+    job_store = MemoryJobStore() if store == "memory" else SQLiteJobStore(str(tmp_path / "jobs.db"))
+    queue = JobQueue(job_store, str(tmp_path / "results"), ttl=3600, session_factory=lambda: Session(engine))
+    old, _ = queue.submit_report(ReportJobCreate(report="event-popularity"))
+    new, _ = queue.submit_report(ReportJobCreate(report="top-active-students"))
+    old, new = queue.wait(old.id, timeout=10), queue.wait(new.id, timeout=10)
+    queue.shutdown()
+
+    old.finished_at = datetime.utcnow() - timedelta(hours=2)
+    job_store.save(old)
+    assert queue.purge_expired() == 1
+    assert queue.get(old.id) is None and not os.path.exists(old.result_path)
+    assert queue.get(new.id).status == DONE and os.path.exists(new.result_path)
@@ -0,0 +1,105 @@
+"""
+Tests for the request instrumentation and /metrics endpoint
+"""
+
+import logging
+import re
+import pytest
+import sys
+import os
+from datetime import datetime
+from fastapi.testclient import TestClient
+from sqlmodel import Session, SQLModel, create_engine
+from sqlalchemy.pool import StaticPool
+
+# Add the backend directory to Python path
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', '..'))
+
+from app.main import app
+from app import metrics
+from app.cache import response_cache
+from app.config import Settings
+from app.db import get_session, instrument_engine
+from app.models import Event
+from app.stats import rebuild_stats
+
+
+@pytest.fixture(name="session")
+def session_fixture():
+    engine = create_engine(
+        "sqlite:///:memory:",
+        connect_args={"check_same_thread": False},
+        poolclass=StaticPool,
+    )
+    instrument_engine(engine)
+    SQLModel.metadata.create_all(engine)
+    with Session(engine) as session:
+        for i in range(1, 4):
+            session.add(Event(id=i, title=f"Event {i}", event_type="workshop",
+                              date=datetime(2024, 1, i), location="Hall"))
+        session.commit()
+        rebuild_stats(session)
+        yield session
+
+
+@pytest.fixture(name="client")
+def client_fixture(session: Session):
+    def get_session_override():
+        return session
+
+    app.dependency_overrides[get_session] = get_session_override
+    response_cache.clear()
+    for histogram in metrics.HISTOGRAMS:
+        histogram.clear()
+    client = TestClient(app)
+    yield client
+    app.dependency_overrides.clear()
+
+
+def server_timing(response) -> dict:
+    """Parse 'db;desc="3 statements";dur=1.20, total;dur=4.50' into {name: (statements, ms)}"""
+    entries = {}
+    for entry in response.headers["Server-Timing"].split(", "):
+        name = entry.split(";")[0]
+        statements = re.search(r'desc="(\d+) statements"', entry)
+        duration = float(re.search(r"dur=([\d.]+)", entry).group(1))
+        entries[name] = (int(statements.group(1)) if statements else None, duration)
+    return entries
+
+
+def test_server_timing_header(client: TestClient):
+    """Test that responses report their statement count, DB time and total time"""
+    timing = server_timing(client.get("/events/"))
+    statements, db_ms = timing["db"]
+    assert statements >= 1
+    assert 0 < db_ms <= timing["total"][1]
+
+    # A cached response costs no statements
+    assert server_timing(client.get("/events/"))["db"][0] == 0
+    assert server_timing(client.get("/"))["db"][0] == 0
+
+
+def test_metrics_histograms_per_route_template(client: TestClient):
+    """Test that /metrics exposes histograms labelled with the route template"""
+    client.get("/events/1")
+    client.get("/events/2")
+    client.get("/no-such-page")
+
+    body = client.get("/metrics").text
+    labels = '{method="GET",route="/events/{event_id}",status="200"}'
+    assert f"http_request_duration_seconds_count{labels} 2" in body
+    assert f"http_request_db_statements_count{labels} 2" in body
+    assert re.search(r'http_request_db_statements_bucket\{method="GET",route="/events/\{event_id\}",'
+                     r'status="200",le="\+Inf"\} 2', body)
+    assert 'route="<unmatched>",status="404"' in body
+    assert "# TYPE http_request_db_seconds histogram" in body
+
+
+def test_slow_query_log(client: TestClient, monkeypatch, caplog):
+    """Test that slow statements are logged with their SQL and parameters"""
+    monkeypatch.setattr(metrics, "settings", Settings(slow_query_ms=0.0001))
+    with caplog.at_level(logging.WARNING, logger="app.slow_queries"):
+        client.get("/events/2")
+
+    assert any("FROM events" in record.getMessage() and "parameters=(2," in record.getMessage()
+               for record in caplog.records)
@@ -0,0 +1,110 @@
+"""
+Tests that the hot crud queries are served by indexes on the fact tables
+"""
+
+import re
+import pytest
+import sys
+import os
+from datetime import datetime
+from sqlmodel import Session, SQLModel, create_engine
+from sqlalchemy import event as sa_event
+from sqlalchemy.pool import StaticPool
+
+# Add the backend directory to Python path
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', '..'))
+
+from app import crud
+from app.models import Event, Student
+from app.schemas import RegistrationCreate
+
+FACT_TABLES = ("registrations", "attendance", "feedback")
+
+# "SCAN registrations" without "USING ... INDEX" means SQLite reads every row of the table
+TABLE_SCAN = re.compile(r"^SCAN (?:TABLE )?(\w+)(?!.*USING)")
+
+
+@pytest.fixture(name="engine")
+def engine_fixture():
+    engine = create_engine(
+        "sqlite:///:memory:",
+        connect_args={"check_same_thread": False},
+        poolclass=StaticPool,
+    )
+    SQLModel.metadata.create_all(engine)
+    yield engine
+
+
+def capture_statements(engine, operation):
+    """Run operation against a fresh session and return the (statement, parameters) it executed"""
+    statements = []
+
+    def before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+        if statement.lstrip().upper().startswith("SELECT"):
+            statements.append((statement, parameters))
+
+    sa_event.listen(engine, "before_cursor_execute", before_cursor_execute)
+    try:
+        with Session(engine) as db:
+            operation(db)
+    finally:
+        sa_event.remove(engine, "before_cursor_execute", before_cursor_execute)
+    return statements
+
+
+def fact_table_scans(engine, statement, parameters):
+    connection = engine.raw_connection()
+    try:
+        plan = connection.execute(f"EXPLAIN QUERY PLAN {statement}", parameters).fetchall()
+    finally:
+        connection.close()
+    scans = [TABLE_SCAN.match(detail) for _, _, _, detail in plan]
+    return [match.group(1) for match in scans if match and match.group(1) in FACT_TABLES]
+
+
+@pytest.mark.parametrize("operation", [
+    lambda db: crud.get_events_with_stats(db),
+    lambda db: crud.get_events_with_stats(db, limit=10, after=(datetime(2024, 1, 1), 5)),
+    lambda db: crud.get_registrations_by_event(db, 1),
+    lambda db: crud.get_attendance_by_event(db, 1),
+    lambda db: crud.get_feedback_by_event(db, 1),
+    lambda db: crud.get_event_popularity_report(db),
+    lambda db: crud.get_student_participation_report(db, limit=10, after=(1, 1)),
+    lambda db: crud.get_top_active_students(db),
+    lambda db: crud.create_registration(db, 1, RegistrationCreate(student_id=1)),
+])
+def test_hot_queries_do_not_scan_fact_tables(engine, operation):
+    """Test that no hot query falls back to a full scan of a fact table"""
+    with Session(engine) as db:
+        db.add(Event(id=1, title="Event", event_type="workshop", date=datetime(2024, 1, 1), location="Hall"))
+        db.add(Student(id=1, name="Student", email="student@test.edu", student_id="TS001"))
+        db.commit()
+
+    statements = capture_statements(engine, operation)
+    assert statements
+
+    for statement, parameters in statements:
+        assert fact_table_scans(engine, statement, parameters) == [], statement
+
+
+@pytest.mark.parametrize("filters, index", [
+    (crud.EventFilters(college_id=1, upcoming_only=True), "ix_events_college_date"),
+    (crud.EventFilters(event_type="workshop", date_from=datetime(2024, 1, 1), date_to=datetime(2024, 2, 1)),
+     "ix_events_type_date"),
+    (crud.EventFilters(date_from=datetime(2024, 1, 1)), "ix_events_date"),
+])
+@pytest.mark.parametrize("ascending", [False, True])
+def test_event_listing_is_an_index_range_scan(engine, filters, index, ascending):
+    """Test that filtered event listings read one date-ordered index without sorting"""
+    statements = capture_statements(
+        engine, lambda db: crud.get_events_with_stats(db, filters, limit=20, ascending=ascending)
+    )
+    assert len(statements) == 1
+
+    connection = engine.raw_connection()
+    try:
+        plan = [row[3] for row in connection.execute(f"EXPLAIN QUERY PLAN {statements[0][0]}", statements[0][1])]
+    finally:
+        connection.close()
+    assert any(detail.startswith(f"SEARCH events USING INDEX {index}") for detail in plan), plan
+    assert not any("TEMP B-TREE" in detail for detail in plan), plan
@@ -0,0 +1,127 @@
+"""
+Tests for rate limiting and admission control
+"""
+
+import asyncio
+import pytest
+import sys
+import os
+import httpx
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+
+# Add the backend directory to Python path
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', '..'))
+
+from app.ratelimit import (
+    AdmissionController, AdmissionMiddleware, MemoryBuckets, RateLimit, RateLimitMiddleware, parse_rate_limits
+)
+
+
+def limited_app(rules: str) -> FastAPI:
+    app = FastAPI()
+
+    @app.post("/events/{event_id}/register")
+    def register(event_id: int):
+        return {"event_id": event_id}
+
+    @app.post("/events/{event_id}/feedback")
+    def feedback(event_id: int):
+        return {"event_id": event_id}
+
+    app.add_middleware(RateLimitMiddleware, rules=parse_rate_limits(rules), buckets=MemoryBuckets())
+    return app
+
+
+def test_token_bucket():
+    """Test that a bucket allows its burst, then reports the wait for the next token"""
+    buckets = MemoryBuckets()
+    limit = RateLimit(rate=2, burst=2)
+    assert buckets.take("a", limit) == 0
+    assert buckets.take("a", limit) == 0
+    assert 0.4 < buckets.take("a", limit) <= 0.5
+    assert buckets.take("b", limit) == 0
+
+
+def test_least_recently_used_buckets_are_evicted():
+    """Test that a bucket in use survives eviction while idle ones are forgotten"""
+    buckets = MemoryBuckets(max_keys=10)
+    limit = RateLimit(rate=0.001, burst=1)
+    assert buckets.take("busy", limit) == 0
+    for i in range(10):
+        buckets.take(f"idle-{i}", limit)
+        assert buckets.take("busy", limit) > 0
+    assert buckets.take("idle-0", limit) == 0
+
+
+def test_requests_over_the_limit_get_429():
+    """Test per-student limits on one route, keyed by the student_id in the body"""
+    client = TestClient(limited_app('{"POST /events/{event_id}/register": {"rate": 0.5, "burst": 2, "key": "student"}}'))
+
+    statuses = [client.post(f"/events/{i}/register", json={"student_id": 1}).status_code for i in range(1, 4)]
+    assert statuses == [200, 200, 429]
+    response = client.post("/events/1/register", json={"student_id": 1})
+    assert response.headers["Retry-After"] == "2"
+    assert response.json()["detail"] == "Rate limit exceeded, retry later"
+
+    # Other students and unconfigured routes keep their own budget
+    assert client.post("/events/1/register", json={"student_id": 2}).status_code == 200
+    assert all(client.post("/events/1/feedback", json={"student_id": 1}).status_code == 200 for _ in range(5))
+
+
+def test_rate_limits_are_validated():
+    """Test that bad RATE_LIMITS settings are rejected when the app starts"""
+    assert parse_rate_limits("") == []
+    with pytest.raises(ValueError):
+        parse_rate_limits('{"POST /students/": {"rate": 0, "burst": 1}}')
+    with pytest.raises(ValueError):
+        parse_rate_limits('{"POST /students/": {"rate": 1, "burst": 1, "key": "email"}}')
+    rule, = parse_rate_limits('{"post /events/{event_id}/register": {"rate": 1, "burst": 3}}')
+    assert rule.method == "POST" and rule.limit.key == "client"
+    assert rule.pattern.match("/events/7/register") and not rule.pattern.match("/events/7/feedback")
+
+
+def test_writes_over_capacity_are_shed():
+    """Test that writes beyond the in-flight and queue limits get 429 while reads pass through"""
+    app = FastAPI()
+    running, peak = [0], [0]
+
+    @app.post("/slow")
+    async def slow():
+        running[0] += 1
+        peak[0] = max(peak[0], running[0])
+        await asyncio.sleep(0.1)
+        running[0] -= 1
+        return {}
+
+    @app.get("/slow")
+    async def read():
+        return {}
+
+    app.add_middleware(AdmissionMiddleware, controller=AdmissionController(max_in_flight=1, queue_size=1, timeout=1.0))
+
+    async def burst():
+        transport = httpx.ASGITransport(app=app)
+        async with httpx.AsyncClient(transport=transport, base_url="http://test") as client:
+            writes = await asyncio.gather(*(client.post("/slow") for _ in range(3)))
+            reads = await asyncio.gather(*(client.get("/slow") for _ in range(3)))
+        return writes, reads
+
+    writes, reads = asyncio.run(burst())
+    assert sorted(response.status_code for response in writes) == [200, 200, 429]
+    assert [response.headers.get("Retry-After") for response in writes if response.status_code == 429] == ["1"]
+    assert all(response.status_code == 200 for response in reads)
+    assert peak[0] == 1
+
+
+def test_queued_writes_time_out():
+    """Test that a write waiting longer than the queue timeout is shed"""
+    controller = AdmissionController(max_in_flight=1, queue_size=4, timeout=0.05)
+
+    async def contend():
+        assert await controller.acquire()
+        waited = await controller.acquire()
+        controller.release()
+        return waited, controller.waiting
+
+    assert asyncio.run(contend()) == (False, 0)
@@ -0,0 +1,221 @@
+"""
+Tests for the registration, attendance and feedback endpoints
+"""
+
+import pytest
+import sys
+import os
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
+from fastapi.testclient import TestClient
+from sqlalchemy import event as sa_event, insert
+from sqlmodel import Session, SQLModel, create_engine, select, func
+from sqlalchemy.pool import StaticPool
+
+# Add the backend directory to Python path
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', '..'))
+
+from app.main import app
+from app.cache import response_cache
+from app.db import get_session
+from app.models import Event, Student, Registration
+from app.schemas import RegistrationCreate
+from app.stats import rebuild_stats
+from app import crud
+
+
+@pytest.fixture(name="session")
+def session_fixture():
+    engine = create_engine(
+        "sqlite:///:memory:",
+        connect_args={"check_same_thread": False},
+        poolclass=StaticPool,
+    )
+    SQLModel.metadata.create_all(engine)
+    with Session(engine) as session:
+        session.add(Event(id=1, title="Small Workshop", event_type="workshop",
+                          date=datetime(2024, 1, 15), location="Lab", max_participants=2))
+        session.add(Event(id=2, title="Open Seminar", event_type="seminar",
+                          date=datetime(2024, 1, 20), location="Auditorium"))
+        for i in range(1, 5):
+            session.add(Student(id=i, name=f"Student {i}", email=f"student{i}@test.edu", student_id=f"TS{i:03d}"))
+        session.commit()
+        rebuild_stats(session)
+        yield session
+
+
+@pytest.fixture(name="client")
+def client_fixture(session: Session):
+    def get_session_override():
+        return session
+
+    app.dependency_overrides[get_session] = get_session_override
+    response_cache.clear()
+    client = TestClient(app)
+    yield client
+    app.dependency_overrides.clear()
+
+
+def test_register_for_event(client: TestClient):
+    """Test registering a student and rejecting a duplicate"""
+    response = client.post("/events/2/register", json={"student_id": 1})
+    assert response.status_code == 200
+    assert response.json()["event_id"] == 2
+    assert response.json()["student_id"] == 1
+
+    response = client.post("/events/2/register", json={"student_id": 1})
+    assert response.status_code == 409
+
+
+def test_register_unknown_event_or_student(client: TestClient):
+    """Test that unknown events and students return 404"""
+    assert client.post("/events/99/register", json={"student_id": 1}).status_code == 404
+    assert client.post("/events/1/register", json={"student_id": 99}).status_code == 404
+
+
+def test_attendance_and_feedback_unknown_event_or_student(client: TestClient):
+    """Test that attendance and feedback check the event and student in the crud layer"""
+    response = client.post("/events/99/attendance", json={"student_id": 1})
+    assert (response.status_code, response.json()["detail"]) == (404, "Event not found")
+    response = client.post("/events/1/feedback", json={"student_id": 99, "rating": 4})
+    assert (response.status_code, response.json()["detail"]) == (404, "Student not found")
+
+
+def test_registration_statement_count(session: Session, client: TestClient):
+    """Test that a registration takes one locking read, the insert and the statistics upserts"""
+    # The app's sessions do not expire on commit, so the response needs no reload
+    session.expire_on_commit = False
+    statements = []
+
+    def before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+        statements.append(statement)
+
+    sa_event.listen(session.get_bind(), "before_cursor_execute", before_cursor_execute)
+    try:
+        response = client.post("/events/2/register", json={"student_id": 3})
+    finally:
+        sa_event.remove(session.get_bind(), "before_cursor_execute", before_cursor_execute)
+
+    assert response.status_code == 200
+    assert response.json()["registered_at"]
+    # BEGIN IMMEDIATE, the combined existence / duplicate / capacity read, the insert and three stats upserts
+    assert len(statements) == 6
+    assert sum(statement.lstrip().upper().startswith("SELECT") for statement in statements) == 1
+
+
+def test_register_full_event(client: TestClient):
+    """Test that max_participants is enforced"""
+    assert client.post("/events/1/register", json={"student_id": 1}).status_code == 200
+    assert client.post("/events/1/register", json={"student_id": 2}).status_code == 200
+
+    response = client.post("/events/1/register", json={"student_id": 3})
+    assert response.status_code == 409
+    assert response.json()["detail"] == "Event is full"
+
+
+def test_register_full_event_joins_waitlist(client: TestClient):
+    """Test that a full event puts students on the waitlist when asked to"""
+    client.post("/events/1/register", json={"student_id": 1})
+    client.post("/events/1/register", json={"student_id": 2})
+
+    response = client.post("/events/1/register", json={"student_id": 3, "join_waitlist": True})
+    assert response.status_code == 202
+    assert response.json()["position"] == 1
+
+    response = client.post("/events/1/register", json={"student_id": 4, "join_waitlist": True})
+    assert response.status_code == 202
+    assert response.json()["position"] == 2
+
+    response = client.post("/events/1/register", json={"student_id": 4, "join_waitlist": True})
+    assert response.status_code == 409
+
+    # Already registered students are not waitlisted
+    response = client.post("/events/1/register", json={"student_id": 1, "join_waitlist": True})
+    assert response.status_code == 409
+    assert response.json()["detail"] == "Student is already registered for this event"
+
+
+def test_concurrent_registrations_respect_capacity(tmp_path):
+    """Test 1,000 concurrent registrations for an event with 100 seats"""
+    engine = create_engine(f"sqlite:///{tmp_path / 'load.db'}", connect_args={"check_same_thread": False})
+    SQLModel.metadata.create_all(engine)
+    with Session(engine) as session:
+        session.add(Event(id=1, title="Popular Workshop", event_type="workshop",
+                          date=datetime(2024, 1, 15), location="Lab", max_participants=100))
+        session.execute(insert(Student), [
+            {"id": i, "name": f"Student {i}", "email": f"student{i}@test.edu", "student_id": f"TS{i:04d}",
+             "created_at": datetime.utcnow()}
+            for i in range(1, 1001)
+        ])
+        session.commit()
+
+    def register(student_id: int) -> str:
+        with Session(engine) as session:
+            try:
+                crud.create_registration(session, 1, RegistrationCreate(student_id=student_id))
+                return "registered"
+            except crud.EventFullError:
+                return "full"
+
+    with ThreadPoolExecutor(max_workers=32) as pool:
+        outcomes = list(pool.map(register, range(1, 1001)))
+
+    assert outcomes.count("registered") == 100
+    assert outcomes.count("full") == 900
+
+    with Session(engine) as session:
+        assert session.exec(select(func.count()).select_from(Registration)).one() == 100
+    engine.dispose()
+
+
+def test_attendance_batch(client: TestClient):
+    """Test that a batch reports accepted, duplicate and unknown rows"""
+    client.post("/events/2/attendance", json={"student_id": 1})
+
+    response = client.post("/events/2/attendance:batch", json={"student_ids": [1, 2, 3, 2, 99]})
+    assert response.status_code == 200
+
+    data = response.json()
+    assert (data["accepted"], data["duplicate"], data["unknown"]) == (2, 2, 1)
+    assert [row["status"] for row in data["results"]] == ["duplicate", "accepted", "accepted", "duplicate", "unknown"]
+
+    # Single-row attendance is also rejected for a student already marked
+    assert client.post("/events/2/attendance", json={"student_id": 2}).status_code == 409
+
+
+def test_register_batch_respects_capacity(client: TestClient):
+    """Test that batch registration stops accepting once the event is full"""
+    client.post("/events/1/register", json={"student_id": 1})
+
+    data = client.post("/events/1/register:batch", json={"student_ids": [1, 2, 3, 4]}).json()
+    assert [row["status"] for row in data["results"]] == ["duplicate", "accepted", "full", "full"]
+    assert data["full"] == 2
+
+    assert client.post("/events/99/register:batch", json={"student_ids": [1]}).status_code == 404
+
+
+def test_feedback_batch(session: Session, client: TestClient):
+    """Test that a feedback batch validates ratings per row"""
+    response = client.post("/events/2/feedback:batch", json={"items": [
+        {"student_id": 1, "rating": 5, "comment": "Great"},
+        {"student_id": 2, "rating": 9},
+        {"student_id": 42, "rating": 3},
+    ]})
+    assert response.status_code == 200
+    assert [row["status"] for row in response.json()["results"]] == ["accepted", "invalid", "unknown"]
+
+    report = client.get("/reports/event-popularity").json()
+    assert {row["event_id"]: row["avg_rating"] for row in report}[2] == 5.0
+
+    # A rejected rating does not count as the student's first row
+    response = client.post("/events/2/feedback:batch", json={"items": [
+        {"student_id": 3, "rating": 9},
+        {"student_id": 3, "rating": 4},
+    ]})
+    assert [row["status"] for row in response.json()["results"]] == ["invalid", "accepted"]
+    assert response.json()["accepted"] == 1
+
+
+def test_batch_limits(client: TestClient):
+    """Test that empty batches are rejected"""
+    assert client.post("/events/2/attendance:batch", json={"student_ids": []}).status_code == 422
@@ -0,0 +1,112 @@
+"""
+Tests for read replica routing
+"""
+
+import pytest
+import sys
+import os
+from datetime import datetime
+from fastapi.testclient import TestClient
+from sqlmodel import Session, SQLModel
+
+# Add the backend directory to Python path
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', '..'))
+
+from app import db
+from app.main import app
+from app.cache import response_cache
+from app.config import Settings
+from app.db import READ_PRIMARY_COOKIE, ReadReplicas, create_db_engine
+from app.models import Event, Student
+
+
+def create_database(path, name: str):
+    engine = create_db_engine(f"sqlite:///{path}")
+    SQLModel.metadata.create_all(engine)
+    with Session(engine) as session:
+        session.add(Student(id=1, name=name, email="alice@test.edu", student_id="TS001"))
+        session.add(Event(id=1, title="Full Workshop", event_type="workshop", date=datetime(2030, 1, 15),
+                          location="Lab", max_participants=0))
+        session.commit()
+    return engine
+
+
+@pytest.fixture(name="client")
+def client_fixture(tmp_path, monkeypatch):
+    # The replica is a separate file that never receives the primary's writes, like a lagging replica
+    primary = create_database(tmp_path / "primary.db", "Alice")
+    replica = create_database(tmp_path / "replica.db", "Alice (replica)")
+    monkeypatch.setattr(db, "engine", primary)
+    monkeypatch.setattr(db, "read_replicas", ReadReplicas([replica]))
+    response_cache.clear()
+    yield TestClient(app)
+    primary.dispose()
+    replica.dispose()
+
+
+def test_reads_go_to_replica(client: TestClient):
+    """Test that listing and report endpoints read from the replica"""
+    assert client.get("/students/1").json()["name"] == "Alice (replica)"
+    assert client.get("/students/1/dashboard").json()["student"]["name"] == "Alice (replica)"
+    assert client.get("/reports/student-participation").status_code == 200
+
+
+def test_read_your_writes(client: TestClient):
+    """Test that a client that just wrote reads from the primary while others still read the replica"""
+    response = client.post("/students/", json={"name": "Bob", "email": "bob@test.edu", "student_id": "TS002"})
+    assert response.status_code == 200
+    assert READ_PRIMARY_COOKIE in response.cookies
+
+    assert client.get("/students/2").json()["name"] == "Bob"
+    assert client.get("/students/1").json()["name"] == "Alice"
+
+    other_client = TestClient(app)
+    assert other_client.get("/students/2").status_code == 404
+
+
+def test_waitlisted_writes_pin_reads(client: TestClient):
+    """Test that the 202 waitlist response carries the read-your-writes cookie too"""
+    response = client.post("/events/1/register", json={"student_id": 1, "join_waitlist": True})
+    assert response.status_code == 202
+    assert READ_PRIMARY_COOKIE in response.cookies
+
+
+def test_writes_without_replicas_keep_the_cache(tmp_path, monkeypatch):
+    """Test that with no replicas configured writes set no cookie, so the client's reads stay cached"""
+    primary = create_database(tmp_path / "primary.db", "Alice")
+    monkeypatch.setattr(db, "engine", primary)
+    monkeypatch.setattr(db, "read_replicas", ReadReplicas([]))
+    response_cache.clear()
+    client = TestClient(app)
+    try:
+        response = client.post("/students/", json={"name": "Bob", "email": "bob@test.edu", "student_id": "TS002"})
+        assert response.status_code == 200
+        assert READ_PRIMARY_COOKIE not in response.cookies
+        assert client.post("/events/1/register", json={"student_id": 1, "join_waitlist": True}).cookies == {}
+
+        assert client.get("/students/1/dashboard").json()["student"]["name"] == "Alice"
+        with Session(primary) as session:
+            session.get(Student, 1).name = "Alice (changed behind the cache)"
+            session.commit()
+        assert client.get("/students/1/dashboard").json()["student"]["name"] == "Alice"
+    finally:
+        primary.dispose()
+
+
+def test_read_your_writes_window_expires(client: TestClient):
+    """Test that an expired or malformed pin no longer routes reads to the primary"""
+    client.cookies.set(READ_PRIMARY_COOKIE, "0")
+    assert client.get("/students/1").json()["name"] == "Alice (replica)"
+    client.cookies.set(READ_PRIMARY_COOKIE, "soon")
+    assert client.get("/students/1").json()["name"] == "Alice (replica)"
+
+
+def test_replicas_are_used_in_turn():
+    """Test replica URL parsing and round-robin selection"""
+    config = Settings(database_read_urls="sqlite:///a.db, sqlite:///b.db,")
+    assert config.read_urls == ["sqlite:///a.db", "sqlite:///b.db"]
+    assert Settings().read_urls == []
+
+    replicas = ReadReplicas(["a", "b"])
+    assert [replicas.choose() for _ in range(3)] == ["a", "b", "a"]
+    assert ReadReplicas([]).choose() is None
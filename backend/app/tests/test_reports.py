@@ -5,17 +5,20 @@ Tests for the reports endpoints
 import pytest
 import sys
 import os
+import json
 from datetime import datetime
 from fastapi.testclient import TestClient
-from sqlmodel import Session, SQLModel, create_engine
+from sqlmodel import Session, SQLModel, create_engine, select
 from sqlalchemy.pool import StaticPool
 
 # Add the backend directory to Python path
 sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', '..'))
 
 from app.main import app
+from app.cache import response_cache
 from app.db import get_session
 from app.models import Event, Student, College, Registration, Attendance, Feedback
+from app.stats import rebuild_stats
 
 
 # Create test database
@@ -95,6 +98,7 @@ def load_sample_data_for_test(session: Session):
         session.add(fb)
     
     session.commit()
+    rebuild_stats(session)
 
 
 @pytest.fixture(name="client")
@@ -103,6 +107,7 @@ def client_fixture(session: Session):
         return session
 
     app.dependency_overrides[get_session] = get_session_override
+    response_cache.clear()
     client = TestClient(app)
     yield client
     app.dependency_overrides.clear()
@@ -181,3 +186,134 @@ def test_top_active_students_default_limit(client: TestClient):
     
     data = response.json()
     assert len(data) <= 10  # Default limit is 10
+
+
+def test_event_popularity_counts_are_not_inflated(client: TestClient):
+    """Test that joining several fact tables does not multiply the counts"""
+    data = {row["title"]: row for row in client.get("/reports/event-popularity").json()}
+
+    assert data["Test Event 1"]["registration_count"] == 2
+    assert data["Test Event 1"]["attendance_count"] == 1
+    assert data["Test Event 1"]["avg_rating"] == 5.0
+    assert data["Test Event 2"]["registration_count"] == 2
+    assert data["Test Event 2"]["attendance_count"] == 2
+    assert data["Test Event 2"]["avg_rating"] == 3.5
+
+
+def test_student_participation_counts_are_not_inflated(client: TestClient):
+    """Test that student participation counts match the underlying rows"""
+    data = {row["email"]: row for row in client.get("/reports/student-participation").json()}
+
+    assert data["student1@test.edu"]["events_attended"] == 2
+    assert data["student1@test.edu"]["total_registrations"] == 2
+    assert data["student2@test.edu"]["events_attended"] == 0
+    assert data["student2@test.edu"]["total_registrations"] == 1
+    assert data["student3@test.edu"]["events_attended"] == 1
+    assert data["student3@test.edu"]["total_registrations"] == 1
+
+    top = client.get("/reports/top-active-students?limit=1").json()
+    assert top[0]["email"] == "student1@test.edu"
+    assert top[0]["events_attended"] == 2
+    assert top[0]["avg_rating_given"] == 4.5
+
+
+def test_report_keyset_pagination(client: TestClient):
+    """Test that paginated reports return the same rows as the full report"""
+    for url in ["/reports/event-popularity", "/reports/student-participation"]:
+        rows = []
+        response = client.get(f"{url}?limit=1")
+        while True:
+            assert response.status_code == 200
+            rows.extend(response.json())
+            cursor = response.headers.get("X-Next-Cursor")
+            if not cursor:
+                break
+            response = client.get(f"{url}?limit=1&cursor={cursor}")
+
+        assert rows == client.get(url).json()
+
+
+@pytest.mark.parametrize("url", [
+    "/reports/event-popularity",
+    "/reports/student-participation",
+    "/reports/top-active-students",
+    "/reports/trends?by=event_type",
+])
+def test_reports_fast_json_matches_models(client: TestClient, monkeypatch, url: str):
+    """Test that serializing the report rows directly gives the same JSON as the response models"""
+    standard = client.get(url).json()
+    monkeypatch.setattr(response_cache, "fast_json", True)
+    response_cache.clear()
+    assert client.get(url).json() == standard
+
+
+def test_report_ndjson_stream(client: TestClient):
+    """Test that reports can be streamed as NDJSON"""
+    response = client.get("/reports/student-participation?format=ndjson")
+    assert response.status_code == 200
+    assert response.headers["content-type"].startswith("application/x-ndjson")
+
+    lines = [json.loads(line) for line in response.text.splitlines()]
+    assert lines == client.get("/reports/student-participation").json()
+
+
+@pytest.fixture(name="dated")
+def dated_fixture(session: Session):
+    """Move the sample facts to fixed days and rebuild the rollups"""
+    registered = [datetime(2024, 1, 8, 9), datetime(2024, 1, 14, 9), datetime(2024, 1, 15, 9), datetime(2024, 2, 1, 9)]
+    for registration, at in zip(session.exec(select(Registration).order_by(Registration.id)), registered):
+        registration.registered_at = at
+    for attendance in session.exec(select(Attendance)):
+        attendance.attended_at = datetime(2024, 1, 15, 12)
+    for feedback in session.exec(select(Feedback)):
+        feedback.submitted_at = datetime(2024, 1, 20, 18)
+    session.commit()
+    rebuild_stats(session)
+    return session
+
+
+def test_trend_report_granularities(client: TestClient, dated: Session):
+    """Test that trends are bucketed per day, Monday-based week and month"""
+    weeks = client.get("/reports/trends?granularity=week").json()
+    assert [(row["period"], row["registration_count"], row["attendance_count"], row["avg_rating"])
+            for row in weeks] == [
+        ("2024-01-08", 2, 0, None),
+        ("2024-01-15", 1, 3, 4.0),
+        ("2024-01-29", 1, 0, None),
+    ]
+
+    months = client.get("/reports/trends?granularity=month").json()
+    assert [(row["period"], row["registration_count"]) for row in months] == [("2024-01-01", 3), ("2024-02-01", 1)]
+
+    days = client.get("/reports/trends?since=2024-01-14&until=2024-01-20").json()
+    assert [row["period"] for row in days] == ["2024-01-14", "2024-01-15"]
+
+
+def test_trend_report_breakdown(client: TestClient, dated: Session):
+    """Test that trends can be broken down and filtered by event type and college"""
+    rows = client.get("/reports/trends?granularity=month&by=event_type&by=college_id").json()
+    college_id = rows[0]["college_id"]
+    assert college_id is not None
+    assert [(row["period"], row["event_type"], row["registration_count"], row["avg_rating"]) for row in rows] == [
+        ("2024-01-01", "seminar", 1, 3.5),
+        ("2024-01-01", "workshop", 2, 5.0),
+        ("2024-02-01", "seminar", 1, None),
+    ]
+
+    workshop = client.get(f"/reports/trends?granularity=month&event_type=workshop&college_id={college_id}").json()
+    assert [(row["registration_count"], row["event_type"]) for row in workshop] == [(2, None)]
+    assert client.get("/reports/trends?college_id=999").json() == []
+    assert client.get("/reports/trends?since=2024-02-01&until=2024-01-01").status_code == 400
+
+
+def test_trend_report_follows_writes(client: TestClient, dated: Session):
+    """Test that new registrations are added to today's bucket"""
+    today = datetime.utcnow().date().isoformat()
+    assert client.get(f"/reports/trends?since={today}").json() == []
+
+    student = client.post("/students/", json={"name": "New", "email": "new@test.edu", "student_id": "TS004"}).json()
+    event_id = dated.exec(select(Event.id)).first()
+    assert client.post(f"/events/{event_id}/register", json={"student_id": student["id"]}).status_code == 200
+
+    rows = client.get(f"/reports/trends?since={today}").json()
+    assert [(row["period"], row["registration_count"]) for row in rows] == [(today, 1)]
@@ -0,0 +1,100 @@
+"""
+Tests for full-text event search
+"""
+
+import pytest
+import sys
+import os
+from datetime import datetime
+from fastapi.testclient import TestClient
+from sqlmodel import Session, SQLModel, create_engine, text
+from sqlalchemy.pool import StaticPool
+
+# Add the backend directory to Python path
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', '..'))
+
+from app.main import app
+from app.cache import response_cache
+from app.db import get_session
+from app.models import Event
+from app.search import match_expression
+from app.stats import rebuild_stats
+
+
+@pytest.fixture(name="session")
+def session_fixture():
+    engine = create_engine(
+        "sqlite:///:memory:",
+        connect_args={"check_same_thread": False},
+        poolclass=StaticPool,
+    )
+    SQLModel.metadata.create_all(engine)
+    with Session(engine) as session:
+        session.add_all([
+            Event(id=1, title="Python Workshop", description="Hands-on introduction to Python",
+                  event_type="workshop", date=datetime(2024, 1, 15), location="Lab A"),
+            Event(id=2, title="Machine Learning Seminar", description="Learn how models are trained, with Python",
+                  event_type="seminar", date=datetime(2024, 1, 20), location="Main Hall"),
+            Event(id=3, title="Chess Tournament", description="Open to all levels",
+                  event_type="competition", date=datetime(2024, 1, 25), location="Library"),
+        ])
+        session.commit()
+        rebuild_stats(session)
+        yield session
+
+
+@pytest.fixture(name="client")
+def client_fixture(session: Session):
+    def get_session_override():
+        return session
+
+    app.dependency_overrides[get_session] = get_session_override
+    response_cache.clear()
+    client = TestClient(app)
+    yield client
+    app.dependency_overrides.clear()
+
+
+def ids(response) -> list:
+    assert response.status_code == 200
+    return [event["id"] for event in response.json()]
+
+
+def test_search_ranks_title_matches_first(client: TestClient):
+    """Test that matches are ranked, with title hits above description hits"""
+    assert ids(client.get("/events/search?q=python")) == [1, 2]
+    assert ids(client.get("/events/search?q=machine learning")) == [2]
+    # Stemming and prefix matching on the last word
+    assert ids(client.get("/events/search?q=learning models")) == [2]
+    assert ids(client.get("/events/search?q=tourn")) == [3]
+    assert ids(client.get("/events/search?q=astronomy")) == []
+
+
+def test_search_pagination(client: TestClient):
+    """Test that the keyset cursor walks the ranked results without gaps"""
+    first = client.get("/events/search?q=python&limit=1")
+    cursor = first.headers["X-Next-Cursor"]
+    second = client.get(f"/events/search?q=python&limit=1&cursor={cursor}")
+    assert ids(first) + ids(second) == [1, 2]
+
+
+def test_search_index_follows_writes(client: TestClient, session: Session):
+    """Test that the triggers index new, updated and deleted events"""
+    response = client.post("/events/", json={
+        "title": "Python for Data Science", "event_type": "workshop", "date": "2024-02-01T10:00:00", "location": "Lab B"
+    })
+    new_id = response.json()["id"]
+    assert new_id in ids(client.get("/events/search?q=data science"))
+
+    session.execute(text("UPDATE events SET title = 'Chess Club Meetup' WHERE id = 1"))
+    session.execute(text("DELETE FROM events WHERE id = 3"))
+    session.commit()
+    response_cache.clear()
+    assert ids(client.get("/events/search?q=chess")) == [1]
+    assert ids(client.get("/events/search?q=tournament")) == []
+
+
+def test_search_rejects_queries_without_words(client: TestClient):
+    """Test that punctuation-only queries are rejected rather than parsed as FTS syntax"""
+    assert client.get("/events/search?q=%22%29%28*").status_code == 400
+    assert match_expression('c++ "AND" x') == '"c" "and" "x"*'
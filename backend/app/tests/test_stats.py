@@ -0,0 +1,103 @@
+"""
+Tests for the materialised report statistics
+"""
+
+import pytest
+import sys
+import os
+from datetime import datetime
+from sqlmodel import Session, SQLModel, create_engine
+from sqlalchemy import delete, update
+from sqlalchemy.pool import StaticPool
+
+# Add the backend directory to Python path
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', '..'))
+
+from app import crud
+from app.models import EventStats, StudentStats, TrendStats
+from app.schemas import EventCreate, StudentCreate, RegistrationCreate, AttendanceCreate, FeedbackCreate
+from app.stats import check_stats, ensure_stats, rebuild_stats
+
+
+@pytest.fixture(name="session")
+def session_fixture():
+    engine = create_engine(
+        "sqlite:///:memory:",
+        connect_args={"check_same_thread": False},
+        poolclass=StaticPool,
+    )
+    SQLModel.metadata.create_all(engine)
+    with Session(engine) as session:
+        for i in range(1, 3):
+            crud.create_event(session, EventCreate(
+                title=f"Event {i}", event_type="workshop", date=datetime(2024, 1, i), location="Hall"
+            ))
+        for i in range(1, 5):
+            crud.create_student(session, StudentCreate(
+                name=f"Student {i}", email=f"student{i}@test.edu", student_id=f"TS{i:03d}"
+            ))
+        yield session
+
+
+def test_new_rows_start_with_empty_stats(session: Session):
+    """Test that creating events and students creates zeroed stats rows"""
+    assert session.get(EventStats, 1).registration_count == 0
+    assert session.get(StudentStats, 4).attendance_count == 0
+    assert check_stats(session) == []
+
+
+def test_writes_keep_stats_consistent(session: Session):
+    """Test that every write path updates the stats in step with the fact tables"""
+    crud.create_registration(session, 1, RegistrationCreate(student_id=1))
+    crud.create_attendance(session, 1, AttendanceCreate(student_id=1))
+    crud.create_feedback(session, 1, FeedbackCreate(student_id=1, rating=4))
+    crud.create_registration_batch(session, 2, [1, 2, 3, 99])
+    crud.create_attendance_batch(session, 2, [2, 3, 3])
+    crud.create_feedback_batch(session, 2, [
+        FeedbackCreate(student_id=2, rating=5),
+        FeedbackCreate(student_id=3, rating=2),
+        FeedbackCreate(student_id=4, rating=7),
+    ])
+    with pytest.raises(ValueError):
+        crud.create_registration(session, 1, RegistrationCreate(student_id=1))
+
+    assert check_stats(session) == []
+
+    report = {row["event_id"]: row for row in crud.get_event_popularity_report(session)}
+    assert report[2]["registration_count"] == 3
+    assert report[2]["attendance_count"] == 2
+    assert report[2]["avg_rating"] == 3.5
+
+    top = crud.get_top_active_students(session, limit=1)[0]
+    assert (top["student_id"], top["events_attended"], top["avg_rating_given"]) == (1, 1, 4.0)
+
+
+def test_check_detects_drift_and_rebuild_repairs_it(session: Session):
+    """Test that the checker reports drifted rows and a rebuild fixes them"""
+    crud.create_registration(session, 1, RegistrationCreate(student_id=2))
+    session.execute(update(EventStats).where(EventStats.event_id == 1).values(registration_count=7))
+    session.commit()
+
+    mismatches = check_stats(session)
+    assert len(mismatches) == 1
+    assert mismatches[0]["table"] == "event_stats"
+    assert mismatches[0]["id"] == 1
+    assert mismatches[0]["expected"]["registration_count"] == 1
+    assert mismatches[0]["actual"]["registration_count"] == 7
+
+    rebuild_stats(session)
+    assert check_stats(session) == []
+
+
+def test_missing_stats_are_rebuilt(session: Session):
+    """Test that a database with fact rows but no stats, as from before the stats tables, is filled on startup"""
+    crud.create_registration(session, 1, RegistrationCreate(student_id=1))
+    session.execute(delete(EventStats))
+    session.execute(delete(StudentStats))
+    session.execute(delete(TrendStats))
+    session.commit()
+
+    assert ensure_stats(session)
+    assert session.get(EventStats, 1).registration_count == 1
+    assert check_stats(session) == []
+    assert not ensure_stats(session)
@@ -0,0 +1,141 @@
+"""
+Tests for the students endpoints
+"""
+
+import pytest
+import sys
+import os
+import time
+from datetime import datetime, timedelta
+from fastapi.testclient import TestClient
+from sqlmodel import Session, SQLModel, create_engine
+from sqlalchemy import event as sa_event
+from sqlalchemy.pool import StaticPool
+
+# Add the backend directory to Python path
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', '..'))
+
+from app.main import app
+from app.cache import response_cache
+from app.db import get_session
+from app.models import Event, Student, Registration, Attendance, Feedback
+
+
+@pytest.fixture(name="engine")
+def engine_fixture():
+    engine = create_engine(
+        "sqlite:///:memory:",
+        connect_args={"check_same_thread": False},
+        poolclass=StaticPool,
+    )
+    SQLModel.metadata.create_all(engine)
+    yield engine
+
+
+@pytest.fixture(name="session")
+def session_fixture(engine):
+    with Session(engine) as session:
+        session.add(Student(id=1, name="Alice", email="alice@test.edu", student_id="TS001"))
+        session.commit()
+        yield session
+
+
+@pytest.fixture(name="client")
+def client_fixture(session: Session):
+    def get_session_override():
+        return session
+
+    app.dependency_overrides[get_session] = get_session_override
+    response_cache.clear()
+    client = TestClient(app)
+    yield client
+    app.dependency_overrides.clear()
+
+
+def add_history(session: Session, count: int, first_id: int = 1):
+    """Register student 1 for `count` past events, attending and rating every other one"""
+    for i in range(first_id, first_id + count):
+        session.add(Event(id=i, title=f"Event {i}", event_type="workshop",
+                          date=datetime(2024, 1, 1) + timedelta(days=i), location="Hall"))
+        session.add(Registration(event_id=i, student_id=1, registered_at=datetime(2023, 12, 1)))
+        if i % 2:
+            session.add(Attendance(event_id=i, student_id=1, attended_at=datetime(2024, 1, 1) + timedelta(days=i)))
+            session.add(Feedback(event_id=i, student_id=1, rating=4 if i % 4 == 1 else 2,
+                                 submitted_at=datetime(2024, 1, 2) + timedelta(days=i)))
+    session.commit()
+
+
+def count_statements(engine, client: TestClient, url: str) -> int:
+    statements = []
+
+    def before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+        statements.append(statement)
+
+    sa_event.listen(engine, "before_cursor_execute", before_cursor_execute)
+    try:
+        response = client.get(url)
+    finally:
+        sa_event.remove(engine, "before_cursor_execute", before_cursor_execute)
+    assert response.status_code == 200
+    return len(statements)
+
+
+def test_student_dashboard(session: Session, client: TestClient):
+    """Test that the dashboard lists events, feedback and totals"""
+    add_history(session, 4)
+    soon = datetime.utcnow() + timedelta(days=7)
+    session.add(Event(id=10, title="Upcoming Talk", event_type="talk", date=soon, location="Library"))
+    session.add(Registration(event_id=10, student_id=1))
+    session.commit()
+
+    response = client.get("/students/1/dashboard")
+    assert response.status_code == 200
+    data = response.json()
+
+    assert data["student"]["email"] == "alice@test.edu"
+    assert [event["title"] for event in data["upcoming_events"]] == ["Upcoming Talk"]
+    assert [event["id"] for event in data["registered_events"]] == [10, 4, 3, 2, 1]
+    assert [event["attended"] for event in data["registered_events"]] == [False, False, True, False, True]
+    assert [event["id"] for event in data["attended_events"]] == [3, 1]
+    assert [(item["event_title"], item["rating"]) for item in data["feedback"]] == [("Event 3", 2), ("Event 1", 4)]
+    assert data["stats"] == {
+        "events_registered": 5,
+        "events_attended": 2,
+        "feedback_given": 2,
+        "avg_rating_given": 3.0,
+        "attendance_rate": 0.4,
+    }
+
+
+def test_student_dashboard_cache_expires_when_an_upcoming_event_starts(session: Session, client: TestClient):
+    """Test that a cached dashboard does not keep listing an event as upcoming after it has started"""
+    session.add(Event(id=1, title="Starting Soon", event_type="talk",
+                      date=datetime.utcnow() + timedelta(seconds=0.5), location="Library"))
+    session.add(Registration(event_id=1, student_id=1))
+    session.commit()
+
+    assert [event["title"] for event in client.get("/students/1/dashboard").json()["upcoming_events"]] == ["Starting Soon"]
+    time.sleep(0.6)
+    assert client.get("/students/1/dashboard").json()["upcoming_events"] == []
+
+
+def test_student_dashboard_without_activity(client: TestClient):
+    """Test that a new student gets an empty dashboard and unknown students a 404"""
+    data = client.get("/students/1/dashboard").json()
+    assert data["registered_events"] == [] and data["feedback"] == []
+    assert data["stats"]["avg_rating_given"] is None
+    assert data["stats"]["attendance_rate"] is None
+
+    assert client.get("/students/999/dashboard").status_code == 404
+
+
+def test_student_dashboard_statement_count_is_constant(engine, session: Session, client: TestClient):
+    """Test that the dashboard is eager-loaded rather than lazy-loaded per row"""
+    add_history(session, 2)
+    baseline = count_statements(engine, client, "/students/1/dashboard")
+
+    add_history(session, 200, first_id=3)
+    response_cache.clear()
+    session.expunge_all()
+
+    assert count_statements(engine, client, "/students/1/dashboard") == baseline